@@ -0,0 +1,143 @@
+"""Search several items at once with the async API of playwright.
+
+The sync API used by `MarketplaceMonitor` blocks on every page load, so searches of
+different items are performed one after another. `AsyncSearchEngine` runs an event
+loop with `async_playwright` in a background thread, so that the monitor, which stays
+synchronous, can hand over a batch of searches and wait for all of them to complete.
+"""
+
+import asyncio
+import threading
+from logging import Logger
+from typing import Any, Coroutine, Dict, List, Tuple, TypeVar
+
+from playwright.async_api import Browser, BrowserContext, Playwright, async_playwright  # type: ignore
+
+from .listing import Listing
+from .marketplace import Marketplace, ResourceBlocker
+from .utils import hilight
+
+T = TypeVar("T")
+
+
+class AsyncSearchEngine:
+    def __init__(
+        self: "AsyncSearchEngine",
+        max_concurrency: int,
+        headless: bool | None = None,
+        logger: Logger | None = None,
+    ) -> None:
+        self.max_concurrency = max_concurrency
+        self.headless = headless
+        self.logger = logger
+        self.playwright: Playwright | None = None
+        self.browser: Browser | None = None
+        # one context, with its own proxy and cookies, per marketplace
+        self.contexts: Dict[str, BrowserContext] = {}
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(
+            target=self.loop.run_forever, name="async-search-engine", daemon=True
+        )
+        self.thread.start()
+
+    def run(self: "AsyncSearchEngine", coro: Coroutine[Any, Any, T]) -> T:
+        """Run a coroutine in the event loop of the engine and wait for its result."""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result()
+
+    def search(
+        self: "AsyncSearchEngine", searches: List[Tuple[Marketplace, Any]]
+    ) -> List[List[Listing] | BaseException]:
+        """Search for items, at most `max_concurrency` at a time.
+
+        Returns the listings found for each (marketplace, item_config) pair, in order,
+        or the exception that stopped the search.
+        """
+        return self.run(self._search_all(searches))
+
+    def stop(self: "AsyncSearchEngine") -> None:
+        if self.loop.is_running():
+            try:
+                self.run(self._close())
+            finally:
+                self.loop.call_soon_threadsafe(self.loop.stop)
+                self.thread.join(timeout=10)
+
+    async def _launch(self: "AsyncSearchEngine") -> Browser:
+        if self.playwright is None:
+            self.playwright = await async_playwright().start()
+        for browser_type in (
+            self.playwright.chromium,
+            self.playwright.firefox,
+            self.playwright.webkit,
+        ):
+            try:
+                return await browser_type.launch(headless=self.headless)
+            except Exception as e:
+                if self.logger:
+                    self.logger.debug(f"Failed to launch {browser_type.name}: {e}")
+        raise RuntimeError(
+            "No browser could be launched. Please ensure Chromium, Firefox, or WebKit is installed."
+        )
+
+    async def _get_context(self: "AsyncSearchEngine", marketplace: Marketplace) -> BrowserContext:
+        if self.browser is None or not self.browser.is_connected():
+            self.browser = await self._launch()
+            self.contexts = {}
+        if marketplace.name not in self.contexts:
+            monitor_config = marketplace.config.monitor_config
+            storage_state = marketplace.storage_state_path
+            # use the proxy of the sync browser, to which navigation failures are attributed
+            proxy = (
+                marketplace.get_proxy_options()
+                if monitor_config is None or marketplace.proxy_server is None
+                else monitor_config.get_proxy_options(marketplace.proxy_server)
+            )
+            # reuse the session saved after logging in with the sync browser
+            context = await self.browser.new_context(
+                proxy=proxy,
+                storage_state=storage_state if storage_state.exists() else None,
+            )
+            blocker = ResourceBlocker.from_config(monitor_config)
+            if blocker is not None:
+                await blocker.attach_async(context)
+                marketplace.resource_blocker = blocker
+            self.contexts[marketplace.name] = context
+        return self.contexts[marketplace.name]
+
+    async def _search_all(
+        self: "AsyncSearchEngine", searches: List[Tuple[Marketplace, Any]]
+    ) -> List[List[Listing] | BaseException]:
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        return await asyncio.gather(
+            *(self._search(semaphore, marketplace, item) for marketplace, item in searches),
+            return_exceptions=True,
+        )
+
+    async def _search(
+        self: "AsyncSearchEngine",
+        semaphore: asyncio.Semaphore,
+        marketplace: Marketplace,
+        item_config: Any,
+    ) -> List[Listing]:
+        async with semaphore:
+            if self.logger:
+                self.logger.debug(
+                    f"""{hilight("[Search]", "info")} Starting concurrent search for {hilight(item_config.name)}"""
+                )
+            context = await self._get_context(marketplace)
+            page = await context.new_page()
+            try:
+                return [x async for x in marketplace.search_async(item_config, page)]
+            finally:
+                await page.close()
+
+    async def _close(self: "AsyncSearchEngine") -> None:
+        for context in self.contexts.values():
+            await context.close()
+        self.contexts = {}
+        if self.browser is not None:
+            await self.browser.close()
+            self.browser = None
+        if self.playwright is not None:
+            await self.playwright.stop()
+            self.playwright = None
@@ -1,32 +1,66 @@
+import asyncio
+import copy
 import datetime
+import hashlib
 import os
 import re
 import time
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
 from dataclasses import dataclass
 from enum import Enum
 from itertools import repeat
 from logging import Logger
-from typing import Any, Generator, List, Tuple, Type, cast
-from urllib.parse import quote
+from pathlib import Path
+from typing import (
+    Any,
+    AsyncGenerator,
+    Dict,
+    Generator,
+    Iterable,
+    Iterator,
+    List,
+    Tuple,
+    Type,
+    cast,
+)
+from urllib.parse import parse_qsl, quote, urlencode, urlsplit, urlunsplit
 
 import humanize
-from currency_converter import CurrencyConverter  # type: ignore
+from playwright.async_api import Page as AsyncPage  # type: ignore
 from playwright.sync_api import Browser, ElementHandle, Page  # type: ignore
 from rich.pretty import pretty_repr
 
+from .filtering import ExclusionReason, ListingFilter
+from .graphql import SearchResponseCapture, merge_listings
+from .html_page import parse_listing_html, parse_search_result_html
+from .http_fetcher import HttpDetailFetcher, parse_item_response
 from .listing import Listing
-from .marketplace import ItemConfig, Marketplace, MarketplaceConfig, WebPage
+from .marketplace import (
+    CircuitOpenError,
+    ItemConfig,
+    Marketplace,
+    MarketplaceConfig,
+    WebPage,
+)
+from .matcher import compile_keywords
+from .ranking import rank_listings, search_recency
+from .revalidation import RevalidationPolicy
 from .utils import (
+    VEHICLE_EMOJI_PATTERNS,
     BaseConfig,
     CounterItem,
     KeyboardMonitor,
     Translator,
+    add_vehicle_emojis,
+    amm_home,
     convert_to_seconds,
     counter,
+    currency_converter,
     doze,
     extract_price,
     hilight,
-    is_substring,
 )
 
 
@@ -96,6 +130,16 @@ SORT_BY_PARAM = {
     SortBy.DISTANCE_ASCEND.value: "distance_ascend",
 }
 
+# search phrase, city, radius, and url of a search
+SearchPlanEntry = Tuple[str, str, int | None, str]
+
+
+def normalize_search_url(url: str) -> str:
+    """Normalize a search url so that identical searches have the same url."""
+    parts = urlsplit(url)
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((parts.scheme, parts.netloc, parts.path.rstrip("/"), query, ""))
+
 
 @dataclass
 class FacebookMarketItemCommonConfig(BaseConfig):
@@ -112,6 +156,7 @@ class FacebookMarketItemCommonConfig(BaseConfig):
     delivery_method: List[str] | None = None
     category: str | None = None
     sort_by: str | None = None
+    search_pages: int | None = None
 
     def handle_seller_locations(self: "FacebookMarketItemCommonConfig") -> None:
         if self.seller_locations is None:
@@ -123,6 +168,8 @@ class FacebookMarketItemCommonConfig(BaseConfig):
             isinstance(x, str) for x in self.seller_locations
         ):
             raise ValueError(f"Item {hilight(self.name)} seller_locations must be a list.")
+        for error in compile_keywords(tuple(self.seller_locations)).errors:
+            warnings.warn(f"Item {self.name} seller_locations: {error}", stacklevel=2)
 
     def handle_availability(self: "FacebookMarketItemCommonConfig") -> None:
         if self.availability is None:
@@ -228,6 +275,12 @@ class FacebookMarketItemCommonConfig(BaseConfig):
                 f"Item {hilight(self.name)} sort_by must be one of {', '.join(x.value for x in SortBy)}."
             )
 
+    def handle_search_pages(self: "FacebookMarketItemCommonConfig") -> None:
+        if self.search_pages is None:
+            return
+        if not isinstance(self.search_pages, int) or self.search_pages < 1:
+            raise ValueError(f"Item {hilight(self.name)} search_pages must be a positive integer.")
+
 
 @dataclass
 class FacebookMarketplaceConfig(MarketplaceConfig, FacebookMarketItemCommonConfig):
@@ -237,7 +290,11 @@ class FacebookMarketplaceConfig(MarketplaceConfig, FacebookMarketItemCommonConfi
     in the marketplace.facebook section only. None of the options are required.
     """
 
+    capture_graphql: bool | None = None
+    # load item pages with the browser, or over http with cookies of the browser
+    detail_fetcher: str | None = None
     login_wait_time: int | None = None
+    parser: str | None = None
     password: str | None = None
     username: str | None = None
 
@@ -276,6 +333,26 @@ class FacebookMarketplaceConfig(MarketplaceConfig, FacebookMarketItemCommonConfi
                 f"Marketplace {self.name} login_wait_time should be a non-negative number."
             )
 
+    def handle_capture_graphql(self: "FacebookMarketplaceConfig") -> None:
+        if self.capture_graphql is None:
+            return
+        if not isinstance(self.capture_graphql, bool):
+            raise ValueError(f"Marketplace {self.name} capture_graphql must be true or false.")
+
+    def handle_detail_fetcher(self: "FacebookMarketplaceConfig") -> None:
+        if self.detail_fetcher is None:
+            return
+        if self.detail_fetcher not in ("browser", "http"):
+            raise ValueError(
+                f"Marketplace {self.name} detail_fetcher must be either 'browser' or 'http'."
+            )
+
+    def handle_parser(self: "FacebookMarketplaceConfig") -> None:
+        if self.parser is None:
+            return
+        if self.parser not in ("browser", "html"):
+            raise ValueError(f"Marketplace {self.name} parser must be either 'browser' or 'html'.")
+
 
 @dataclass
 class FacebookItemConfig(ItemConfig, FacebookMarketItemCommonConfig):
@@ -284,6 +361,7 @@ class FacebookItemConfig(ItemConfig, FacebookMarketItemCommonConfig):
 
 class FacebookMarketplace(Marketplace):
     initial_url = "https://www.facebook.com/login/device-based/regular/login/"
+    marketplace_url = "https://www.facebook.com/marketplace/"
 
     name = "facebook"
 
@@ -297,6 +375,20 @@ class FacebookMarketplace(Marketplace):
         assert name == self.name
         super().__init__(name, browser, keyboard_monitor, logger)
         self.page: Page | None = None
+        self.http_fetcher: HttpDetailFetcher | None = None
+        # searches of each item, for its first and subsequent searches
+        self.search_plans: Dict[
+            Tuple[str, bool], Tuple[FacebookItemConfig, Tuple[SearchPlanEntry, ...]]
+        ] = {}
+
+    def configure(
+        self: "FacebookMarketplace",
+        config: FacebookMarketplaceConfig,
+        translator: Translator | None = None,
+    ) -> None:
+        super().configure(config, translator)
+        # search urls depend on options of the marketplace
+        self.search_plans = {}
 
     @classmethod
     def get_config(cls: Type["FacebookMarketplace"], **kwargs: Any) -> FacebookMarketplaceConfig:
@@ -306,11 +398,49 @@ class FacebookMarketplace(Marketplace):
     def get_item_config(cls: Type["FacebookMarketplace"], **kwargs: Any) -> FacebookItemConfig:
         return FacebookItemConfig(**kwargs)
 
+    @property
+    def storage_state_path(self: "FacebookMarketplace") -> Path:
+        # sessions are saved per account so that a session is not reused after the
+        # username is changed
+        self.config: FacebookMarketplaceConfig
+        username = self.config.username
+        suffix = hashlib.sha256(username.encode()).hexdigest()[:12] if username else "anonymous"
+        return amm_home / f"{self.name}_{suffix}_storage_state.json"
+
+    def has_session(self: "FacebookMarketplace") -> bool:
+        """Whether the browser context has the cookie of a logged in user."""
+        assert self.page is not None
+        return any(
+            cookie.get("name") == "c_user"
+            for cookie in self.page.context.cookies("https://www.facebook.com")
+        )
+
+    def restore_session(self: "FacebookMarketplace") -> bool:
+        """Check if the session restored from a previous login is still valid."""
+        assert self.page is not None
+        if not self.has_session():
+            return False
+        self.goto_url(self.marketplace_url)
+        if not self.is_login_wall(self.page) and self.has_session():
+            if self.logger:
+                self.logger.info(f"""{hilight("[Login]", "succ")} Restored saved session.""")
+            return True
+        if self.logger:
+            self.logger.info(
+                f"""{hilight("[Login]", "info")} Saved session has expired, logging in again."""
+            )
+        self.clear_storage_state()
+        self.page.context.clear_cookies()
+        return False
+
     def login(self: "FacebookMarketplace") -> None:
         assert self.browser is not None
 
         self.page = self.create_page(swap_proxy=True)
 
+        if self.restore_session():
+            return
+
         # Navigate to the URL, no timeout
         self.goto_url(self.initial_url)
 
@@ -342,17 +472,17 @@ class FacebookMarketplace(Marketplace):
         self.config: FacebookMarketplaceConfig
         try:
             if self.config.username:
-                time.sleep(2)
+                self.pacer.pause(2)
                 selector = self.page.wait_for_selector('input[name="email"]')
                 if selector is not None:
                     selector.type(self.config.username, delay=250)
             if self.config.password:
-                time.sleep(2)
+                self.pacer.pause(2)
                 selector = self.page.wait_for_selector('input[name="pass"]')
                 if selector is not None:
                     selector.type(self.config.password, delay=250)
             if self.config.username and self.config.password:
-                time.sleep(2)
+                self.pacer.pause(2)
                 # Facebook removed the <button name="login"> — press Enter to submit the form
                 self.page.keyboard.press("Enter")
         except KeyboardInterrupt:
@@ -377,13 +507,428 @@ class FacebookMarketplace(Marketplace):
                 )
             doze(login_wait_time, keyboard_monitor=self.keyboard_monitor)
 
+        if self.has_session():
+            self.save_storage_state()
+
+    def ensure_session(self: "FacebookMarketplace") -> None:
+        """Log in with the browser, or restore the saved session, if not done yet.
+
+        Called before async searches too, which reuse the session saved by the browser.
+        """
+        if not self.page:
+            self.login()
+
     def search(
         self: "FacebookMarketplace", item_config: FacebookItemConfig
     ) -> Generator[Listing, None, None]:
-        if not self.page:
-            self.login()
-            assert self.page is not None
+        self.ensure_session()
+
+        # when cached listing details are loaded again, for this search only
+        revalidation = RevalidationPolicy.from_config(item_config, self.config)
+        # there is a small chance that search by different keywords and city will return the same items.
+        found: Dict[str, bool] = {}
+        new_listings: List[Listing] = []
+        recency: Dict[str, float] = {}
+        for search_phrase, city, url in self.search_urls(item_config):
+            # no page is in use between searches
+            self.recycle_context_if_needed()
+            found_listings = self.get_shared_search_results(
+                url, max_pages=item_config.search_pages or self.config.search_pages or 1
+            )
+            new_listings.extend(
+                self.collect_new_listings(
+                    found_listings, item_config, search_phrase, city, found, recency
+                )
+            )
+
+        # go to each item and get the description if we have not done that before,
+        # starting with the most promising listings of all searches
+        new_listings = self.prioritize_listings(new_listings, item_config, recency, revalidation)
+        self.recycle_context_if_needed()
+
+        # details are loaded in batches of detail_concurrency pages, but
+        # are yielded in the order of priority
+        all_details = self.get_listings_details(new_listings, item_config, revalidation)
+        for listing in new_listings:
+            if self.keyboard_monitor is not None and self.keyboard_monitor.is_paused():
+                return
+            if self.report_listing_details(listing, next(all_details), item_config):
+                yield listing
+
+    async def search_async(
+        self: "FacebookMarketplace", item_config: FacebookItemConfig, page: AsyncPage
+    ) -> AsyncGenerator[Listing, None]:
+        """Async variant of `search` that uses a page of an async browser context.
+
+        Listings are selected and checked as in `search`, only pages are loaded with
+        the async API. The session is restored from the one saved by `ensure_session`.
+        """
+        revalidation = RevalidationPolicy.from_config(item_config, self.config)
+        found: Dict[str, bool] = {}
+        new_listings: List[Listing] = []
+        recency: Dict[str, float] = {}
+        for search_phrase, city, url in self.search_urls(item_config):
+            found_listings = await self.get_shared_search_results_async(
+                page, url, max_pages=item_config.search_pages or self.config.search_pages or 1
+            )
+            new_listings.extend(
+                self.collect_new_listings(
+                    found_listings, item_config, search_phrase, city, found, recency
+                )
+            )
+
+        new_listings = self.prioritize_listings(new_listings, item_config, recency, revalidation)
+        all_details = await self.get_listings_details_async(
+            page, new_listings, item_config, revalidation
+        )
+        for listing in new_listings:
+            if self.keyboard_monitor is not None and self.keyboard_monitor.is_paused():
+                return
+            if self.report_listing_details(listing, next(all_details), item_config):
+                yield listing
+
+    def collect_new_listings(
+        self: "FacebookMarketplace",
+        found_listings: List[Listing],
+        item_config: FacebookItemConfig,
+        search_phrase: str,
+        city: str,
+        found: Dict[str, bool],
+        recency: Dict[str, float],
+    ) -> List[Listing]:
+        """Record the results of one search and return the listings to load details of."""
+        if not found_listings:
+            # an empty result page can be a sign of throttling
+            self.pacer.backoff()
+            if self.logger:
+                self.logger.error(
+                    f"""{hilight("[Search]", "fail")} Failed to get search results for {search_phrase} from {city}"""
+                )
+
+        counter.increment(CounterItem.SEARCH_PERFORMED, item_config.name)
+        recency.update(
+            {k: v for k, v in search_recency(found_listings).items() if k not in recency}
+        )
+        return self.select_new_listings(found_listings, item_config, found)
+
+    def report_listing_details(
+        self: "FacebookMarketplace",
+        listing: Listing,
+        result: Tuple[Listing, bool] | Exception,
+        item_config: FacebookItemConfig,
+    ) -> bool:
+        """Apply loaded details to a listing and check if it should be reported."""
+        if isinstance(result, Exception):
+            if self.logger:
+                self.logger.error(
+                    f"""{hilight("[Retrieve]", "fail")} Failed to get item details: {result}"""
+                )
+            return False
+        return self.apply_listing_details(listing, result[0], item_config)
+
+    async def goto_url_async(
+        self: "FacebookMarketplace", page: AsyncPage, url: str, paced: bool = True
+    ) -> None:
+        retries = self.config.navigation_retries
+        attempts = 1 + (3 if retries is None else retries)
+        for attempt in range(attempts):
+            self.check_circuit()
+            if paced or attempt > 0:
+                await self.pacer.wait_async()
+            if self.logger:
+                self.logger.debug(f"{hilight('[Retrieve]', 'info')} Navigating to {url}")
+            try:
+                start = time.monotonic()
+                await page.goto(
+                    url, timeout=self.navigation_timeout, wait_until="domcontentloaded"
+                )
+            except Exception as e:
+                self.record_navigation(False)
+                if attempt == attempts - 1:
+                    raise RuntimeError(
+                        f"Failed to navigate to {url} after {attempts} attempts. {e}"
+                    ) from e
+                self.pacer.backoff()
+                continue
+            self.record_navigation(True)
+            if "/login" in page.url:
+                self.pacer.backoff()
+            else:
+                self.pacer.success(time.monotonic() - start)
+            self.flush_counters()
+            return
+
+    async def get_search_results_async(
+        self: "FacebookMarketplace", page: AsyncPage, url: str, max_pages: int = 1
+    ) -> List[Listing]:
+        """Async variant of `get_search_results`."""
+        capture = SearchResponseCapture(page) if self.config.capture_graphql else None
+        with capture or nullcontext():
+            await self.goto_url_async(page, url)
+            listings = await self.read_search_results_async(page, capture)
+            batch = listings
+            for page_number in range(2, max_pages + 1):
+                if self.all_seen(batch):
+                    break
+                if not await self.scroll_search_results_async(page, len(listings)):
+                    break
+                batch = self.unseen_results(
+                    listings, await self.read_search_results_async(page, capture), page_number
+                )
+                if not batch:
+                    break
+                listings.extend(batch)
+        return listings
+
+    async def scroll_search_results_async(
+        self: "FacebookMarketplace", page: AsyncPage, count: int
+    ) -> bool:
+        """Async variant of `scroll_search_results`."""
+        try:
+            await self.pacer.wait_async()
+            await page.evaluate("() => window.scrollTo(0, document.body.scrollHeight)")
+            await page.wait_for_function(_MORE_RESULTS_SCRIPT, arg=count, timeout=15000)
+            return True
+        except Exception as e:
+            if self.logger:
+                self.logger.debug(
+                    f"{hilight('[Search]', 'info')} No more search results after scrolling: {e}"
+                )
+            return False
+
+    async def read_search_results_async(
+        self: "FacebookMarketplace",
+        page: AsyncPage,
+        capture: SearchResponseCapture | None = None,
+    ) -> List[Listing]:
+        """Async variant of `read_search_results`."""
+        if capture is None:
+            return await self.get_search_results_from_page_async(page)
+        try:
+            captured = await capture.collect_async()
+        except Exception as e:
+            if self.logger:
+                self.logger.debug(
+                    f"{hilight('[Retrieve]', 'fail')} Failed to capture search results: {e}"
+                )
+            captured = []
+        listings = await self.get_search_results_from_page_async(page)
+        no_results = (
+            not listings
+            and await page.locator(
+                f"""span:has-text('{self.translator("Browse Marketplace")}')"""
+            ).count()
+            > 0
+        )
+        return self.merge_search_results(captured, listings, no_results)
+
+    async def get_search_results_from_page_async(
+        self: "FacebookMarketplace", page: AsyncPage
+    ) -> List[Listing]:
+        if self.config.parser == "html":
+            listings = parse_search_result_html(await page.content(), self.translator, self.logger)
+            if listings:
+                return listings
+        try:
+            cards = await page.evaluate(
+                _SEARCH_RESULT_SCRIPT, self.translator("Collection of Marketplace items")
+            )
+        except Exception as e:
+            if self.logger:
+                self.logger.debug(
+                    f"{hilight('[Retrieve]', 'fail')} Script-based extraction failed: {e}"
+                )
+            cards = []
+        listings = [
+            FacebookSearchResultPage._listing_from_card(
+                card["href"],
+                card.get("price") or "",
+                card.get("title") or "",
+                card.get("location") or "",
+                card.get("image") or "",
+            )
+            for card in cards or []
+            if card.get("href")
+        ]
+        if listings or self.config.parser == "html":
+            return listings
+        # parsing the HTML replaces the traversal of elements of the sync browser
+        return parse_search_result_html(await page.content(), self.translator, self.logger)
+
+    async def get_listings_details_async(
+        self: "FacebookMarketplace",
+        page: AsyncPage,
+        listings: List[Listing],
+        item_config: FacebookItemConfig,
+        revalidation: RevalidationPolicy | None = None,
+    ) -> Generator[Tuple[Listing, bool] | Exception, None, None]:
+        """Async variant of `get_listings_details`, which loads all details before returning."""
+        cached = self.get_cached_listings_details(listings, revalidation)
+        urls = [x.post_url for x, details in zip(listings, cached) if details is None]
+        http_details: Dict[str, Listing] = {}
+        fetched_over_http = bool(urls) and self.config.detail_fetcher == "http"
+        if fetched_over_http:
+            self.setup_http_fetcher(
+                await page.context.cookies("https://www.facebook.com"),
+                await page.evaluate("() => navigator.userAgent"),
+            )
+            http_details = await self.fetch_listings_details_async(urls)
+        # the http requests of the listings have already waited for the pacer
+        loaded = await self.visit_urls_async(
+            page, [x for x in urls if x not in http_details], paced=not fetched_over_http
+        )
+        return self.listings_details_in_order(
+            listings, cached, http_details, iter(loaded), item_config
+        )
+
+    async def fetch_listings_details_async(
+        self: "FacebookMarketplace", urls: List[str]
+    ) -> Dict[str, Listing]:
+        """Async variant of `fetch_listings_details`."""
+        assert self.http_fetcher is not None
+        fetcher = self.http_fetcher
+        fetched: Dict[str, Listing] = {}
+        for batch in self.detail_batches(urls):
+            await self.pacer.wait_async()
+            batch_start = time.monotonic()
+            pages = await asyncio.gather(*(asyncio.to_thread(fetcher.fetch, x) for x in batch))
+            fetched.update(self.parse_fetched_pages(batch, pages, batch_start))
+        return fetched
+
+    async def visit_urls_async(
+        self: "FacebookMarketplace", page: AsyncPage, urls: List[str], paced: bool = True
+    ) -> List[Listing | Exception]:
+        """Async variant of `visit_urls`, loading up to detail_concurrency pages at a time."""
+        if not urls:
+            return []
+        concurrency = min(self.config.detail_concurrency or 1, len(urls))
+        pages = [page, *[await page.context.new_page() for _ in range(concurrency - 1)]]
+        results: List[Listing | Exception] = []
+        try:
+            for start in range(0, len(urls), len(pages)):
+                try:
+                    self.check_circuit()
+                except CircuitOpenError as e:
+                    results.extend(e for _ in urls[start:])
+                    break
+                # a batch of pages counts as one request for pacing
+                if paced or start > 0:
+                    await self.pacer.wait_async()
+                batch = await asyncio.gather(
+                    *(
+                        self.get_listing_details_async(x, url, paced=False)
+                        for x, url in zip(pages, urls[start : start + len(pages)])
+                    ),
+                    return_exceptions=True,
+                )
+                for result in batch:
+                    if not isinstance(result, (Listing, Exception)):
+                        # such as cancellation of the search
+                        raise result
+                    results.append(result)
+        finally:
+            for x in pages[1:]:
+                await x.close()
+        return results
+
+    async def get_listing_details_async(
+        self: "FacebookMarketplace", page: AsyncPage, post_url: str, paced: bool = True
+    ) -> Listing:
+        await self.goto_url_async(page, post_url, paced=paced)
+        # expand truncated descriptions
+        see_more = page.locator(
+            f'div[role="button"]:has(span:text("{self.translator("See more")}"))'
+        )
+        try:
+            for i in range(await see_more.count()):
+                await see_more.nth(i).click(timeout=2000)
+            await page.wait_for_timeout(500)
+        except Exception as e:
+            if self.logger:
+                self.logger.debug(f"{hilight('[Retrieve]', 'fail')} See more expansion: {e}")
+        details = None
+        if self.config.parser != "html":
+            try:
+                res = await page.evaluate(
+                    _ITEM_PAGE_SCRIPT, _item_page_script_args(self.translator)
+                )
+            except Exception as e:
+                if self.logger:
+                    self.logger.debug(
+                        f"{hilight('[Retrieve]', 'fail')} Script-based extraction failed: {e}"
+                    )
+                res = None
+            details = _listing_from_script_result(res, post_url, self.logger)
+        if details is None:
+            details = parse_listing_html(
+                await page.content(), post_url, self.translator, self.logger
+            )
+        if details is None:
+            raise ValueError(f"Failed to get item details of listing {post_url}.")
+        details.to_cache(post_url)
+        return details
+
+    def search_urls(
+        self: "FacebookMarketplace", item_config: FacebookItemConfig
+    ) -> Generator[Tuple[str, str, str], None, None]:
+        """Generate search phrase, city, and url of each search to perform for the item."""
+        # this should not happen because `Config.validate_items` has checked this
+        if not (item_config.search_city or self.config.search_city):
+            if self.logger:
+                self.logger.error(
+                    f"""{hilight("[Search]", "fail")} No search city provided for {item_config.name}"""
+                )
+        searches = self.build_search_urls(item_config)
+        # increase the searched_count to differentiate first and subsequent searches
+        item_config.searched_count += 1
+        for search_phrase, city, radius, url in searches:
+            if self.logger:
+                self.logger.info(
+                    f"""{hilight("[Search]", "info")} Searching {item_config.marketplace} for """
+                    f"""{hilight(item_config.name)} from {hilight(city)}"""
+                    + (f" with radius={radius}" if radius else " with default radius")
+                )
+            yield search_phrase, city, url
+
+    def plan_search_urls(
+        self: "FacebookMarketplace", item_config: FacebookItemConfig
+    ) -> List[str]:
+        return [normalize_search_url(x[-1]) for x in self.build_search_urls(item_config)]
+
+    def build_search_urls(
+        self: "FacebookMarketplace", item_config: FacebookItemConfig
+    ) -> Tuple[SearchPlanEntry, ...]:
+        """Return search phrase, city, radius, and url of the searches for the next search of the item.
+
+        The searches only depend on the configuration and on whether the item has been
+        searched before, so they are built once and reused until the configuration is
+        reloaded.
+        """
+        key = (item_config.name, item_config.searched_count == 0)
+        plan = self.search_plans.get(key)
+        if plan is None or plan[0] is not item_config:
+            plan = (item_config, tuple(self.plan_searches(item_config)))
+            self.search_plans[key] = plan
+        return plan[1]
+
+    def convert_price(self: "FacebookMarketplace", price: str, currency: str | None) -> str:
+        """Return the amount of a price such as "100" or "100 USD" in the currency of a city."""
+        if price.isdigit():
+            return price
+        amount, cur = price.split(" ", 1)
+        if not currency or cur == currency:
+            return amount
+        converted = str(int(currency_converter().convert(int(amount), cur, currency)))
+        if self.logger:
+            self.logger.debug(
+                f"""{hilight("[Search]", "info")} Converting price {price} to {converted} {currency}"""
+            )
+        return converted
 
+    def plan_searches(
+        self: "FacebookMarketplace", item_config: FacebookItemConfig
+    ) -> List[SearchPlanEntry]:
+        searches = []
         options = []
 
         condition = item_config.condition or self.config.condition
@@ -434,21 +979,15 @@ class FacebookMarketplace(Marketplace):
             options.append(f"sortBy={SORT_BY_PARAM[sort_by]}")
 
         # search multiple keywords and cities
-        # there is a small chance that search by different keywords and city will return the same items.
-        found = {}
         search_city = item_config.search_city or self.config.search_city or []
         city_name = item_config.city_name or self.config.city_name or []
         radiuses = item_config.radius or self.config.radius
         currencies = item_config.currency or self.config.currency
 
-        # this should not happen because `Config.validate_items` has checked this
-        if not search_city:
-            if self.logger:
-                self.logger.error(
-                    f"""{hilight("[Search]", "fail")} No search city provided for {item_config.name}"""
-                )
-        # increase the searched_count to differentiate first and subsequent searches
-        item_config.searched_count += 1
+        max_price = item_config.max_price or self.config.max_price
+        min_price = item_config.min_price or self.config.min_price
+        category = item_config.category or self.config.category
+
         for city, cname, radius, currency in zip(
             search_city,
             repeat(None) if city_name is None else city_name,
@@ -456,141 +995,315 @@ class FacebookMarketplace(Marketplace):
             repeat(None) if currencies is None else currencies,
         ):
             marketplace_url = f"https://www.facebook.com/marketplace/{city}/search?"
+            city_options = list(options)
 
             if radius:
-                # avoid specifying radius more than once
-                if options and options[-1].startswith("radius"):
-                    options.pop()
-                options.append(f"radius={radius}")
-
-            max_price = item_config.max_price or self.config.max_price
-            if max_price:
-                if max_price.isdigit():
-                    options.append(f"maxPrice={max_price}")
-                else:
-                    price, cur = max_price.split(" ", 1)
-                    if currency and cur != currency:
-                        c = CurrencyConverter()
-                        price = str(int(c.convert(int(price), cur, currency)))
-                        if self.logger:
-                            self.logger.debug(
-                                f"""{hilight("[Search]", "info")} Converting price {max_price} {cur} to {price} {currency}"""
-                            )
-                    options.append(f"maxPrice={price}")
-
-            min_price = item_config.min_price or self.config.min_price
-            if min_price:
-                if min_price.isdigit():
-                    options.append(f"minPrice={min_price}")
-                else:
-                    price, cur = min_price.split(" ", 1)
-                    if currency and cur != currency:
-                        c = CurrencyConverter()
-                        price = str(int(c.convert(int(price), cur, currency)))
-                        if self.logger:
-                            self.logger.debug(
-                                f"""{hilight("[Search]", "info")} Converting price {max_price} {cur} to {price} {currency}"""
-                            )
-                    options.append(f"minPrice={price}")
-
-            category = item_config.category or self.config.category
+                city_options.append(f"radius={radius}")
+
+            # free items have no price range
+            if category not in (Category.FREE_STUFF.value, Category.FREE.value):
+                if max_price:
+                    city_options.append(f"maxPrice={self.convert_price(max_price, currency)}")
+                if min_price:
+                    city_options.append(f"minPrice={self.convert_price(min_price, currency)}")
+
             if category:
-                options.append(f"category={category}")
-                if category == Category.FREE_STUFF.value or category == Category.FREE.value:
-                    # find min_price= and max_price= in options and remove them
-                    options = [
-                        x
-                        for x in options
-                        if not x.startswith("minPrice=") and not x.startswith("maxPrice=")
-                    ]
+                city_options.append(f"category={category}")
 
             for search_phrase in item_config.search_phrases:
-                if self.logger:
-                    self.logger.info(
-                        f"""{hilight("[Search]", "info")} Searching {item_config.marketplace} for """
-                        f"""{hilight(item_config.name)} from {hilight(cname or city)}"""
-                        + (f" with radius={radius}" if radius else " with default radius")
+                searches.append(
+                    (
+                        search_phrase,
+                        cname or city,
+                        radius,
+                        marketplace_url
+                        + "&".join([f"query={quote(search_phrase)}", *city_options]),
                     )
+                )
+        return searches
 
-                self.goto_url(
-                    marketplace_url + "&".join([f"query={quote(search_phrase)}", *options])
+    def select_new_listings(
+        self: "FacebookMarketplace",
+        found_listings: List[Listing],
+        item_config: FacebookItemConfig,
+        found: Dict[str, bool],
+    ) -> List[Listing]:
+        """Return listings not seen in this search that pass filters not using description."""
+        unseen = []
+        for listing in found_listings:
+            if listing.post_url.split("?")[0] in found:
+                continue
+            found[listing.post_url.split("?")[0]] = True
+            unseen.append(listing)
+        if not unseen:
+            return []
+        counter.increment(CounterItem.LISTING_EXAMINED, item_config.name, len(unseen))
+
+        # filter by title and location; skip keyword filtering since we do not have description yet.
+        result = self.listing_filter(item_config).filter(unseen, description_available=False)
+        excluded = result.summary()
+        if excluded:
+            counter.increment(
+                CounterItem.EXCLUDED_LISTING, item_config.name, sum(excluded.values())
+            )
+            if self.logger:
+                self.logger.info(
+                    f"""{hilight("[Skip]", "fail")} Exclude {sum(excluded.values())} of {len(unseen)} listings of {hilight(item_config.name)}: """
+                    + ", ".join(f"{count} {reason.value}" for reason, count in excluded.items())
                 )
+        return result.kept(unseen)
 
-                found_listings = FacebookSearchResultPage(
-                    self.page, self.translator, self.logger
-                ).get_listings()
-                time.sleep(5)
-                if self.logger:
-                    self.logger.error(
-                        f"""{hilight("[Search]", "fail")} Failed to get search results for {search_phrase} from {city}"""
-                    )
+    def prioritize_listings(
+        self: "FacebookMarketplace",
+        listings: List[Listing],
+        item_config: FacebookItemConfig,
+        recency: Dict[str, float] | None = None,
+        revalidation: RevalidationPolicy | None = None,
+    ) -> List[Listing]:
+        """Sort listings by score and keep at most `max_detail_fetches` that need to be loaded.
 
-                counter.increment(CounterItem.SEARCH_PERFORMED, item_config.name)
-
-                # go to each item and get the description
-                # if we have not done that before
-                for listing in found_listings:
-                    if listing.post_url.split("?")[0] in found:
-                        continue
-                    if self.keyboard_monitor is not None and self.keyboard_monitor.is_paused():
-                        return
-                    counter.increment(CounterItem.LISTING_EXAMINED, item_config.name)
-                    found[listing.post_url.split("?")[0]] = True
-                    # filter by title and location; skip keyword filtering since we do not have description yet.
-                    if not self.check_listing(listing, item_config, description_available=False):
-                        counter.increment(CounterItem.EXCLUDED_LISTING, item_config.name)
-                        continue
-                    try:
-                        details, from_cache = self.get_listing_details(
-                            listing.post_url,
-                            item_config,
-                            price=listing.price,
-                            title=listing.title,
-                        )
-                        if not from_cache:
-                            time.sleep(5)
-                    except KeyboardInterrupt:
-                        raise
-                    except Exception as e:
-                        if self.logger:
-                            self.logger.error(
-                                f"""{hilight("[Retrieve]", "fail")} Failed to get item details: {e}"""
-                            )
-                        continue
-                    # currently we trust the other items from summary page a bit better
-                    # so we do not copy title, description etc from the detailed result
-                    for attr in ("condition", "seller", "description"):
-                        # other attributes should be consistent
-                        setattr(listing, attr, getattr(details, attr))
-                    listing.name = item_config.name
-                    if self.logger:
-                        self.logger.debug(
-                            f"""{hilight("[Retrieve]", "succ")} New item "{listing.title}" from {listing.post_url} is sold by "{listing.seller}" and with description "{listing.description[:100]}..." """
-                        )
-
-                    # Warn if we never managed to extract a description for keyword-based filtering
-                    if (
-                        (not listing.description or len(listing.description.strip()) == 0)
-                        and item_config.keywords
-                        and len(item_config.keywords) > 0
-                        and self.logger
-                    ):
-                        self.logger.debug(
-                            f"""{hilight("[Error]", "fail")} Failed to extract description for {hilight(listing.title)} at {listing.post_url}. Keyword filtering will only apply to title."""
-                        )
-
-                    if self.check_listing(listing, item_config):
-                        yield listing
-                    else:
-                        counter.increment(CounterItem.EXCLUDED_LISTING, item_config.name)
+        Listings with cached details do not count towards the limit because they do not
+        need to be loaded.
+        """
+        ranked = rank_listings(listings, item_config, self.config, recency)
+        max_fetches = item_config.max_detail_fetches or self.config.max_detail_fetches
+        if not max_fetches:
+            return ranked
+        selected = []
+        fetches = 0
+        for listing in ranked:
+            if self.get_cached_listing_details(
+                listing.post_url, listing.price, listing.title, revalidation
+            ):
+                selected.append(listing)
+            elif fetches < max_fetches:
+                selected.append(listing)
+                fetches += 1
+        if len(selected) < len(ranked) and self.logger:
+            self.logger.info(
+                f"""{hilight("[Retrieve]", "info")} Loading details of {max_fetches} of {len(ranked) - len(selected) + fetches} new listings of {hilight(item_config.name)}, the rest are left for later searches."""
+            )
+        return selected
 
-    def get_listing_details(
+    def apply_listing_details(
+        self: "FacebookMarketplace",
+        listing: Listing,
+        details: Listing,
+        item_config: FacebookItemConfig,
+    ) -> bool:
+        """Copy details to a listing from search results and check if it should be reported."""
+        # currently we trust the other items from summary page a bit better
+        # so we do not copy title, description etc from the detailed result
+        for attr in ("condition", "seller", "description"):
+            # other attributes should be consistent
+            setattr(listing, attr, getattr(details, attr))
+        listing.name = item_config.name
+        if self.logger:
+            self.logger.debug(
+                f"""{hilight("[Retrieve]", "succ")} New item "{listing.title}" from {listing.post_url} is sold by "{listing.seller}" and with description "{listing.description[:100]}..." """
+            )
+
+        # Warn if we never managed to extract a description for keyword-based filtering
+        if (
+            (not listing.description or len(listing.description.strip()) == 0)
+            and item_config.keywords
+            and len(item_config.keywords) > 0
+            and self.logger
+        ):
+            self.logger.debug(
+                f"""{hilight("[Error]", "fail")} Failed to extract description for {hilight(listing.title)} at {listing.post_url}. Keyword filtering will only apply to title."""
+            )
+
+        if self.check_listing(listing, item_config):
+            return True
+        counter.increment(CounterItem.EXCLUDED_LISTING, item_config.name)
+        return False
+
+    def get_shared_search_results(
+        self: "FacebookMarketplace", url: str, max_pages: int = 1
+    ) -> List[Listing]:
+        """Load search results, or reuse those of an identical search.
+
+        Results are reused from an identical search in the same cycle or, if
+        `search_cache_ttl` is set, from a recent search saved in the cache.
+        """
+        key = f"{max_pages}:{normalize_search_url(url)}"
+        if self.cycle_results is not None and key in self.cycle_results:
+            counter.increment(CounterItem.SHARED_SEARCH, self.name)
+            if self.logger:
+                self.logger.debug(
+                    f"""{hilight("[Search]", "info")} Reusing results of an identical search for {url}"""
+                )
+            listings = self.cycle_results[key]
+        else:
+            listings = self.search_results_from_cache(key)
+            if listings is None:
+                listings = self.get_search_results(url, max_pages)
+                self.search_results_to_cache(key, listings)
+            if self.cycle_results is not None:
+                self.cycle_results[key] = listings
+        # listings are modified with the details and name of each item
+        return [copy.copy(x) for x in listings]
+
+    async def get_shared_search_results_async(
+        self: "FacebookMarketplace", page: AsyncPage, url: str, max_pages: int = 1
+    ) -> List[Listing]:
+        """Async variant of `get_shared_search_results`, which waits for identical searches."""
+        key = f"{max_pages}:{normalize_search_url(url)}"
+        if self.cycle_results is not None and key in self.cycle_results:
+            counter.increment(CounterItem.SHARED_SEARCH, self.name)
+            task = self.cycle_results[key]
+        else:
+            # concurrent searches wait for the same task instead of loading the page again
+            task = asyncio.ensure_future(self.load_search_results_async(page, url, key, max_pages))
+            if self.cycle_results is not None:
+                self.cycle_results[key] = task
+        return [copy.copy(x) for x in await task]
+
+    async def load_search_results_async(
+        self: "FacebookMarketplace", page: AsyncPage, url: str, key: str, max_pages: int = 1
+    ) -> List[Listing]:
+        listings = self.search_results_from_cache(key)
+        if listings is None:
+            listings = await self.get_search_results_async(page, url, max_pages)
+            self.search_results_to_cache(key, listings)
+        return listings
+
+    def get_search_results(
+        self: "FacebookMarketplace", url: str, max_pages: int = 1
+    ) -> List[Listing]:
+        """Load search results, scrolling down for up to `max_pages - 1` more batches.
+
+        Scrolling stops early when a batch only has listings that have been retrieved
+        before, because results after them are likely to have been seen too, if
+        results are sorted by date.
+        """
+        assert self.page is not None
+        capture = SearchResponseCapture(self.page) if self.config.capture_graphql else None
+        with capture or nullcontext():
+            # the capture follows the page if it is replaced after a proxy swap
+            self.goto_url(url, on_new_page=None if capture is None else capture.attach)
+            listings = self.read_search_results(capture)
+            batch = listings
+            for page_number in range(2, max_pages + 1):
+                if self.all_seen(batch):
+                    break
+                if not self.scroll_search_results(len(listings)):
+                    break
+                batch = self.unseen_results(
+                    listings, self.read_search_results(capture), page_number
+                )
+                if not batch:
+                    break
+                listings.extend(batch)
+        return listings
+
+    def all_seen(self: "FacebookMarketplace", batch: List[Listing]) -> bool:
+        """Whether all listings of a batch of search results have been retrieved before."""
+        if any(Listing.from_cache(x.post_url) is None for x in batch):
+            return False
+        if self.logger:
+            self.logger.debug(
+                f"{hilight('[Search]', 'info')} No new listing in the last batch of search results."
+            )
+        return True
+
+    def unseen_results(
+        self: "FacebookMarketplace",
+        listings: List[Listing],
+        results: List[Listing],
+        page_number: int,
+    ) -> List[Listing]:
+        """Return results after scrolling that are not in `listings` yet."""
+        known = {x.id for x in listings}
+        batch = [x for x in results if x.id not in known]
+        if batch and self.logger:
+            self.logger.debug(
+                f"{hilight('[Search]', 'info')} {len(batch)} more listings from page {page_number} of search results."
+            )
+        return batch
+
+    def scroll_search_results(self: "FacebookMarketplace", count: int) -> bool:
+        """Scroll to the bottom of search results and wait for more than `count` cards."""
+        assert self.page is not None
+        try:
+            self.pacer.wait()
+            self.page.evaluate("() => window.scrollTo(0, document.body.scrollHeight)")
+            self.page.wait_for_function(_MORE_RESULTS_SCRIPT, arg=count, timeout=15000)
+            return True
+        except KeyboardInterrupt:
+            raise
+        except Exception as e:
+            if self.logger:
+                self.logger.debug(
+                    f"{hilight('[Search]', 'info')} No more search results after scrolling: {e}"
+                )
+            return False
+
+    def read_search_results(
+        self: "FacebookMarketplace", capture: SearchResponseCapture | None = None
+    ) -> List[Listing]:
+        """Read listings from the search page, and from its payloads if captured."""
+        assert self.page is not None
+        if capture is None:
+            return self.get_search_results_from_page()
+
+        try:
+            captured = capture.collect()
+        except KeyboardInterrupt:
+            raise
+        except Exception as e:
+            if self.logger:
+                self.logger.debug(
+                    f"{hilight('[Retrieve]', 'fail')} Failed to capture search results: {e}"
+                )
+            captured = []
+        listings = self.get_search_results_from_page()
+        no_results = (
+            not listings
+            and FacebookSearchResultPage(self.page, self.translator, self.logger).has_no_results()
+        )
+        return self.merge_search_results(captured, listings, no_results)
+
+    def merge_search_results(
+        self: "FacebookMarketplace",
+        captured: List[Listing],
+        listings: List[Listing],
+        no_results: bool,
+    ) -> List[Listing]:
+        """Combine listings captured from the payloads of a search page with its cards."""
+        if self.logger:
+            self.logger.debug(
+                f"{hilight('[Retrieve]', 'info')} {len(captured)} listings captured from search responses"
+            )
+        # the page can hold more cards than the payloads we have seen, so cards
+        # that are not captured are still read from the page
+        if listings:
+            return merge_listings(captured, listings)
+        if no_results:
+            # payloads of a page without result can contain suggested listings
+            return []
+        return captured
+
+    def get_search_results_from_page(self: "FacebookMarketplace") -> List[Listing]:
+        assert self.page is not None
+        if self.config.parser == "html":
+            listings = parse_search_result_html(self.page.content(), self.translator, self.logger)
+            if listings:
+                return listings
+        return FacebookSearchResultPage(self.page, self.translator, self.logger).get_listings()
+
+    def get_cached_listing_details(
         self: "FacebookMarketplace",
         post_url: str,
-        item_config: ItemConfig,
         price: str | None = None,
         title: str | None = None,
-    ) -> Tuple[Listing, bool]:
+        revalidation: RevalidationPolicy | None = None,
+    ) -> Listing | None:
+        """Return cached details of a listing if they can be reused in the search.
+
+        Without `revalidation`, the policy of the search, cached details never expire.
+        """
         assert post_url.startswith("https://www.facebook.com")
         details = Listing.from_cache(post_url)
         if (
@@ -598,24 +1311,267 @@ class FacebookMarketplace(Marketplace):
             and (price is None or details.price == price)
             and (title is None or details.title == title)
         ):
-            # if the price and title are the same, we assume everything else is unchanged.
+            # if the price and title are the same, we assume everything else is unchanged,
+            # unless the details are old enough to be refreshed
+            if revalidation is not None and self.should_refresh_details(post_url, revalidation):
+                return None
+            return details
+        return None
+
+    def should_refresh_details(
+        self: "FacebookMarketplace", post_url: str, revalidation: RevalidationPolicy
+    ) -> bool:
+        """Whether cached details of a listing should be loaded again, according to their age."""
+        if revalidation.is_decided(post_url):
+            return revalidation.should_refresh(post_url, None)
+        cached_time = Listing.cached_time(post_url)
+        refresh = revalidation.should_refresh(post_url, cached_time)
+        age = revalidation.age(cached_time)
+        cached = "at an unknown time" if age is None else f"{humanize.naturaldelta(age)} ago"
+        if refresh:
+            counter.increment(CounterItem.LISTING_REFRESHED, self.name)
+            if self.logger:
+                self.logger.debug(
+                    f"""{hilight("[Retrieve]", "info")} Refreshing details of {post_url} cached {cached}."""
+                )
+        elif revalidation.is_stale(cached_time):
+            # the number of refreshes for this search has been reached
+            counter.increment(CounterItem.STALE_LISTING_REUSED, self.name)
+            if self.logger:
+                self.logger.debug(
+                    f"""{hilight("[Retrieve]", "info")} Reusing details of {post_url} cached {cached}, refresh limit reached."""
+                )
+        return refresh
+
+    def parse_listing_page(self: "FacebookMarketplace", page: Page, post_url: str) -> Listing:
+        details = None
+        if self.config.parser == "html":
+            # expand truncated descriptions, then parse the captured HTML without
+            # further round trips to the browser
+            FacebookItemPage(page, self.translator, self.logger)._expand_see_more()
+            details = parse_listing_html(page.content(), post_url, self.translator, self.logger)
+        if details is None:
+            # the page has already been expanded for the html parser
+            details = parse_listing(
+                page, post_url, self.translator, self.logger, expand=self.config.parser != "html"
+            )
+        if details is None:
+            raise ValueError(
+                f"Failed to get item details of listing {post_url}. "
+                "The listing might be missing key information (e.g. seller) or not in English."
+                "Please add option language to your marketplace configuration is the latter is the case. See https://github.com/BoPeng/ai-marketplace-monitor?tab=readme-ov-file#support-for-non-english-languages for details."
+            )
+        details.to_cache(post_url)
+        return details
+
+    def get_listing_details(
+        self: "FacebookMarketplace",
+        post_url: str,
+        item_config: ItemConfig,
+        price: str | None = None,
+        title: str | None = None,
+    ) -> Tuple[Listing, bool]:
+        details = self.get_cached_listing_details(post_url, price, title)
+        if details is not None:
             return details, True
 
         if not self.page:
             self.login()
 
         assert self.page is not None
-        self.goto_url(post_url)
         counter.increment(CounterItem.LISTING_QUERY, item_config.name)
-        details = parse_listing(self.page, post_url, self.translator, self.logger)
-        if details is None:
-            raise ValueError(
-                f"Failed to get item details of listing {post_url}. "
-                "The listing might be missing key information (e.g. seller) or not in English."
-                "Please add option language to your marketplace configuration is the latter is the case. See https://github.com/BoPeng/ai-marketplace-monitor?tab=readme-ov-file#support-for-non-english-languages for details."
+        fetched = self.config.detail_fetcher == "http"
+        if fetched:
+            self.configure_http_fetcher()
+            details = self.fetch_listing_details(post_url)
+            if details is not None:
+                return details, False
+        # the http request has already waited for the pacer
+        self.goto_url(post_url, paced=not fetched)
+        return self.parse_listing_page(self.page, post_url), False
+
+    def configure_http_fetcher(self: "FacebookMarketplace") -> None:
+        """Let the http fetcher use the cookies, user agent and proxy of the browser."""
+        assert self.page is not None
+        self.setup_http_fetcher(
+            self.page.context.cookies("https://www.facebook.com"),
+            self.page.evaluate("() => navigator.userAgent"),
+        )
+
+    def setup_http_fetcher(
+        self: "FacebookMarketplace", cookies: List[Any], user_agent: str | None
+    ) -> None:
+        if self.http_fetcher is None:
+            self.http_fetcher = HttpDetailFetcher(
+                timeout=self.navigation_timeout / 1000 or 60,
+                pool_size=self.config.detail_concurrency or 1,
+                logger=self.logger,
             )
+        monitor_config = self.config.monitor_config
+        self.http_fetcher.configure(
+            cookies,
+            user_agent,
+            (
+                None
+                if monitor_config is None or self.proxy_server is None
+                else monitor_config.get_proxy_options(self.proxy_server)
+            ),
+        )
+
+    def fetch_listing_details(self: "FacebookMarketplace", post_url: str) -> Listing | None:
+        """Load details of a listing over http, None if the browser should be used instead."""
+        return self.fetch_listings_details([post_url]).get(post_url)
+
+    def fetch_listings_details(self: "FacebookMarketplace", urls: List[str]) -> Dict[str, Listing]:
+        """Load details of listings over http, up to detail_concurrency requests at a time.
+
+        Listings that cannot be loaded or parsed are left out, to be loaded with the browser.
+        """
+        assert self.http_fetcher is not None
+        fetched: Dict[str, Listing] = {}
+        with ThreadPoolExecutor(max_workers=self.config.detail_concurrency or 1) as executor:
+            for batch in self.detail_batches(urls):
+                # a batch of requests counts as one request for pacing, as in visit_urls
+                self.pacer.wait()
+                batch_start = time.monotonic()
+                # only the requests run in threads, results are recorded in this thread
+                pages = executor.map(self.http_fetcher.fetch, batch)
+                fetched.update(self.parse_fetched_pages(batch, pages, batch_start))
+        return fetched
+
+    def detail_batches(
+        self: "FacebookMarketplace", urls: List[str]
+    ) -> Generator[List[str], None, None]:
+        """Split urls into batches of detail_concurrency, stopping if the circuit opens."""
+        concurrency = self.config.detail_concurrency or 1
+        for start in range(0, len(urls), concurrency):
+            if not self.circuit_breaker.allow():
+                # left to the browser, which reports the open circuit
+                return
+            yield urls[start : start + concurrency]
+
+    def parse_fetched_pages(
+        self: "FacebookMarketplace",
+        urls: List[str],
+        pages: Iterable[str | None],
+        batch_start: float,
+    ) -> Dict[str, Listing]:
+        fetched = {}
+        for url, html in zip(urls, pages):
+            details = self.parse_fetched_page(url, html, time.monotonic() - batch_start)
+            if details is not None:
+                fetched[url] = details
+        return fetched
+
+    def parse_fetched_page(
+        self: "FacebookMarketplace", post_url: str, html: str | None, load_time: float
+    ) -> Listing | None:
+        if html is None:
+            # the request failed or was redirected to the login page
+            self.record_navigation(False)
+            self.pacer.backoff()
+            details = None
+        else:
+            self.record_navigation(True)
+            details = parse_item_response(html, post_url, self.translator, self.logger)
+        if details is None:
+            if self.logger:
+                self.logger.debug(
+                    f"{hilight('[Retrieve]', 'info')} Loading {post_url} with the browser instead."
+                )
+            return None
+        self.pacer.success(load_time)
+        if self.proxy_pool is not None:
+            self.proxy_pool.record_success(self.proxy_server, load_time)
+        counter.increment(CounterItem.HTTP_DETAIL_FETCH, self.name)
         details.to_cache(post_url)
-        return details, False
+        return details
+
+    def get_cached_listings_details(
+        self: "FacebookMarketplace",
+        listings: List[Listing],
+        revalidation: RevalidationPolicy | None = None,
+    ) -> List[Listing | None]:
+        return [
+            self.get_cached_listing_details(x.post_url, x.price, x.title, revalidation)
+            for x in listings
+        ]
+
+    def get_listings_details(
+        self: "FacebookMarketplace",
+        listings: List[Listing],
+        item_config: ItemConfig,
+        revalidation: RevalidationPolicy | None = None,
+    ) -> Generator[Tuple[Listing, bool] | Exception, None, None]:
+        """Get details of listings, in order, loading up to detail_concurrency pages at a time.
+
+        Failures are yielded as exceptions so that the caller can skip the listing.
+        """
+        cached = self.get_cached_listings_details(listings, revalidation)
+        urls = [x.post_url for x, details in zip(listings, cached) if details is None]
+        if urls:
+            self.ensure_session()
+
+        # listings loaded over http, the rest are loaded with the browser
+        http_details: Dict[str, Listing] = {}
+        fetched_over_http = bool(urls) and self.config.detail_fetcher == "http"
+        if fetched_over_http:
+            self.configure_http_fetcher()
+            http_details = self.fetch_listings_details(urls)
+        # the http requests of the listings have already waited for the pacer
+        loaded = self.visit_urls(
+            [x for x in urls if x not in http_details],
+            self.parse_listing_page,
+            paced=not fetched_over_http,
+        )
+        yield from self.listings_details_in_order(
+            listings, cached, http_details, loaded, item_config
+        )
+
+    def listings_details_in_order(
+        self: "FacebookMarketplace",
+        listings: List[Listing],
+        cached: List[Listing | None],
+        http_details: Dict[str, Listing],
+        loaded: Iterator[Listing | Exception],
+        item_config: ItemConfig,
+    ) -> Generator[Tuple[Listing, bool] | Exception, None, None]:
+        """Yield details of listings from the cache, http requests, or pages loaded in order."""
+        for listing, details in zip(listings, cached):
+            if details is not None:
+                yield details, True
+                continue
+            counter.increment(CounterItem.LISTING_QUERY, item_config.name)
+            if listing.post_url in http_details:
+                yield http_details[listing.post_url], False
+                continue
+            result = next(loaded)
+            yield result if isinstance(result, Exception) else (result, False)
+
+    def listing_filter(
+        self: "FacebookMarketplace", item_config: FacebookItemConfig
+    ) -> ListingFilter:
+        category = item_config.category or self.config.category
+        free = category in (Category.FREE_STUFF.value, Category.FREE.value)
+        # get locations and exclude_sellers from either marketplace config or item config
+        return ListingFilter(
+            antikeywords=item_config.antikeywords,
+            keywords=item_config.keywords,
+            seller_locations=(
+                item_config.seller_locations
+                if item_config.seller_locations is not None
+                else self.config.seller_locations
+            ),
+            exclude_sellers=(
+                item_config.exclude_sellers
+                if item_config.exclude_sellers is not None
+                else self.config.exclude_sellers
+            ),
+            # free items have no price range
+            min_price=None if free else item_config.min_price or self.config.min_price,
+            max_price=None if free else item_config.max_price or self.config.max_price,
+            currencies=item_config.currency or self.config.currency,
+        )
 
     def check_listing(
         self: "FacebookMarketplace",
@@ -623,63 +1579,83 @@ class FacebookMarketplace(Marketplace):
         item_config: FacebookItemConfig,
         description_available: bool = True,
     ) -> bool:
-        # get antikeywords from both item_config or config
-        antikeywords = item_config.antikeywords
-        if antikeywords and (
-            is_substring(antikeywords, item.title + " " + item.description, logger=self.logger)
-        ):
-            if self.logger:
-                self.logger.info(
-                    f"""{hilight("[Skip]", "fail")} Exclude {hilight(item.title)} due to {hilight("excluded keywords", "fail")}: {", ".join(antikeywords)}"""
-                )
+        reason = self.listing_filter(item_config).exclusion_reason(item, description_available)
+        if reason is None:
+            return True
+        if not self.logger:
             return False
-
-        # if the return description does not contain any of the search keywords
-        keywords = item_config.keywords
-        if (
-            description_available
-            and keywords
-            and not (
-                is_substring(keywords, item.title + "  " + item.description, logger=self.logger)
+        if reason == ExclusionReason.ANTIKEYWORDS:
+            self.logger.info(
+                f"""{hilight("[Skip]", "fail")} Exclude {hilight(item.title)} due to {hilight("excluded keywords", "fail")}: {", ".join(item_config.antikeywords or [])}"""
             )
-        ):
-            if self.logger:
-                self.logger.info(
-                    f"""{hilight("[Skip]", "fail")} Exclude {hilight(item.title)} {hilight("without required keywords", "fail")} in title and description."""
-                )
-            return False
-
-        # get locations from either marketplace config or item config
-        if item_config.seller_locations is not None:
-            allowed_locations = item_config.seller_locations
-        else:
-            allowed_locations = self.config.seller_locations or []
-        if allowed_locations and not is_substring(
-            allowed_locations, item.location, logger=self.logger
-        ):
-            if self.logger:
-                self.logger.info(
-                    f"""{hilight("[Skip]", "fail")} Exclude {hilight("out of area", "fail")} item {hilight(item.title)} from location {hilight(item.location)}"""
-                )
-            return False
-
-        # get exclude_sellers from both item_config or config
-        if item_config.exclude_sellers is not None:
-            exclude_sellers = item_config.exclude_sellers
-        else:
-            exclude_sellers = self.config.exclude_sellers or []
-        if (
-            item.seller
-            and exclude_sellers
-            and is_substring(exclude_sellers, item.seller, logger=self.logger)
-        ):
-            if self.logger:
-                self.logger.info(
-                    f"""{hilight("[Skip]", "fail")} Exclude {hilight(item.title)} sold by {hilight("banned seller", "failed")} {hilight(item.seller)}"""
-                )
-            return False
-
-        return True
+        elif reason == ExclusionReason.KEYWORDS:
+            self.logger.info(
+                f"""{hilight("[Skip]", "fail")} Exclude {hilight(item.title)} {hilight("without required keywords", "fail")} in title and description."""
+            )
+        elif reason == ExclusionReason.LOCATION:
+            self.logger.info(
+                f"""{hilight("[Skip]", "fail")} Exclude {hilight("out of area", "fail")} item {hilight(item.title)} from location {hilight(item.location)}"""
+            )
+        elif reason == ExclusionReason.SELLER:
+            self.logger.info(
+                f"""{hilight("[Skip]", "fail")} Exclude {hilight(item.title)} sold by {hilight("banned seller", "failed")} {hilight(item.seller)}"""
+            )
+        elif reason == ExclusionReason.PRICE:
+            self.logger.info(
+                f"""{hilight("[Skip]", "fail")} Exclude {hilight(item.title)} with price {hilight(item.price)} {hilight("out of price range", "fail")}"""
+            )
+        return False
+
+
+# Wait, after scrolling, until the search page has more than `count` listings.
+_MORE_RESULTS_SCRIPT = """(count) => new Set(
+    Array.from(document.querySelectorAll('a[href*="/marketplace/item/"]')).map(
+        (x) => x.getAttribute("href").split("?")[0]
+    )
+).size > count"""
+
+# Extract every listing card of a search result page in one `page.evaluate` call. The
+# grid is located the same way as `FacebookSearchResultPage._get_listing_elements_by_traversing_header`
+# and `_get_listings_elements_by_children_counts`, and each card is read the same way as
+# `FacebookSearchResultPage._get_listings_by_elements`.
+_SEARCH_RESULT_SCRIPT = """(label) => {
+  const kids = (el) => (el ? Array.from(el.children) : []);
+  const nth = (el, path) => {
+    for (const i of path) {
+      if (!el) return null;
+      el = el.children[i] || null;
+    }
+    return el;
+  };
+  let cards = [];
+  const heading = document.querySelector(`[aria-label="${label}"]`);
+  if (heading) {
+    cards = kids(nth(heading, [0, 0, 2, 0, 1])).filter((el) => el.tagName === "DIV");
+  }
+  cards = cards.filter((el) => el.textContent);
+  if (!cards.length) {
+    let parent = document.querySelector("img");
+    while (parent && parent.children.length <= 10) parent = parent.parentElement;
+    cards = kids(parent).filter((el) => el.textContent);
+  }
+  const results = [];
+  for (const card of cards) {
+    const atag = nth(card, [0, 0, 0, 0, 0, 0, 0, 0]);
+    if (!atag) continue;
+    const details = kids(atag.children[0]).filter((el) => el.tagName === "DIV")[1];
+    if (!details) continue;
+    const divs = kids(details).filter((el) => el.tagName === "DIV");
+    const img = card.querySelector("img");
+    results.push({
+      href: atag.getAttribute("href") || "",
+      price: divs.length > 0 ? divs[0].textContent || "" : "",
+      title: divs.length > 1 ? divs[1].textContent || "" : "",
+      location: divs.length > 2 ? divs[2].textContent || "" : "",
+      image: (img && img.getAttribute("src")) || "",
+    });
+  }
+  return results;
+}"""
 
 
 class FacebookSearchResultPage(WebPage):
@@ -732,11 +1708,22 @@ class FacebookSearchResultPage(WebPage):
                 )
         return valid_listings
 
+    def has_no_results(self: "FacebookSearchResultPage") -> bool:
+        """Whether facebook reports that there is no listing matching the search."""
+        return (
+            self.page.locator(
+                f"""span:has-text('{self.translator("Browse Marketplace")}')"""
+            ).count()
+            > 0
+        )
+
     def get_listings(self: "FacebookSearchResultPage") -> List[Listing]:
         # if no result is found
-        btn = self.page.locator(f"""span:has-text('{self.translator("Browse Marketplace")}')""")
-        if btn.count() > 0:
+        if self.has_no_results():
             if self.logger:
+                btn = self.page.locator(
+                    f"""span:has-text('{self.translator("Browse Marketplace")}')"""
+                )
                 msg = self._parent_with_cond(
                     btn.first,
                     lambda x: len(x) == 3
@@ -746,6 +1733,77 @@ class FacebookSearchResultPage(WebPage):
                 self.logger.info(f"{hilight('[Retrieve]', 'dim')} {msg}")
             return []
 
+        listings = self._get_listings_by_script()
+        if listings:
+            return listings
+        # fall back to walking the grid one element at a time
+        return self._get_listings_by_elements()
+
+    def _get_listings_by_script(self: "FacebookSearchResultPage") -> List[Listing]:
+        """Extract all listing cards with a single round trip to the browser.
+
+        Returns an empty list if the script fails or finds no card, in which case
+        the caller falls back to the per-element path.
+        """
+        try:
+            cards = self.page.evaluate(
+                _SEARCH_RESULT_SCRIPT, self.translator("Collection of Marketplace items")
+            )
+        except KeyboardInterrupt:
+            raise
+        except Exception as e:
+            if self.logger:
+                self.logger.debug(
+                    f"{hilight('[Retrieve]', 'fail')} Script-based extraction failed: {e}"
+                )
+            return []
+        listings: List[Listing] = []
+        for card in cards or []:
+            if not card.get("href"):
+                continue
+            listings.append(
+                self._listing_from_card(
+                    card["href"],
+                    card.get("price") or "",
+                    card.get("title") or "",
+                    card.get("location") or "",
+                    card.get("image") or "",
+                )
+            )
+        return listings
+
+    @staticmethod
+    def _listing_from_card(
+        post_url: str,
+        raw_price: str,
+        title: str,
+        location: str,
+        image: str,
+    ) -> Listing:
+        if post_url.startswith("/"):
+            post_url = f"https://www.facebook.com{post_url}"
+
+        if image.startswith("/"):
+            image = f"https://www.facebook.com{image}"
+
+        return Listing(
+            marketplace="facebook",
+            name="",
+            id=post_url.split("?")[0].rstrip("/").split("/")[-1],
+            title=title,
+            image=image,
+            price=extract_price(raw_price),
+            # all the ?referral_code&referral_sotry_type etc
+            # could be helpful for live navigation, but will be stripped
+            # for caching item details.
+            post_url=post_url,
+            location=location,
+            condition="",
+            seller="",
+            description="",
+        )
+
+    def _get_listings_by_elements(self: "FacebookSearchResultPage") -> List[Listing]:
         # find the grid box
         try:
             valid_listings = (
@@ -785,32 +1843,9 @@ class FacebookSearchResultPage(WebPage):
 
                 # get image
                 img = listing.query_selector("img")
-                image = img.get_attribute("src") if img else ""
-                price = extract_price(raw_price)
-
-                if post_url.startswith("/"):
-                    post_url = f"https://www.facebook.com{post_url}"
-
-                if image.startswith("/"):
-                    image = f"https://www.facebook.com{image}"
-
+                image = (img.get_attribute("src") if img else "") or ""
                 listings.append(
-                    Listing(
-                        marketplace="facebook",
-                        name="",
-                        id=post_url.split("?")[0].rstrip("/").split("/")[-1],
-                        title=title,
-                        image=image,
-                        price=price,
-                        # all the ?referral_code&referral_sotry_type etc
-                        # could be helpful for live navigation, but will be stripped
-                        # for caching item details.
-                        post_url=post_url,
-                        location=location,
-                        condition="",
-                        seller="",
-                        description="",
-                    )
+                    self._listing_from_card(post_url, raw_price, title, location, image)
                 )
             except KeyboardInterrupt:
                 raise
@@ -866,12 +1901,13 @@ class FacebookItemPage(WebPage):
             if self.logger:
                 self.logger.debug(f"{hilight('[Retrieve]', 'fail')} See more expansion: {e}")
 
-    def parse(self: "FacebookItemPage", post_url: str) -> Listing:
+    def parse(self: "FacebookItemPage", post_url: str, expand: bool = True) -> Listing:
         if not self.verify_layout():
             raise ValueError("Layout mismatch")
 
         # expand any truncated description sections before extracting text
-        self._expand_see_more()
+        if expand:
+            self._expand_see_more()
 
         # title
         title = self.get_title()
@@ -1146,40 +2182,19 @@ class FacebookRentalItemPage(FacebookRegularItemPage):
         return self.translator("**unspecified**")
 
 
-_VEHICLE_EMOJI_PATTERNS = [
-    ("Driven", "🚗"),
-    ("transmission", "⚙️"),
-    ("color", "🎨"),
-    ("safety rating", "⭐"),
-    ("NHTSA", "⭐"),
-    ("Fuel type", "⛽"),
-    ("MPG", "⛽"),
-    ("owner", "👤"),
-    ("paid off", "💰"),
-    ("Clean title", "✅"),
-    ("no significant damage", "✅"),
-    ("Salvage", "⚠️"),
-    ("accident", "⚠️"),
+# words looked up in item pages, passed to `_ITEM_PAGE_SCRIPT` after translation
+_ITEM_PAGE_WORDS = [
+    "**unspecified**",
+    "About this vehicle",
+    "Condition",
+    "Description",
+    "Location is approximate",
+    "See less",
+    "See more",
+    "Seller's description",
 ]
 
 
-def _add_vehicle_emojis(text: str) -> str:
-    """Prepend emoji indicators to known vehicle attribute lines."""
-    lines = text.split("\n")
-    result = []
-    for line in lines:
-        stripped = line.strip()
-        if not stripped:
-            continue
-        emoji = ""
-        for pattern, icon in _VEHICLE_EMOJI_PATTERNS:
-            if pattern.lower() in stripped.lower():
-                emoji = icon + " "
-                break
-        result.append(emoji + stripped)
-    return "\n".join(result)
-
-
 class FacebookAutoItemWithAboutAndDescriptionPage(FacebookRegularItemPage):
     def _has_about_this_vehicle(self: "FacebookAutoItemWithAboutAndDescriptionPage") -> bool:
         return any(
@@ -1207,9 +2222,7 @@ class FacebookAutoItemWithAboutAndDescriptionPage(FacebookRegularItemPage):
                 and self.translator("About this vehicle") in (x[0].text_content() or "")
                 and (x[1].text_content() or "").replace("\xa0", "").strip(),
                 # Extract all texts, using inner_text to preserve line breaks, and add emojis
-                lambda x: _add_vehicle_emojis(
-                    "\n".join([child.inner_text() or "" for child in x])
-                ),
+                lambda x: add_vehicle_emojis("\n".join([child.inner_text() or "" for child in x])),
             )
         except KeyboardInterrupt:
             raise
@@ -1355,9 +2368,300 @@ class FacebookAutoItemWithDescriptionPage(FacebookAutoItemWithAboutAndDescriptio
             return ""
 
 
+# Detect the layout of an item page and extract all its fields in one `page.evaluate` call.
+# Layouts are tried in the same order as `parse_listing`, and each field is located the
+# same way as the corresponding `get_*` method of the page classes above, so that the
+# result matches what the classes would return.
+_ITEM_PAGE_SCRIPT = """({ words, emoji }) => {
+  const U = words["**unspecified**"];
+  const norm = (s) => (s || "").replace(/\\s+/g, " ").trim();
+  const text = (el) => (el && el.textContent) || "";
+  const all = (sel, root) => Array.from((root || document).querySelectorAll(sel));
+  // playwright's `:text()` (case-insensitive substring) and `:text-is()` (exact) both
+  // match the innermost element holding the text
+  const hasText = (t) => (el) => norm(text(el)).toLowerCase().includes(norm(t).toLowerCase());
+  const isText = (t) => (el) => norm(text(el)) === norm(t);
+  const self = (match) => (el) => match(el) && !Array.from(el.children).some(match);
+  const spans = (match) => all("span").filter(self(match));
+  const h2With = (phrase) => all("h2").filter((h) => all("span", h).some(self(hasText(phrase))));
+  const attempt = (fn) => {
+    try {
+      return fn();
+    } catch (e) {
+      return "";
+    }
+  };
+  const parentWithCond = (el, cond, ret) => {
+    if (!el) return "";
+    for (let p = el; p; p = p.parentElement) {
+      const kids = Array.from(p.children);
+      if (cond(kids)) return typeof ret === "number" ? text(kids[ret]) || U : ret(kids);
+    }
+    throw new Error("Could not find parent element with condition.");
+  };
+  const childrenWithCond = (el, cond, ret) => {
+    if (!el) return "";
+    for (let c = el; c; c = c.children[0]) {
+      const kids = Array.from(c.children);
+      if (cond(kids)) return typeof ret === "number" ? text(kids[ret]) || U : ret(kids);
+      if (!kids.length) break;
+    }
+    throw new Error("Could not find child element with condition.");
+  };
+  // locators are strict: zero or several matches is an error
+  const only = (els) => {
+    if (els.length !== 1) throw new Error(`${els.length} elements found`);
+    return els[0];
+  };
+  const addEmojis = (s) =>
+    s
+      .split("\\n")
+      .map((line) => line.trim())
+      .filter((line) => line)
+      .map((line) => {
+        const hit = emoji.find(([pattern]) => line.toLowerCase().includes(pattern.toLowerCase()));
+        return hit ? `${hit[1]} ${line}` : line;
+      })
+      .join("\\n");
+  const hasH2 = (phrase) => all("h2").some((h) => text(h).includes(phrase));
+  const withContent = (phrase) => (x) =>
+    x.length > 1 && text(x[0]).includes(phrase) && text(x[1]).split("\\u00a0").join("").trim();
+  const SD = words["Seller's description"];
+  const AV = words["About this vehicle"];
+
+  const regular = {
+    title: () => attempt(() => text(all("h1").slice(-1)[0]) || U),
+    price: () =>
+      attempt(() => text(only(all("h1").map((h) => h.nextElementSibling).filter((x) => x))) || U),
+    image: () => attempt(() => all("img")[0].getAttribute("src") || ""),
+    seller: () => {
+      const links = (part) => all("a").filter((a) => (a.getAttribute("href") || "").includes(part));
+      let found = links("/marketplace/profile");
+      if (!found.length) found = links("/profile");
+      return found.length ? text(found[found.length - 1]) || U : U;
+    },
+    description: () =>
+      attempt(() => {
+        const found = new Set();
+        for (const span of spans(hasText(words.Condition))) {
+          let ul = span.parentElement;
+          while (ul && ul.tagName !== "UL") ul = ul.parentElement;
+          if (ul && ul.nextElementSibling) found.add(ul.nextElementSibling);
+        }
+        return text(only(Array.from(found))) || U;
+      }),
+    condition: () =>
+      attempt(() =>
+        parentWithCond(
+          only(spans(hasText(words.Condition)).slice(0, 1)),
+          (x) => x.length >= 2 && text(x[0]).includes(words.Condition),
+          1,
+        ),
+      ),
+    location: () =>
+      attempt(() =>
+        parentWithCond(
+          only(spans(hasText(words["Location is approximate"]))),
+          (x) => x.length === 2 && text(x[1]).includes(words["Location is approximate"]),
+          0,
+        ),
+      ),
+  };
+  const flexHits = () => {
+    const hits = [];
+    let n = spans(isText(words.Condition))[0];
+    for (let i = 0; i < 16 && n && hits.length < 2; i++) {
+      const t = text(n.nextElementSibling).trim();
+      if (t) hits.push(t);
+      n = n.parentElement;
+    }
+    return hits;
+  };
+  const autoSellerDescription = (minKids, idx) =>
+    attempt(() =>
+      parentWithCond(h2With(SD)[0], withContent(SD), (x) =>
+        childrenWithCond(
+          x[1],
+          (y) => y.length > minKids,
+          (y) => (idx === null ? text(y[0]) || U : `\\n\\n${SD}\\n\\n${text(y[idx]) || U}`),
+        ),
+      ),
+    );
+  const aboutDescription = () =>
+    attempt(() =>
+      parentWithCond(only(h2With(AV)), withContent(AV), (x) =>
+        addEmojis(x.map((child) => child.innerText || "").join("\\n")),
+      ),
+    ) + autoSellerDescription(1, 0);
+  const layouts = [
+    {
+      name: "FacebookRentalItemPage",
+      verify: () => hasH2(words.Description),
+      description: () =>
+        attempt(() =>
+          parentWithCond(
+            h2With(words.Description)[0],
+            (x) => x.length > 1 && text(x[0]) === words.Description,
+            1,
+          ),
+        ),
+      condition: () => U,
+    },
+    {
+      name: "FacebookAutoItemWithAboutAndDescriptionPage",
+      verify: () => hasH2(AV) && hasH2(SD),
+      description: aboutDescription,
+      price: () => {
+        const m = aboutDescription().match(/\\$\\d{1,3}(?:,\\d{3})*(?:\\.\\d{2})?(?:,\\d{2})?/);
+        return m ? m[0] : U;
+      },
+      condition: () => U,
+    },
+    {
+      name: "FacebookAutoItemWithDescriptionPage",
+      verify: () => hasH2(SD) && !hasH2(AV),
+      description: () => autoSellerDescription(2, 1),
+      condition: () => {
+        let res = autoSellerDescription(2, null);
+        if (res.startsWith(words.Condition)) res = res.slice(words.Condition.length);
+        return res.trim();
+      },
+      price: () =>
+        attempt(() => {
+          const h1 = all("h1").slice(-1)[0];
+          const header = text(h1);
+          return parentWithCond(h1, (x) => x.length > 1 && text(x[0]).includes(header), 1);
+        }),
+    },
+    {
+      name: "FacebookRegularItemPage",
+      verify: () => all("li").some((li) => text(li).includes(words.Condition)),
+    },
+    {
+      name: "FacebookFlexItemPage",
+      verify: () => spans(isText(words.Condition)).length > 0 && all("h1").length > 0,
+      condition: () => attempt(() => flexHits()[0] || ""),
+      description: () => attempt(() => flexHits()[1] || ""),
+      location: () =>
+        attempt(() => {
+          const phrase = words["Location is approximate"];
+          let n = spans(hasText(phrase))[0];
+          for (let i = 0; i < 10 && n; i++) {
+            const t = text(n).trim();
+            if (t.split(phrase).join("").split("·").join("").trim())
+              return t.split(phrase).join("").split("·").join("").trim();
+            n = n.parentElement;
+          }
+          return "";
+        }),
+    },
+  ];
+  for (const layout of layouts) {
+    const get = (field) => (layout[field] || regular[field])();
+    try {
+      if (!layout.verify()) continue;
+      const title = get("title");
+      const price = get("price");
+      let description = get("description");
+      for (const label of [words["See more"], words["See less"]]) {
+        description = description.split(label).join("").trim();
+      }
+      if (!title || !price || !description) continue;
+      return {
+        layout: layout.name,
+        title,
+        price,
+        description,
+        image: get("image"),
+        location: get("location"),
+        condition: get("condition"),
+        seller: get("seller"),
+      };
+    } catch (e) {
+      continue;
+    }
+  }
+  return null;
+}"""
+
+
+def parse_listing_by_script(
+    page: Page,
+    post_url: str,
+    translator: Translator | None = None,
+    logger: Logger | None = None,
+    expand: bool = True,
+) -> Listing | None:
+    """Parse an item page with a single round trip to the browser.
+
+    Returns None if the script fails or no layout matches, in which case
+    `parse_listing` falls back to trying the page classes one by one.
+    """
+    translator = Translator() if translator is None else translator
+    # expand any truncated description sections before extracting text
+    if expand:
+        FacebookItemPage(page, translator, logger)._expand_see_more()
+    try:
+        res = page.evaluate(_ITEM_PAGE_SCRIPT, _item_page_script_args(translator))
+    except KeyboardInterrupt:
+        raise
+    except Exception as e:
+        if logger:
+            logger.debug(f"{hilight('[Retrieve]', 'fail')} Script-based extraction failed: {e}")
+        return None
+    return _listing_from_script_result(res, post_url, logger)
+
+
+def _item_page_script_args(translator: Translator) -> dict:
+    return {
+        "words": {word: translator(word) for word in _ITEM_PAGE_WORDS},
+        "emoji": VEHICLE_EMOJI_PATTERNS,
+    }
+
+
+def _listing_from_script_result(
+    res: dict | None, post_url: str, logger: Logger | None = None
+) -> Listing | None:
+    if not res:
+        return None
+
+    if logger:
+        logger.info(
+            f"{hilight('[Retrieve]', 'succ')} Parsing {hilight(res['title'])} with layout {res['layout']}"
+        )
+    listing = Listing(
+        marketplace="facebook",
+        name="",
+        id=post_url.split("?")[0].rstrip("/").split("/")[-1],
+        title=res["title"],
+        image=res["image"],
+        price=extract_price(res["price"]),
+        post_url=post_url,
+        location=res["location"],
+        condition=res["condition"],
+        description=res["description"],
+        seller=res["seller"],
+    )
+    if logger:
+        logger.debug(f"{hilight('[Retrieve]', 'succ')} {pretty_repr(listing)}")
+    return listing
+
+
 def parse_listing(
-    page: Page, post_url: str, translator: Translator | None = None, logger: Logger | None = None
+    page: Page,
+    post_url: str,
+    translator: Translator | None = None,
+    logger: Logger | None = None,
+    expand: bool = True,
 ) -> Listing | None:
+    translator = Translator() if translator is None else translator
+    # expand the page once, instead of once for each layout that is tried
+    if expand:
+        FacebookItemPage(page, translator, logger)._expand_see_more()
+    listing = parse_listing_by_script(page, post_url, translator, logger, expand=False)
+    if listing is not None:
+        return listing
+
     supported_facebook_item_layouts = [
         FacebookRentalItemPage,
         FacebookAutoItemWithAboutAndDescriptionPage,
@@ -1368,7 +2672,7 @@ def parse_listing(
 
     for page_model in supported_facebook_item_layouts:
         try:
-            return page_model(page, translator, logger).parse(post_url)
+            return page_model(page, translator, logger).parse(post_url, expand=False)
         except KeyboardInterrupt:
             raise
         except Exception:
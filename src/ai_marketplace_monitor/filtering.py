@@ -0,0 +1,186 @@
+"""Filter listings by keywords, location, seller, and price.
+
+Prices on search result cards are checked against `min_price` and `max_price` of the
+item, converted to the currency of the card if the prices are specified with a
+currency. Facebook also returns listings outside of the price range of the search,
+such as sponsored and nearby listings, which are excluded before their details are
+loaded. Listings without a price that can be read, or with a price in a currency
+that cannot be determined, are kept.
+
+Listings of a search are checked together: the keyword matchers of the item are
+looked up once for the batch, and the result tells which listings to keep and why
+the others are excluded, so that the exclusions can be reported with one message
+per search instead of one per listing.
+"""
+
+from collections import Counter
+from dataclasses import dataclass
+from enum import Enum
+from typing import Dict, List, Sequence, Tuple
+
+from .listing import Listing
+from .matcher import KeywordMatcher, compile_keywords
+from .utils import currency_converter, parse_price
+
+# currency of unambiguous price symbols, "$" is in the dollar currency of the search
+CURRENCY_SYMBOLS = {
+    "€": "EUR",
+    "£": "GBP",
+    "¥": "JPY",
+    "₹": "INR",
+    "₩": "KRW",
+    "₪": "ILS",
+    "CA$": "CAD",
+    "A$": "AUD",
+    "NZ$": "NZD",
+    "HK$": "HKD",
+    "R$": "BRL",
+    "MX$": "MXN",
+    "S$": "SGD",
+    "zł": "PLN",
+    "Kč": "CZK",
+    "Ft": "HUF",
+}
+# currencies of which "$" can be the symbol
+DOLLAR_CURRENCIES = {"USD", "CAD", "AUD", "NZD", "HKD", "SGD", "MXN"}
+
+
+class ExclusionReason(Enum):
+    ANTIKEYWORDS = "excluded keywords"
+    KEYWORDS = "without required keywords"
+    LOCATION = "out of area"
+    SELLER = "banned seller"
+    PRICE = "out of price range"
+
+
+@dataclass
+class FilterResult:
+    # whether each listing is kept, and why it is excluded otherwise
+    keep: List[bool]
+    reasons: List[ExclusionReason | None]
+
+    def kept(self: "FilterResult", listings: Sequence[Listing]) -> List[Listing]:
+        return [x for x, keep in zip(listings, self.keep) if keep]
+
+    def summary(self: "FilterResult") -> Dict[ExclusionReason, int]:
+        """Number of excluded listings for each reason."""
+        return dict(Counter(x for x in self.reasons if x is not None))
+
+
+class ListingFilter:
+    def __init__(
+        self: "ListingFilter",
+        antikeywords: List[str] | None = None,
+        keywords: List[str] | None = None,
+        seller_locations: List[str] | None = None,
+        exclude_sellers: List[str] | None = None,
+        min_price: str | None = None,
+        max_price: str | None = None,
+        currencies: List[str] | None = None,
+    ) -> None:
+        self.antikeywords = self._matcher(antikeywords)
+        self.keywords = self._matcher(keywords)
+        self.seller_locations = self._matcher(seller_locations)
+        self.exclude_sellers = self._matcher(exclude_sellers)
+        # prices such as "100" or "100 USD", and the currencies of the search cities
+        self.min_price = self._price(min_price)
+        self.max_price = self._price(max_price)
+        self.currencies = set(currencies or [])
+        # limits converted to the currency of listings
+        self.converted: Dict[Tuple[float, str, str], float | None] = {}
+
+    @staticmethod
+    def _matcher(expressions: List[str] | None) -> KeywordMatcher | None:
+        return compile_keywords(tuple(expressions)) if expressions else None
+
+    @staticmethod
+    def _price(price: str | None) -> Tuple[float, str | None] | None:
+        if not price:
+            return None
+        if price.isdigit():
+            return float(price), None
+        amount, currency = price.split(" ", 1)
+        return float(amount), currency
+
+    def symbol_currency(self: "ListingFilter", symbol: str) -> str | None:
+        if symbol in CURRENCY_SYMBOLS:
+            return CURRENCY_SYMBOLS[symbol]
+        if symbol == "$":
+            # unknown if the cities use no or several dollar currencies
+            dollars = self.currencies & DOLLAR_CURRENCIES
+            return dollars.pop() if len(dollars) == 1 else None
+        # prices such as "100 CHF"
+        return symbol.upper() if len(symbol) == 3 and symbol.isalpha() else None
+
+    def limit(self: "ListingFilter", price: Tuple[float, str | None], symbol: str) -> float | None:
+        """Return a price limit in the currency of a price symbol, None if unknown."""
+        amount, limit_currency = price
+        if limit_currency is None or not self.currencies:
+            # prices are not converted without currency, as in search urls
+            return amount
+        currency = self.symbol_currency(symbol)
+        if currency is None:
+            return None
+        if currency == limit_currency:
+            return amount
+        key = (amount, limit_currency, currency)
+        if key not in self.converted:
+            try:
+                self.converted[key] = currency_converter().convert(
+                    amount, limit_currency, currency
+                )
+            except ValueError:
+                self.converted[key] = None
+        return self.converted[key]
+
+    def in_price_range(self: "ListingFilter", listing: Listing) -> bool:
+        """Whether the price of a listing is in the price range, True if it is unknown."""
+        if self.min_price is None and self.max_price is None:
+            return True
+        parsed = parse_price(listing.price)
+        if parsed is None:
+            return True
+        amount, symbol = parsed
+        min_amount = None if self.min_price is None else self.limit(self.min_price, symbol)
+        if min_amount is not None and amount < min_amount:
+            return False
+        max_amount = None if self.max_price is None else self.limit(self.max_price, symbol)
+        return max_amount is None or amount <= max_amount
+
+    def exclusion_reason(
+        self: "ListingFilter", listing: Listing, description_available: bool = True
+    ) -> ExclusionReason | None:
+        """Return why the listing should be excluded, None if it should be kept.
+
+        Without description, keywords are not checked because they can appear in the
+        description. Antikeywords are still checked against the title.
+        """
+        if self.antikeywords and self.antikeywords.match_normalized(
+            listing.normalized("title", "description")
+        ):
+            return ExclusionReason.ANTIKEYWORDS
+        if (
+            description_available
+            and self.keywords
+            and not self.keywords.match_normalized(listing.normalized("title", "description"))
+        ):
+            return ExclusionReason.KEYWORDS
+        if self.seller_locations and not self.seller_locations.match_normalized(
+            listing.normalized("location")
+        ):
+            return ExclusionReason.LOCATION
+        if (
+            listing.seller
+            and self.exclude_sellers
+            and self.exclude_sellers.match_normalized(listing.normalized("seller"))
+        ):
+            return ExclusionReason.SELLER
+        if not self.in_price_range(listing):
+            return ExclusionReason.PRICE
+        return None
+
+    def filter(
+        self: "ListingFilter", listings: Sequence[Listing], description_available: bool = True
+    ) -> FilterResult:
+        reasons = [self.exclusion_reason(x, description_available) for x in listings]
+        return FilterResult([x is None for x in reasons], reasons)
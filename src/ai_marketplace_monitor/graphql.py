@@ -0,0 +1,204 @@
+"""Listings from the JSON (GraphQL) payloads of Facebook Marketplace search pages.
+
+Search results are delivered to the browser as JSON, either embedded in the page as
+`<script type="application/json">` for the first batch, or as responses to requests
+to `/api/graphql/` for results loaded as the page is scrolled. Parsing these payloads
+avoids walking the DOM and does not depend on how the page is rendered.
+"""
+
+import json
+import re
+from typing import Any, Dict, Iterator, List
+
+from playwright.async_api import Page as AsyncPage  # type: ignore
+from playwright.async_api import Response as AsyncResponse  # type: ignore
+from playwright.sync_api import Page, Response  # type: ignore
+
+from .listing import Listing
+from .utils import extract_price
+
+# script that returns the text of embedded JSON payloads with search results
+_EMBEDDED_PAYLOAD_SCRIPT = """() => Array.from(
+    document.querySelectorAll('script[type="application/json"]')
+).map((x) => x.textContent).filter((x) => x.includes("marketplace_listing_title"))"""
+
+
+def find_listing_nodes(obj: Any) -> Iterator[Dict[str, Any]]:
+    """Find all objects that describe a marketplace listing in a JSON payload."""
+    if isinstance(obj, dict):
+        if "marketplace_listing_title" in obj and "id" in obj:
+            yield obj
+            return
+        for value in obj.values():
+            yield from find_listing_nodes(value)
+    elif isinstance(obj, list):
+        for value in obj:
+            yield from find_listing_nodes(value)
+
+
+def listing_from_node(node: Dict[str, Any]) -> Listing | None:
+    """Convert a listing node of a search payload to a Listing, as shown on a search card."""
+    try:
+        listing_id = str(node["id"])
+        title = node.get("marketplace_listing_title") or ""
+        if not listing_id.isnumeric() or not title:
+            return None
+        # a reduced price is shown as the current price followed by the original one
+        raw_price = "".join(
+            (node.get(key) or {}).get("formatted_amount") or ""
+            for key in ("listing_price", "strikethrough_price")
+        )
+        geocode = (node.get("location") or {}).get("reverse_geocode") or {}
+        location = ", ".join(x for x in (geocode.get("city"), geocode.get("state")) if x)
+        image = ((node.get("primary_listing_photo") or {}).get("image") or {}).get("uri") or ""
+        seller = (node.get("marketplace_listing_seller") or {}).get("name") or ""
+    except (AttributeError, KeyError, TypeError):
+        return None
+
+    return Listing(
+        marketplace="facebook",
+        name="",
+        id=listing_id,
+        title=title,
+        image=image,
+        price=extract_price(raw_price),
+        post_url=f"https://www.facebook.com/marketplace/item/{listing_id}/",
+        location=location,
+        condition="",
+        seller=seller,
+        description="",
+    )
+
+
+def parse_search_payload(text: str) -> List[Listing]:
+    """Parse listings from a JSON payload.
+
+    GraphQL responses can be prefixed with `for (;;);` and can contain multiple JSON
+    documents, one per line, when results are streamed.
+    """
+    text = text.removeprefix("for (;;);")
+    try:
+        documents = [json.loads(text)]
+    except ValueError:
+        documents = []
+        for line in text.splitlines():
+            try:
+                documents.append(json.loads(line))
+            except ValueError:
+                continue
+    listings = []
+    for document in documents:
+        for node in find_listing_nodes(document):
+            listing = listing_from_node(node)
+            if listing is not None:
+                listings.append(listing)
+    return listings
+
+
+def embedded_payloads(html: str) -> List[str]:
+    """Return the text of `<script type="application/json">` elements of an HTML page."""
+    return re.findall(
+        r"<script[^>]*type=\"application/json\"[^>]*>(.*?)</script>", html, flags=re.DOTALL
+    )
+
+
+def parse_item_payload(html: str, post_url: str) -> Listing | None:
+    """Parse details of a listing from the JSON payloads embedded in its item page."""
+    listing_id = post_url.split("?")[0].rstrip("/").rsplit("/", 1)[-1]
+    for payload in embedded_payloads(html):
+        if "marketplace_listing_title" not in payload:
+            continue
+        try:
+            document = json.loads(payload)
+        except ValueError:
+            continue
+        for node in find_listing_nodes(document):
+            # item pages also have listings of the seller and similar listings
+            if str(node.get("id")) != listing_id or "redacted_description" not in node:
+                continue
+            listing = listing_from_node(node)
+            if listing is None or not listing.seller:
+                continue
+            try:
+                listing.description = (node.get("redacted_description") or {}).get("text") or ""
+                listing.location = (node.get("location_text") or {}).get(
+                    "text"
+                ) or listing.location
+                listing.condition = node.get("condition") or ""
+            except AttributeError:
+                continue
+            listing.post_url = post_url.split("?")[0]
+            return listing
+    return None
+
+
+def merge_listings(*groups: List[Listing]) -> List[Listing]:
+    """Merge lists of listings, keeping the first occurrence of each listing id."""
+    seen = set()
+    merged = []
+    for listings in groups:
+        for listing in listings:
+            if listing.id not in seen:
+                seen.add(listing.id)
+                merged.append(listing)
+    return merged
+
+
+class SearchResponseCapture:
+    """Collect search results from the JSON payloads received by a page.
+
+    The capture should be attached before navigating to a search page, and collected
+    before navigating away, while the bodies of the responses are still available.
+    """
+
+    def __init__(self: "SearchResponseCapture", page: Page | AsyncPage) -> None:
+        self.page = page
+        self.responses: List[Response | AsyncResponse] = []
+
+    def __enter__(self: "SearchResponseCapture") -> "SearchResponseCapture":
+        """Start listening to responses of the page."""
+        self.page.on("response", self.handle_response)
+        return self
+
+    def __exit__(self: "SearchResponseCapture", *args: object) -> None:
+        """Stop listening to responses of the page."""
+        self.page.remove_listener("response", self.handle_response)
+
+    def attach(self: "SearchResponseCapture", page: Page) -> None:
+        """Listen to responses of another page, which replaces the page after a proxy swap."""
+        self.page.remove_listener("response", self.handle_response)
+        self.page = page
+        self.responses = []
+        self.page.on("response", self.handle_response)
+
+    def handle_response(self: "SearchResponseCapture", response: Response | AsyncResponse) -> None:
+        # only keep the response, reading the body here would block the event loop
+        if "/api/graphql" in response.url:
+            self.responses.append(response)
+
+    def collect(self: "SearchResponseCapture") -> List[Listing]:
+        """Return listings embedded in the page, followed by those from GraphQL responses."""
+        payloads: List[str] = list(self.page.evaluate(_EMBEDDED_PAYLOAD_SCRIPT))
+        for response in self.responses:
+            try:
+                payloads.append(response.text())
+            except Exception:
+                # response body is no longer available
+                continue
+        return self.parse_payloads(payloads)
+
+    async def collect_async(self: "SearchResponseCapture") -> List[Listing]:
+        """Async variant of `collect`, for pages of an async browser context."""
+        payloads: List[str] = list(await self.page.evaluate(_EMBEDDED_PAYLOAD_SCRIPT))
+        for response in self.responses:
+            try:
+                payloads.append(await response.text())
+            except Exception:
+                continue
+        return self.parse_payloads(payloads)
+
+    def parse_payloads(self: "SearchResponseCapture", payloads: List[str]) -> List[Listing]:
+        self.responses = []
+        return merge_listings(
+            *(parse_search_payload(x) for x in payloads if "marketplace_listing_title" in x)
+        )
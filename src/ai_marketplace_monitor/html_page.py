@@ -0,0 +1,623 @@
+"""Offline parsing of captured Facebook Marketplace pages.
+
+The classes in this module mirror `FacebookSearchResultPage` and the `Facebook*ItemPage`
+layouts of `facebook.py`, but work on the HTML returned by `page.content()` (or a saved
+HTML file) instead of a live browser page. Parsing is pure CPU work, so it can be
+benchmarked, regression-tested, and run in a process pool.
+"""
+
+import re
+from html.parser import HTMLParser
+from logging import Logger
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Tuple
+
+from .listing import Listing
+from .utils import Translator, add_vehicle_emojis, extract_price, hilight
+
+# elements that never have children
+VOID_ELEMENTS = {
+    "area",
+    "base",
+    "br",
+    "col",
+    "embed",
+    "hr",
+    "img",
+    "input",
+    "link",
+    "meta",
+    "source",
+    "track",
+    "wbr",
+}
+
+# elements whose content is not considered as text
+RAW_TEXT_ELEMENTS = {"script", "style"}
+
+
+class HtmlElement:
+    def __init__(
+        self: "HtmlElement",
+        tag: str,
+        attrs: Dict[str, str] | None = None,
+        parent: "HtmlElement | None" = None,
+    ) -> None:
+        self.tag = tag
+        self.attrs = attrs or {}
+        self.parent = parent
+        # text and element nodes, in document order
+        self.nodes: List["str | HtmlElement"] = []
+        self.children: List["HtmlElement"] = []
+        self._text: str | None = None
+
+    def __repr__(self: "HtmlElement") -> str:
+        """Return tag and attributes of the element."""
+        return f"<{self.tag} {self.attrs}>"
+
+    def get_attribute(self: "HtmlElement", name: str) -> str | None:
+        return self.attrs.get(name)
+
+    def text_content(self: "HtmlElement") -> str:
+        """Return all text under the element, like `Node.textContent` of the DOM."""
+        if self._text is None:
+            if self.tag in RAW_TEXT_ELEMENTS:
+                self._text = ""
+            else:
+                self._text = "".join(
+                    x if isinstance(x, str) else x.text_content() for x in self.nodes
+                )
+        return self._text
+
+    def inner_text(self: "HtmlElement") -> str:
+        """Return text with line breaks between block-level children.
+
+        This is an approximation of `HTMLElement.innerText`, which depends on layout.
+        """
+        parts = []
+        for node in self.nodes:
+            if isinstance(node, str):
+                parts.append(node)
+            elif node.tag in ("div", "p", "li", "br", "h1", "h2", "h3", "ul"):
+                parts.append("\n" + node.inner_text() + "\n")
+            else:
+                parts.append(node.inner_text())
+        return re.sub(r"\n+", "\n", "".join(parts)).strip("\n")
+
+    @property
+    def next_sibling(self: "HtmlElement") -> "HtmlElement | None":
+        if self.parent is None:
+            return None
+        siblings = self.parent.children
+        idx = siblings.index(self)
+        return siblings[idx + 1] if idx + 1 < len(siblings) else None
+
+    def iter(self: "HtmlElement", tag: str | None = None) -> Iterator["HtmlElement"]:
+        """Iterate over all descendants in document order, optionally of a given tag."""
+        for child in self.children:
+            if tag is None or child.tag == tag:
+                yield child
+            yield from child.iter(tag)
+
+    def find_all(self: "HtmlElement", tag: str) -> List["HtmlElement"]:
+        return list(self.iter(tag))
+
+    def find(self: "HtmlElement", tag: str) -> "HtmlElement | None":
+        return next(self.iter(tag), None)
+
+
+class _TreeBuilder(HTMLParser):
+    def __init__(self: "_TreeBuilder") -> None:
+        super().__init__(convert_charrefs=True)
+        self.root = HtmlElement("#document")
+        self.stack = [self.root]
+
+    def handle_starttag(
+        self: "_TreeBuilder", tag: str, attrs: List[Tuple[str, str | None]]
+    ) -> None:
+        parent = self.stack[-1]
+        element = HtmlElement(tag, {k: v or "" for k, v in attrs}, parent)
+        parent.nodes.append(element)
+        parent.children.append(element)
+        if tag not in VOID_ELEMENTS:
+            self.stack.append(element)
+
+    def handle_startendtag(
+        self: "_TreeBuilder", tag: str, attrs: List[Tuple[str, str | None]]
+    ) -> None:
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_ELEMENTS:
+            self.stack.pop()
+
+    def handle_endtag(self: "_TreeBuilder", tag: str) -> None:
+        # close the nearest open element with the tag, ignoring stray end tags
+        for idx in range(len(self.stack) - 1, 0, -1):
+            if self.stack[idx].tag == tag:
+                del self.stack[idx:]
+                return
+
+    def handle_data(self: "_TreeBuilder", data: str) -> None:
+        self.stack[-1].nodes.append(data)
+
+
+def parse_html(html: str) -> HtmlElement:
+    """Parse HTML into a tree of `HtmlElement` and return the document node."""
+    builder = _TreeBuilder()
+    builder.feed(html)
+    builder.close()
+    return builder.root
+
+
+def _normalize(text: str) -> str:
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def has_text(text: str) -> Callable[[HtmlElement], bool]:
+    """Case-insensitive substring match, as playwright's `:text()` selector."""
+    text = _normalize(text).lower()
+    return lambda el: text in _normalize(el.text_content()).lower()
+
+
+def is_text(text: str) -> Callable[[HtmlElement], bool]:
+    """Exact match, as playwright's `:text-is()` selector."""
+    text = _normalize(text)
+    return lambda el: _normalize(el.text_content()) == text
+
+
+class HtmlPage:
+    def __init__(
+        self: "HtmlPage",
+        root: HtmlElement,
+        translator: Translator | None = None,
+        logger: Logger | None = None,
+    ) -> None:
+        self.root = root
+        self.translator: Translator = Translator() if translator is None else translator
+        self.logger = logger
+
+    def innermost(
+        self: "HtmlPage", tag: str, cond: Callable[[HtmlElement], bool]
+    ) -> List[HtmlElement]:
+        """Elements matching `cond` that do not have a child matching `cond`.
+
+        This is how playwright's text selectors pick elements.
+        """
+        return [
+            el
+            for el in self.root.iter(tag)
+            if cond(el) and not any(cond(child) for child in el.children)
+        ]
+
+    def _parent_with_cond(
+        self: "HtmlPage",
+        element: HtmlElement | None,
+        cond: Callable,
+        ret: Callable | int,
+    ) -> str:
+        """Finding a parent element, see `WebPage._parent_with_cond`."""
+        if element is None:
+            return ""
+        parent: HtmlElement | None = element
+        while parent:
+            children = parent.children
+            if cond(children):
+                if isinstance(ret, int):
+                    return children[ret].text_content() or self.translator("**unspecified**")
+                return ret(children)
+            parent = parent.parent
+        raise ValueError("Could not find parent element with condition.")
+
+    def _children_with_cond(
+        self: "HtmlPage",
+        element: HtmlElement | None,
+        cond: Callable,
+        ret: Callable | int,
+    ) -> str:
+        """Finding a child element, see `WebPage._children_with_cond`."""
+        if element is None:
+            return ""
+        child: HtmlElement | None = element
+        while child:
+            children = child.children
+            if cond(children):
+                if isinstance(ret, int):
+                    return children[ret].text_content() or self.translator("**unspecified**")
+                return ret(children)
+            if not children:
+                raise ValueError("Could not find child element with condition.")
+            child = children[0]
+        raise ValueError("Could not find child element with condition.")
+
+
+def _only(elements: List[HtmlElement]) -> HtmlElement:
+    """Return the only element, mimicking the strictness of playwright locators."""
+    if len(elements) != 1:
+        raise ValueError(f"Expected one element, {len(elements)} found.")
+    return elements[0]
+
+
+class HtmlSearchResultPage(HtmlPage):
+    def _get_listing_elements(self: "HtmlSearchResultPage") -> List[HtmlElement]:
+        label = self.translator("Collection of Marketplace items")
+        heading = next(
+            (el for el in self.root.iter() if el.get_attribute("aria-label") == label), None
+        )
+        grid: HtmlElement | None = heading
+        # :scope > :first-child > :first-child > :nth-child(3) > :first-child > :nth-child(2)
+        for idx in (0, 0, 2, 0, 1):
+            if grid is None or len(grid.children) <= idx:
+                grid = None
+                break
+            grid = grid.children[idx]
+        if grid is not None:
+            valid_listings = [x for x in grid.children if x.tag == "div" and x.text_content()]
+            if valid_listings:
+                return valid_listings
+        # look for parent of the first image until it has more than 10 children
+        parent = self.root.find("img")
+        while parent is not None and len(parent.children) <= 10:
+            parent = parent.parent
+        if parent is None:
+            return []
+        return [x for x in parent.children if x.text_content()]
+
+    def get_listings(self: "HtmlSearchResultPage") -> List[Listing]:
+        if self.innermost("span", has_text(self.translator("Browse Marketplace"))):
+            return []
+
+        listings: List[Listing] = []
+        for idx, listing in enumerate(self._get_listing_elements()):
+            try:
+                atag: HtmlElement | None = listing
+                for _ in range(8):
+                    atag = atag.children[0] if atag is not None and atag.children else None
+                if atag is None:
+                    continue
+                post_url = atag.get_attribute("href") or ""
+                if not atag.children:
+                    continue
+                details_divs = [x for x in atag.children[0].children if x.tag == "div"]
+                if len(details_divs) < 2:
+                    continue
+                divs = [x for x in details_divs[1].children if x.tag == "div"]
+                raw_price = "" if len(divs) < 1 else divs[0].text_content()
+                title = "" if len(divs) < 2 else divs[1].text_content()
+                # location can be empty in some rare cases
+                location = "" if len(divs) < 3 else divs[2].text_content()
+                img = listing.find("img")
+                image = (img.get_attribute("src") if img else "") or ""
+
+                if post_url.startswith("/"):
+                    post_url = f"https://www.facebook.com{post_url}"
+                if image.startswith("/"):
+                    image = f"https://www.facebook.com{image}"
+
+                listings.append(
+                    Listing(
+                        marketplace="facebook",
+                        name="",
+                        id=post_url.split("?")[0].rstrip("/").split("/")[-1],
+                        title=title,
+                        image=image,
+                        price=extract_price(raw_price),
+                        post_url=post_url,
+                        location=location,
+                        condition="",
+                        seller="",
+                        description="",
+                    )
+                )
+            except KeyboardInterrupt:
+                raise
+            except Exception as e:
+                if self.logger:
+                    self.logger.error(
+                        f"{hilight('[Retrieve]', 'fail')} Failed to parse search results {idx + 1} listing: {e}"
+                    )
+                continue
+        return listings
+
+
+class HtmlItemPage(HtmlPage):
+    def verify_layout(self: "HtmlItemPage") -> bool:
+        return True
+
+    def _has_h2(self: "HtmlItemPage", phrase: str) -> bool:
+        return any(phrase in x.text_content() for x in self.root.iter("h2"))
+
+    def _h2_with_span(self: "HtmlItemPage", phrase: str) -> List[HtmlElement]:
+        """h2 elements with a span containing phrase, as `h2:has(span:text(phrase))`."""
+        spans = set(self.innermost("span", has_text(phrase)))
+        return [h2 for h2 in self.root.iter("h2") if any(x in spans for x in h2.iter("span"))]
+
+    def get_title(self: "HtmlItemPage") -> str:
+        h1 = self.root.find_all("h1")
+        if not h1:
+            return ""
+        return h1[-1].text_content() or self.translator("**unspecified**")
+
+    def get_price(self: "HtmlItemPage") -> str:
+        try:
+            siblings = [x.next_sibling for x in self.root.iter("h1")]
+            return _only([x for x in siblings if x is not None]).text_content() or self.translator(
+                "**unspecified**"
+            )
+        except ValueError:
+            return ""
+
+    def get_image_url(self: "HtmlItemPage") -> str:
+        img = self.root.find("img")
+        return (img.get_attribute("src") if img else "") or ""
+
+    def get_seller(self: "HtmlItemPage") -> str:
+        for pattern in ("/marketplace/profile", "/profile"):
+            links = [x for x in self.root.iter("a") if pattern in (x.get_attribute("href") or "")]
+            if links:
+                return links[-1].text_content() or self.translator("**unspecified**")
+        return self.translator("**unspecified**")
+
+    def get_description(self: "HtmlItemPage") -> str:
+        try:
+            # the element after the list that contains the "Condition" label
+            found = []
+            for span in self.innermost("span", has_text(self.translator("Condition"))):
+                ul = span.parent
+                while ul is not None and ul.tag != "ul":
+                    ul = ul.parent
+                if ul is not None and ul.next_sibling is not None and ul.next_sibling not in found:
+                    found.append(ul.next_sibling)
+            return _only(found).text_content() or self.translator("**unspecified**")
+        except ValueError:
+            return ""
+
+    def get_condition(self: "HtmlItemPage") -> str:
+        condition = self.translator("Condition")
+        spans = self.innermost("span", has_text(condition))
+        try:
+            return self._parent_with_cond(
+                spans[0] if spans else None,
+                lambda x: len(x) >= 2 and condition in x[0].text_content(),
+                1,
+            )
+        except ValueError:
+            return ""
+
+    def get_location(self: "HtmlItemPage") -> str:
+        phrase = self.translator("Location is approximate")
+        try:
+            return self._parent_with_cond(
+                _only(self.innermost("span", has_text(phrase))),
+                lambda x: len(x) == 2 and phrase in x[1].text_content(),
+                0,
+            )
+        except ValueError:
+            return ""
+
+    def parse(self: "HtmlItemPage", post_url: str) -> Listing:
+        if not self.verify_layout():
+            raise ValueError("Layout mismatch")
+
+        title = self.get_title()
+        price = self.get_price()
+        description = self.get_description()
+        # strip disclosure button text left over after expanding "See more"
+        for label in (self.translator("See more"), self.translator("See less")):
+            description = description.replace(label, "").strip()
+
+        if not title or not price or not description:
+            raise ValueError(f"Failed to parse {post_url}")
+
+        if self.logger:
+            self.logger.info(f"{hilight('[Retrieve]', 'succ')} Parsing {hilight(title)}")
+        return Listing(
+            marketplace="facebook",
+            name="",
+            id=post_url.split("?")[0].rstrip("/").split("/")[-1],
+            title=title,
+            image=self.get_image_url(),
+            price=extract_price(price),
+            post_url=post_url,
+            location=self.get_location(),
+            condition=self.get_condition(),
+            description=description,
+            seller=self.get_seller(),
+        )
+
+
+class HtmlRegularItemPage(HtmlItemPage):
+    def verify_layout(self: "HtmlRegularItemPage") -> bool:
+        return any(self.translator("Condition") in x.text_content() for x in self.root.iter("li"))
+
+
+class HtmlFlexItemPage(HtmlItemPage):
+    def verify_layout(self: "HtmlFlexItemPage") -> bool:
+        return (
+            len(self.innermost("span", is_text(self.translator("Condition")))) > 0
+            and self.root.find("h1") is not None
+        )
+
+    def _condition_and_description(self: "HtmlFlexItemPage") -> List[str]:
+        labels = self.innermost("span", is_text(self.translator("Condition")))
+        hits: List[str] = []
+        node = labels[0] if labels else None
+        for _ in range(16):
+            if node is None or len(hits) >= 2:
+                break
+            sibling = node.next_sibling
+            text = sibling.text_content().strip() if sibling is not None else ""
+            if text:
+                hits.append(text)
+            node = node.parent
+        return hits
+
+    def get_condition(self: "HtmlFlexItemPage") -> str:
+        hits = self._condition_and_description()
+        return hits[0] if hits else ""
+
+    def get_description(self: "HtmlFlexItemPage") -> str:
+        hits = self._condition_and_description()
+        return hits[1] if len(hits) > 1 else ""
+
+    def get_location(self: "HtmlFlexItemPage") -> str:
+        phrase = self.translator("Location is approximate")
+        labels = self.innermost("span", has_text(phrase))
+        node = labels[0] if labels else None
+        for _ in range(10):
+            if node is None:
+                break
+            text = node.text_content().strip().replace(phrase, "").replace("·", "").strip()
+            if text:
+                return text
+            node = node.parent
+        return ""
+
+
+class HtmlRentalItemPage(HtmlItemPage):
+    def verify_layout(self: "HtmlRentalItemPage") -> bool:
+        return self._has_h2(self.translator("Description"))
+
+    def get_description(self: "HtmlRentalItemPage") -> str:
+        description = self.translator("Description")
+        headers = self._h2_with_span(description)
+        try:
+            return self._parent_with_cond(
+                headers[0] if headers else None,
+                lambda x: len(x) > 1 and x[0].text_content() == description,
+                1,
+            )
+        except ValueError:
+            return ""
+
+    def get_condition(self: "HtmlRentalItemPage") -> str:
+        # no condition information for rental items
+        return self.translator("**unspecified**")
+
+
+class HtmlAutoItemWithAboutAndDescriptionPage(HtmlItemPage):
+    def _with_content(self: "HtmlAutoItemWithAboutAndDescriptionPage", phrase: str) -> Callable:
+        # an array of elements with the first one being the header and the second child
+        # has actual content (not just whitespace)
+        return (
+            lambda x: len(x) > 1
+            and phrase in x[0].text_content()
+            and x[1].text_content().replace("\xa0", "").strip()
+        )
+
+    def _seller_description(
+        self: "HtmlAutoItemWithAboutAndDescriptionPage",
+        min_children: int,
+        ret: Callable,
+    ) -> str:
+        phrase = self.translator("Seller's description")
+        headers = self._h2_with_span(phrase)
+        try:
+            return self._parent_with_cond(
+                headers[0] if headers else None,
+                self._with_content(phrase),
+                lambda x: self._children_with_cond(x[1], lambda y: len(y) > min_children, ret),
+            )
+        except ValueError:
+            return ""
+
+    def _get_about_this_vehicle(self: "HtmlAutoItemWithAboutAndDescriptionPage") -> str:
+        phrase = self.translator("About this vehicle")
+        try:
+            return self._parent_with_cond(
+                _only(self._h2_with_span(phrase)),
+                self._with_content(phrase),
+                lambda x: add_vehicle_emojis("\n".join(child.inner_text() for child in x)),
+            )
+        except ValueError:
+            return ""
+
+    def verify_layout(self: "HtmlAutoItemWithAboutAndDescriptionPage") -> bool:
+        return self._has_h2(self.translator("About this vehicle")) and self._has_h2(
+            self.translator("Seller's description")
+        )
+
+    def get_description(self: "HtmlAutoItemWithAboutAndDescriptionPage") -> str:
+        return self._get_about_this_vehicle() + self._seller_description(
+            1,
+            lambda y: f"""\n\n{self.translator("Seller's description")}\n\n{y[0].text_content() or self.translator("**unspecified**")}""",
+        )
+
+    def get_price(self: "HtmlAutoItemWithAboutAndDescriptionPage") -> str:
+        price_pattern = r"\$\d{1,3}(?:,\d{3})*(?:\.\d{2})?(?:,\d{2})?"
+        match = re.search(price_pattern, self.get_description())
+        return match.group(0) if match else self.translator("**unspecified**")
+
+    def get_condition(self: "HtmlAutoItemWithAboutAndDescriptionPage") -> str:
+        # no condition information for auto items
+        return self.translator("**unspecified**")
+
+
+class HtmlAutoItemWithDescriptionPage(HtmlAutoItemWithAboutAndDescriptionPage):
+    def verify_layout(self: "HtmlAutoItemWithDescriptionPage") -> bool:
+        return self._has_h2(self.translator("Seller's description")) and not self._has_h2(
+            self.translator("About this vehicle")
+        )
+
+    def get_description(self: "HtmlAutoItemWithDescriptionPage") -> str:
+        return self._seller_description(
+            2,
+            lambda y: f"""\n\n{self.translator("Seller's description")}\n\n{y[1].text_content() or self.translator("**unspecified**")}""",
+        )
+
+    def get_condition(self: "HtmlAutoItemWithDescriptionPage") -> str:
+        res = self._seller_description(
+            2, lambda y: y[0].text_content() or self.translator("**unspecified**")
+        )
+        if res.startswith(self.translator("Condition")):
+            res = res[len(self.translator("Condition")) :]
+        return res.strip()
+
+    def get_price(self: "HtmlAutoItemWithDescriptionPage") -> str:
+        # for this page, price is after header
+        h1 = self.root.find_all("h1")
+        if not h1:
+            return ""
+        header = h1[-1].text_content()
+        try:
+            return self._parent_with_cond(
+                h1[-1], lambda x: len(x) > 1 and header in x[0].text_content(), 1
+            )
+        except ValueError:
+            return ""
+
+
+def parse_search_result_html(
+    html: str, translator: Translator | None = None, logger: Logger | None = None
+) -> List[Listing]:
+    """Parse listings from the HTML of a search result page."""
+    return HtmlSearchResultPage(parse_html(html), translator, logger).get_listings()
+
+
+def parse_listing_html(
+    html: str, post_url: str, translator: Translator | None = None, logger: Logger | None = None
+) -> Listing | None:
+    """Parse a listing from the HTML of an item page, trying the same layouts as `parse_listing`."""
+    root = parse_html(html)
+    supported_item_layouts = [
+        HtmlRentalItemPage,
+        HtmlAutoItemWithAboutAndDescriptionPage,
+        HtmlAutoItemWithDescriptionPage,
+        HtmlRegularItemPage,
+        HtmlFlexItemPage,
+    ]
+    for page_model in supported_item_layouts:
+        try:
+            return page_model(root, translator, logger).parse(post_url)
+        except KeyboardInterrupt:
+            raise
+        except Exception:
+            # try next page layout
+            continue
+    return None
+
+
+def parse_listing_file(
+    filename: Path | str, post_url: str, translator: Translator | None = None
+) -> Listing | None:
+    """Parse a saved item page, e.g. for benchmarking or offline testing."""
+    with open(filename, encoding="utf-8") as f:
+        return parse_listing_html(f.read(), post_url, translator)
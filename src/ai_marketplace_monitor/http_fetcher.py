@@ -0,0 +1,95 @@
+"""Load item pages over HTTP instead of rendering them in the browser.
+
+Item pages are the most expensive pages to load in the browser. With option
+`detail_fetcher = "http"`, they are instead requested with a pooled HTTP session
+that uses the cookies and user agent of the browser context, and parsed from the
+JSON payloads embedded in the page, or from its server-rendered HTML. Responses that
+cannot be parsed, for example because they were redirected to the login page, are
+left to the browser.
+"""
+
+from logging import Logger
+from typing import Any, Dict, List
+from urllib.parse import quote, urlsplit, urlunsplit
+
+import requests  # type: ignore
+from playwright.sync_api import ProxySettings  # type: ignore
+from requests.adapters import HTTPAdapter  # type: ignore
+
+from .graphql import parse_item_payload
+from .html_page import parse_listing_html
+from .listing import Listing
+from .utils import Translator, hilight
+
+
+class HttpDetailFetcher:
+    def __init__(
+        self: "HttpDetailFetcher",
+        timeout: float = 30,
+        pool_size: int = 4,
+        logger: Logger | None = None,
+    ) -> None:
+        self.timeout = timeout
+        self.logger = logger
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def configure(
+        self: "HttpDetailFetcher",
+        cookies: List[Dict[str, Any]],
+        user_agent: str | None = None,
+        proxy: ProxySettings | None = None,
+    ) -> None:
+        """Use the cookies, user agent and proxy of a browser context."""
+        self.session.cookies.clear()
+        for cookie in cookies:
+            self.session.cookies.set(
+                cookie["name"],
+                cookie["value"],
+                domain=cookie.get("domain", ""),
+                path=cookie.get("path", "/"),
+            )
+        if user_agent:
+            self.session.headers["User-Agent"] = user_agent
+        self.session.headers["Accept"] = "text/html,application/xhtml+xml"
+        self.session.proxies = {}
+        if proxy is not None:
+            server = proxy["server"]
+            if proxy.get("username"):
+                parts = urlsplit(server)
+                credentials = f"{quote(proxy['username'], safe='')}:{quote(proxy.get('password', ''), safe='')}"
+                server = urlunsplit(parts._replace(netloc=f"{credentials}@{parts.netloc}"))
+            self.session.proxies = {"http": server, "https": server}
+
+    def fetch(self: "HttpDetailFetcher", url: str) -> str | None:
+        """Return the HTML of a page, or None if it could not be loaded or requires login."""
+        try:
+            response = self.session.get(url, timeout=self.timeout)
+        except requests.RequestException as e:
+            if self.logger:
+                self.logger.debug(f"{hilight('[Retrieve]', 'fail')} Failed to fetch {url}: {e}")
+            return None
+        if response.status_code != 200 or "/login" in response.url:
+            if self.logger:
+                self.logger.debug(
+                    f"{hilight('[Retrieve]', 'fail')} Fetching {url} returned {response.status_code} from {response.url}"
+                )
+            return None
+        if "charset" not in response.headers.get("Content-Type", "").lower():
+            # requests assumes ISO-8859-1 without charset, facebook pages are in utf-8
+            response.encoding = "utf-8"
+        return response.text
+
+    def close(self: "HttpDetailFetcher") -> None:
+        self.session.close()
+
+
+def parse_item_response(
+    html: str, post_url: str, translator: Translator | None = None, logger: Logger | None = None
+) -> Listing | None:
+    """Parse a listing from its item page, using embedded JSON payloads or HTML."""
+    return parse_item_payload(html, post_url) or parse_listing_html(
+        html, post_url, translator, logger
+    )
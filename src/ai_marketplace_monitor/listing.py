@@ -1,10 +1,15 @@
+import time
 from dataclasses import asdict, dataclass
-from typing import Optional, Tuple, Type
+from typing import Any, Dict, Optional, Tuple, Type
 
 from diskcache import Cache  # type: ignore
 
+from .matcher import normalize_string
 from .utils import CacheType, cache, hash_dict
 
+# fields that are matched against keywords, locations, and sellers
+SEARCHABLE_FIELDS = ("title", "description", "location", "seller")
+
 
 @dataclass
 class Listing:
@@ -21,6 +26,23 @@ class Listing:
     condition: str
     description: str
 
+    def __setattr__(self: "Listing", name: str, value: Any) -> None:
+        """Discard normalized text when a searchable field is changed."""
+        super().__setattr__(name, value)
+        if name in SEARCHABLE_FIELDS:
+            self.__dict__.pop("_normalized", None)
+
+    def normalized(self: "Listing", *names: str) -> str:
+        """Return the normalized text of one or more fields, joined by space.
+
+        The text is normalized once and reused by all filters, until one of the
+        fields is changed.
+        """
+        normalized: Dict[Tuple[str, ...], str] = self.__dict__.setdefault("_normalized", {})
+        if names not in normalized:
+            normalized[names] = normalize_string(" ".join(getattr(self, x) for x in names))
+        return normalized[names]
+
     @property
     def content(self: "Listing") -> Tuple[str, str, str]:
         return (self.title, self.description, self.price)
@@ -46,16 +68,31 @@ class Listing:
         try:
             # details could be a different datatype, miss some key etc.
             # and we have recently changed to save Listing as a dictionary
-            return cls(
-                **(cache if local_cache is None else local_cache).get(
+            details = dict(
+                (cache if local_cache is None else local_cache).get(
                     (CacheType.LISTING_DETAILS.value, post_url.split("?")[0])
                 )
             )
+            details.pop("cached_at", None)
+            return cls(**details)
         except KeyboardInterrupt:
             raise
         except Exception:
             return None
 
+    @classmethod
+    def cached_time(
+        cls: Type["Listing"],
+        post_url: str,
+        local_cache: Cache | None = None,
+    ) -> float | None:
+        """Time at which details of the listing were saved, None if unknown."""
+        details = (cache if local_cache is None else local_cache).get(
+            (CacheType.LISTING_DETAILS.value, post_url.split("?")[0])
+        )
+        # details saved by older versions do not have a time
+        return details.get("cached_at") if isinstance(details, dict) else None
+
     def to_cache(
         self: "Listing",
         post_url: str,
@@ -63,6 +100,6 @@ class Listing:
     ) -> None:
         (cache if local_cache is None else local_cache).set(
             (CacheType.LISTING_DETAILS.value, post_url.split("?")[0]),
-            asdict(self),
+            {**asdict(self), "cached_at": time.time()},
             tag=CacheType.LISTING_DETAILS.value,
         )
@@ -1,19 +1,59 @@
+import fnmatch
+import json
+import os
+import re
+import tempfile
 import time
-from dataclasses import dataclass, field
+import warnings
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
 from enum import Enum
 from logging import Logger
-from typing import Any, Callable, Generator, Generic, List, Type, TypeVar
+from pathlib import Path
+from typing import (
+    Any,
+    AsyncGenerator,
+    Callable,
+    Dict,
+    Generator,
+    Generic,
+    List,
+    Type,
+    TypeVar,
+)
 
-from playwright.sync_api import Browser, ElementHandle, Locator, Page  # type: ignore
+import humanize
+from diskcache import Cache  # type: ignore
+from playwright.async_api import BrowserContext as AsyncBrowserContext  # type: ignore
+from playwright.async_api import Page as AsyncPage  # type: ignore
+from playwright.async_api import Route as AsyncRoute  # type: ignore
+from playwright.sync_api import (  # type: ignore
+    Browser,
+    BrowserContext,
+    ElementHandle,
+    Locator,
+    Page,
+    ProxySettings,
+    Response,
+    Route,
+)
 
 from .listing import Listing
+from .matcher import compile_keywords
+from .pacing import CircuitBreaker, Pacer
+from .proxy import ProxyPool
 from .utils import (
     BaseConfig,
+    CacheType,
+    CounterItem,
     Currency,
     KeyboardMonitor,
     MonitorConfig,
     Translator,
+    amm_home,
+    cache,
     convert_to_seconds,
+    counter,
     hilight,
 )
 
@@ -44,6 +84,13 @@ class MarketItemCommonConfig(BaseConfig):
     search_region: List[str] | None = None
     max_price: str | None = None
     min_price: str | None = None
+    # number of new listings whose details are loaded per search, most promising first
+    max_detail_fetches: int | None = None
+    # seconds after which cached listing details are loaded again, the fraction of that
+    # age during which they may be refreshed early, and the number of refreshes per search
+    details_max_age: int | None = None
+    details_early_refresh: float | None = None
+    max_detail_refreshes: int | None = None
     rating: List[int] | None = None
     prompt: str | None = None
     extra_prompt: str | None = None
@@ -68,6 +115,14 @@ class MarketItemCommonConfig(BaseConfig):
             isinstance(x, str) for x in self.exclude_sellers
         ):
             raise ValueError(f"Item {hilight(self.name)} exclude_sellers must be a list.")
+        self.compile_keywords("exclude_sellers", self.exclude_sellers)
+
+    def compile_keywords(
+        self: "MarketItemCommonConfig", option: str, expressions: List[str]
+    ) -> None:
+        """Parse keyword expressions once, when the configuration is loaded."""
+        for error in compile_keywords(tuple(expressions)).errors:
+            warnings.warn(f"Item {self.name} {option}: {error}", stacklevel=2)
 
     def handle_max_search_interval(self: "MarketItemCommonConfig") -> None:
         if self.max_search_interval is None:
@@ -291,6 +346,50 @@ class MarketItemCommonConfig(BaseConfig):
                 f"Item {hilight(self.name)} min_price must be a number followed by currency name."
             )
 
+    def handle_max_detail_fetches(self: "MarketItemCommonConfig") -> None:
+        if self.max_detail_fetches is None:
+            return
+        if not isinstance(self.max_detail_fetches, int) or self.max_detail_fetches < 1:
+            raise ValueError(
+                f"Item {hilight(self.name)} max_detail_fetches must be a positive integer."
+            )
+
+    def handle_details_max_age(self: "MarketItemCommonConfig") -> None:
+        if self.details_max_age is None:
+            return
+
+        if isinstance(self.details_max_age, str):
+            try:
+                self.details_max_age = convert_to_seconds(self.details_max_age)
+            except Exception as e:
+                raise ValueError(
+                    f"Item {hilight(self.name)} details_max_age {self.details_max_age} is not recognized."
+                ) from e
+        if not isinstance(self.details_max_age, int) or self.details_max_age < 1:
+            raise ValueError(
+                f"Item {hilight(self.name)} details_max_age must be at least 1 second."
+            )
+
+    def handle_details_early_refresh(self: "MarketItemCommonConfig") -> None:
+        if self.details_early_refresh is None:
+            return
+        if (
+            not isinstance(self.details_early_refresh, (int, float))
+            or not 0 <= self.details_early_refresh <= 1
+        ):
+            raise ValueError(
+                f"Item {hilight(self.name)} details_early_refresh must be a number between 0 and 1."
+            )
+        self.details_early_refresh = float(self.details_early_refresh)
+
+    def handle_max_detail_refreshes(self: "MarketItemCommonConfig") -> None:
+        if self.max_detail_refreshes is None:
+            return
+        if not isinstance(self.max_detail_refreshes, int) or self.max_detail_refreshes < 0:
+            raise ValueError(
+                f"Item {hilight(self.name)} max_detail_refreshes must be a non-negative integer."
+            )
+
     def handle_start_at(self: "MarketItemCommonConfig") -> None:
         if self.start_at is None:
             return
@@ -370,6 +469,21 @@ class MarketplaceConfig(MarketItemCommonConfig):
     # name of market, right now facebook is the only supported one
     market_type: str | None = MarketPlace.FACEBOOK.value
     language: str | None = None
+    # number of listing pages that can be loaded at the same time
+    detail_concurrency: int | None = None
+    # seconds between requests, adjusted between min and max according to responses
+    request_interval: int | None = None
+    min_request_interval: int | None = None
+    max_request_interval: int | None = None
+    # seconds for which search results are kept in the cache and reused, 0 or None to disable
+    search_cache_ttl: int | None = None
+    # seconds to wait for a page to load, and number of retries for failed navigations
+    navigation_timeout: int | None = None
+    navigation_retries: int | None = None
+    # recycle the browser context after this many page loads, or when the JavaScript
+    # heap of its pages exceeds this many megabytes, 0 to disable
+    max_context_navigations: int | None = None
+    max_context_memory: int | None = None
     monitor_config: MonitorConfig | None = None
 
     def handle_market_type(self: "MarketplaceConfig") -> None:
@@ -390,6 +504,78 @@ class MarketplaceConfig(MarketItemCommonConfig):
                 f"Marketplace {hilight(self.market_type)} language, if specified, must be a string."
             )
 
+    def _handle_interval(self: "MarketplaceConfig", option: str) -> None:
+        value = getattr(self, option)
+        if value is None:
+            return
+        if isinstance(value, str):
+            try:
+                value = convert_to_seconds(value)
+            except Exception as e:
+                raise ValueError(
+                    f"Marketplace {hilight(self.name)} {option} {value} is not recognized."
+                ) from e
+            setattr(self, option, value)
+        if not isinstance(value, int) or value < 0:
+            raise ValueError(
+                f"Marketplace {hilight(self.name)} {option} must be a non-negative number of seconds."
+            )
+
+    def handle_request_interval(self: "MarketplaceConfig") -> None:
+        self._handle_interval("request_interval")
+
+    def handle_min_request_interval(self: "MarketplaceConfig") -> None:
+        self._handle_interval("min_request_interval")
+
+    def handle_max_request_interval(self: "MarketplaceConfig") -> None:
+        self._handle_interval("max_request_interval")
+        if (
+            self.max_request_interval is not None
+            and self.min_request_interval is not None
+            and self.max_request_interval < self.min_request_interval
+        ):
+            raise ValueError(
+                f"Marketplace {hilight(self.name)} max_request_interval must not be less than min_request_interval."
+            )
+
+    def handle_search_cache_ttl(self: "MarketplaceConfig") -> None:
+        self._handle_interval("search_cache_ttl")
+
+    def handle_navigation_timeout(self: "MarketplaceConfig") -> None:
+        self._handle_interval("navigation_timeout")
+
+    def handle_navigation_retries(self: "MarketplaceConfig") -> None:
+        if self.navigation_retries is None:
+            return
+        if not isinstance(self.navigation_retries, int) or self.navigation_retries < 0:
+            raise ValueError(
+                f"Marketplace {hilight(self.name)} navigation_retries must be a non-negative integer."
+            )
+
+    def handle_max_context_navigations(self: "MarketplaceConfig") -> None:
+        if self.max_context_navigations is None:
+            return
+        if not isinstance(self.max_context_navigations, int) or self.max_context_navigations < 0:
+            raise ValueError(
+                f"Marketplace {hilight(self.name)} max_context_navigations must be a non-negative integer."
+            )
+
+    def handle_max_context_memory(self: "MarketplaceConfig") -> None:
+        if self.max_context_memory is None:
+            return
+        if not isinstance(self.max_context_memory, int) or self.max_context_memory < 0:
+            raise ValueError(
+                f"Marketplace {hilight(self.name)} max_context_memory must be a non-negative number of megabytes."
+            )
+
+    def handle_detail_concurrency(self: "MarketplaceConfig") -> None:
+        if self.detail_concurrency is None:
+            return
+        if not isinstance(self.detail_concurrency, int) or self.detail_concurrency < 1:
+            raise ValueError(
+                f"Marketplace {hilight(self.name)} detail_concurrency must be a positive integer."
+            )
+
 
 @dataclass
 class ItemConfig(MarketItemCommonConfig):
@@ -427,6 +613,7 @@ class ItemConfig(MarketItemCommonConfig):
             isinstance(x, str) for x in self.antikeywords
         ):
             raise ValueError(f"Item {hilight(self.name)} antikeywords must be a list of strings.")
+        self.compile_keywords("antikeywords", self.antikeywords)
 
     def handle_keywords(self: "ItemConfig") -> None:
         if self.keywords is None:
@@ -439,6 +626,7 @@ class ItemConfig(MarketItemCommonConfig):
             isinstance(x, str) for x in self.keywords
         ):
             raise ValueError(f"Item {hilight(self.name)} keywords must be a list.")
+        self.compile_keywords("keywords", self.keywords)
 
     def handle_description(self: "ItemConfig") -> None:
         if self.description is None:
@@ -447,6 +635,86 @@ class ItemConfig(MarketItemCommonConfig):
             raise ValueError(f"Item {hilight(self.name)} description must be a string.")
 
 
+class ResourceBlocker:
+    """Abort requests of unwanted resource types or urls for all pages of a browser context.
+
+    The number of blocked requests and the size of downloaded responses (as reported by
+    the content-length header) are accumulated in memory and written to the counter
+    with `flush`, to avoid writing to the cache for every request.
+    """
+
+    def __init__(
+        self: "ResourceBlocker",
+        resource_types: List[str] | None = None,
+        url_patterns: List[str] | None = None,
+    ) -> None:
+        self.resource_types = set(resource_types or [])
+        # glob patterns are combined into a single regular expression
+        self.url_pattern = (
+            re.compile("|".join(fnmatch.translate(x) for x in url_patterns))
+            if url_patterns
+            else None
+        )
+        self.blocked_requests = 0
+        self.downloaded_bytes = 0
+
+    @classmethod
+    def from_config(
+        cls: Type["ResourceBlocker"], config: MonitorConfig | None
+    ) -> "ResourceBlocker | None":
+        if config is None or not (config.block_resources or config.block_urls):
+            return None
+        return cls(config.block_resources, config.block_urls)
+
+    def should_block(self: "ResourceBlocker", resource_type: str, url: str) -> bool:
+        if resource_type in self.resource_types:
+            return True
+        return self.url_pattern is not None and self.url_pattern.match(url) is not None
+
+    def attach(self: "ResourceBlocker", context: BrowserContext) -> None:
+        context.route("**/*", self.handle_route)
+        context.on("response", self.handle_response)
+
+    def handle_route(self: "ResourceBlocker", route: Route) -> None:
+        request = route.request
+        if self.should_block(request.resource_type, request.url):
+            self.blocked_requests += 1
+            route.abort()
+        else:
+            route.fallback()
+
+    async def attach_async(self: "ResourceBlocker", context: AsyncBrowserContext) -> None:
+        await context.route("**/*", self.handle_route_async)
+        context.on("response", self.handle_response)
+
+    async def handle_route_async(self: "ResourceBlocker", route: AsyncRoute) -> None:
+        request = route.request
+        if self.should_block(request.resource_type, request.url):
+            self.blocked_requests += 1
+            await route.abort()
+        else:
+            await route.fallback()
+
+    def handle_response(self: "ResourceBlocker", response: Response) -> None:
+        try:
+            self.downloaded_bytes += int(response.headers.get("content-length", 0))
+        except ValueError:
+            pass
+
+    def flush(self: "ResourceBlocker", name: str) -> None:
+        if self.blocked_requests:
+            counter.increment(CounterItem.BLOCKED_REQUEST, name, self.blocked_requests)
+            self.blocked_requests = 0
+        if self.downloaded_bytes:
+            counter.increment(CounterItem.DOWNLOADED_BYTES, name, self.downloaded_bytes)
+            self.downloaded_bytes = 0
+
+
+class CircuitOpenError(RuntimeError):
+    """Navigation is suspended after repeated failures to reach the marketplace."""
+
+
+T = TypeVar("T")
 TMarketplaceConfig = TypeVar("TMarketplaceConfig", bound=MarketplaceConfig)
 TItemConfig = TypeVar("TItemConfig", bound=ItemConfig)
 
@@ -465,6 +733,23 @@ class Marketplace(Generic[TMarketplaceConfig, TItemConfig]):
         self.translator = Translator()
         self.logger = logger
         self.page: Page | None = None
+        # additional pages, in the same context as self.page, for loading listing details
+        self.detail_pages: List[Page] = []
+        self.resource_blocker: ResourceBlocker | None = None
+        self.pacer = Pacer()
+        # proxy server used by the current context, and circuit breakers for each
+        # proxy server (or direct connection) that has been used
+        self.proxy_server: str | None = None
+        self.circuit_breakers: Dict[str, CircuitBreaker] = {}
+        # health of the configured proxy servers, used to choose one for each context
+        self.proxy_pool: ProxyPool | None = None
+        # page loads and measured memory of the current browser context
+        self.context_navigations = 0
+        self.context_memory: int | None = None
+        self.context_created: float = time.time()
+        # results of searches performed in the current search cycle, by normalized url,
+        # or tasks that return them for async searches
+        self.cycle_results: Dict[str, Any] | None = None
 
     @classmethod
     def get_config(cls: Type["Marketplace"], **kwargs: Any) -> TMarketplaceConfig:
@@ -480,6 +765,25 @@ class Marketplace(Generic[TMarketplaceConfig, TItemConfig]):
         self.config = config
         if translator is not None:
             self.translator = translator
+        self.pacer = Pacer(
+            **{
+                key: value
+                for key, value in (
+                    ("interval", config.request_interval),
+                    ("min_interval", config.min_request_interval),
+                    ("max_interval", config.max_request_interval),
+                )
+                if value is not None
+            }
+        )
+        proxy_servers = [] if config.monitor_config is None else config.monitor_config.proxy_server
+        if not proxy_servers:
+            self.proxy_pool = None
+        elif self.proxy_pool is None:
+            self.proxy_pool = ProxyPool(proxy_servers)
+        else:
+            # keep statistics of proxy servers across reloads of the configuration
+            self.proxy_pool.update(proxy_servers)
 
     def set_browser(self: "Marketplace", browser: Browser | None = None) -> None:
         if browser is not None:
@@ -502,45 +806,469 @@ class Marketplace(Generic[TMarketplaceConfig, TItemConfig]):
 
         # if there is an existing page, asked to swap_proxy, and there is an proxy_server
         # setting with multiple proxies
-        if (
-            self.page
-            and swap_proxy
-            and self.config.monitor_config is not None
-            and isinstance(self.config.monitor_config.proxy_server, list)
-            and len(self.config.monitor_config.proxy_server) > 1
-        ):
+        swapping = bool(
+            self.page and swap_proxy and self.proxy_pool and len(self.proxy_pool.stats) > 1
+        )
+        if swapping:
+            assert self.page is not None
+            # close the context as well, which cannot be used with another proxy
+            context = self.page.context
             self.page.close()
+            try:
+                context.close()
+            except KeyboardInterrupt:
+                raise
+            except Exception as e:
+                if self.logger:
+                    self.logger.debug(f"Failed to close browser context: {e}")
             self.page = None
 
         if self.page is None:
-            context = self.browser.new_context(
-                proxy=(
-                    None
-                    if self.config.monitor_config is None
-                    else self.config.monitor_config.get_proxy_options()
-                )
+            # other contexts, such as recycled ones, keep the proxy of the session
+            proxy = (
+                self.get_proxy_options(exclude=self.proxy_server)
+                if swapping
+                else self.get_proxy_options(keep=self.proxy_server)
             )
+            self.proxy_server = None if proxy is None else proxy["server"]
+            storage_state = self.storage_state_path
+            try:
+                # restore cookies and local storage saved after a previous login
+                context = self.browser.new_context(
+                    proxy=proxy,
+                    storage_state=storage_state if storage_state.exists() else None,
+                )
+            except KeyboardInterrupt:
+                raise
+            except Exception as e:
+                if self.logger:
+                    self.logger.debug(
+                        f"""{hilight("[Login]", "fail")} Failed to restore saved session: {e}"""
+                    )
+                self.clear_storage_state()
+                context = self.browser.new_context(proxy=proxy)
+            self.resource_blocker = ResourceBlocker.from_config(self.config.monitor_config)
+            if self.resource_blocker is not None:
+                self.resource_blocker.attach(context)
             self.page = context.new_page()
+            self.context_navigations = 0
+            self.context_memory = None
+            self.context_created = time.time()
         return self.page
 
-    def goto_url(self: "Marketplace", url: str, attempt: int = 0) -> None:
+    def measure_context_memory(self: "Marketplace") -> int | None:
+        """Return the JavaScript heap size, in bytes, of the pages of the current context.
+
+        The size is read from the performance metrics of the Chrome DevTools Protocol,
+        so None is returned for other browsers.
+        """
+        if self.page is None:
+            return None
+        total = 0
         try:
-            assert self.page is not None
+            for page in [self.page, *(x for x in self.detail_pages if not x.is_closed())]:
+                session = page.context.new_cdp_session(page)
+                try:
+                    session.send("Performance.enable")
+                    metrics = session.send("Performance.getMetrics")["metrics"]
+                finally:
+                    session.detach()
+                total += next(int(x["value"]) for x in metrics if x["name"] == "JSHeapTotalSize")
+        except KeyboardInterrupt:
+            raise
+        except Exception as e:
             if self.logger:
-                self.logger.debug(f"{hilight('[Retrieve]', 'info')} Navigating to {url}")
-            self.page.goto(url, timeout=0)
-            self.page.wait_for_load_state("domcontentloaded")
+                self.logger.debug(f"Failed to measure memory of browser context: {e}")
+            return None
+        return total
+
+    def save_context_stats(self: "Marketplace") -> None:
+        """Save page loads and memory of the current context, for display by the web UI."""
+        cache.set(
+            (CacheType.CONTEXT_STATS.value, self.name, os.getpid()),
+            {
+                "marketplace": self.name,
+                "pid": os.getpid(),
+                "proxy_server": self.proxy_server,
+                "created": self.context_created,
+                "navigations": self.context_navigations,
+                "memory": self.context_memory,
+            },
+            expire=24 * 60 * 60,
+            tag=CacheType.CONTEXT_STATS.value,
+        )
+
+    def recycle_context(self: "Marketplace") -> None:
+        """Replace the browser context with a new one that restores the saved session."""
+        if self.page is None:
+            return
+        context = self.page.context
+        self.save_storage_state()
+        try:
+            context.close()
         except KeyboardInterrupt:
             raise
         except Exception as e:
-            if attempt == 10:
-                raise RuntimeError(f"Failed to navigate to {url} after 10 attempts. {e}") from e
-            time.sleep(5)
-            self.goto_url(url, attempt + 1)
+            if self.logger:
+                self.logger.debug(f"Failed to close browser context: {e}")
+        self.page = None
+        self.detail_pages = []
+        # the session is restored with the same proxy, unless it is in quarantine
+        self.create_page()
+
+    def recycle_context_if_needed(self: "Marketplace") -> None:
+        """Recycle the browser context after too many page loads or if it uses too much memory.
+
+        Browsers accumulate memory over thousands of page loads, so the context is
+        replaced from time to time. This should only be called between searches, when
+        no page of the context is in use.
+        """
+        if self.page is None:
+            return
+        max_navigations = getattr(self.config, "max_context_navigations", None)
+        max_memory = getattr(self.config, "max_context_memory", None)
+        self.context_memory = self.measure_context_memory()
+        self.save_context_stats()
+
+        reason = None
+        if self.context_navigations >= (1000 if max_navigations is None else max_navigations) > 0:
+            reason = f"{self.context_navigations} page loads"
+        elif max_memory and self.context_memory and self.context_memory > max_memory * 1024**2:
+            reason = f"using {humanize.naturalsize(self.context_memory, binary=True)} of memory"
+        if reason is None:
+            return
+        if self.logger:
+            self.logger.info(
+                f"""{hilight("[Retrieve]", "info")} Recycling browser context after {reason}."""
+            )
+        counter.increment(CounterItem.CONTEXT_RECYCLED, self.name)
+        self.recycle_context()
+        self.save_context_stats()
+
+    def get_proxy_options(
+        self: "Marketplace", exclude: str | None = None, keep: str | None = None
+    ) -> ProxySettings | None:
+        """Proxy settings with `keep` if available, or the healthiest server, preferably not `exclude`."""
+        if self.config.monitor_config is None:
+            return None
+        if self.proxy_pool is None:
+            server = None
+        elif keep is not None and self.proxy_pool.is_available(keep):
+            server = keep
+        else:
+            server = self.proxy_pool.choose(exclude=exclude)
+        return self.config.monitor_config.get_proxy_options(server)
+
+    @property
+    def storage_state_path(self: "Marketplace") -> Path:
+        """File with the cookies and local storage of the browser context of the marketplace."""
+        return amm_home / f"{self.name}_storage_state.json"
+
+    def save_storage_state(self: "Marketplace") -> None:
+        """Save the session of the current page so that login can be skipped next time."""
+        if self.page is None:
+            return
+        path = self.storage_state_path
+        try:
+            state = self.page.context.storage_state()
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # the session gives access to the account, so the file is created readable by
+            # the user only (mode 0o600), then moved into place so that it is never partial
+            tmp = tempfile.NamedTemporaryFile(
+                mode="w",
+                encoding="utf-8",
+                dir=str(path.parent),
+                prefix=f".{path.name}.",
+                suffix=".tmp",
+                delete=False,
+            )
+            try:
+                with tmp:
+                    json.dump(state, tmp)
+                os.replace(tmp.name, path)
+            except BaseException:
+                Path(tmp.name).unlink(missing_ok=True)
+                raise
+        except KeyboardInterrupt:
+            raise
+        except Exception as e:
+            if self.logger:
+                self.logger.debug(f"""{hilight("[Login]", "fail")} Failed to save session: {e}""")
+
+    def clear_storage_state(self: "Marketplace") -> None:
+        """Remove the saved session, for example after it has expired."""
+        self.storage_state_path.unlink(missing_ok=True)
+
+    def flush_counters(self: "Marketplace") -> None:
+        """Record statistics of network requests collected since the last call."""
+        if self.resource_blocker is not None:
+            self.resource_blocker.flush(self.name)
+        waited = self.pacer.collect_waited()
+        if waited:
+            counter.increment(CounterItem.PACING_WAIT, self.name, waited)
+
+    def is_login_wall(self: "Marketplace", page: Page) -> bool:
+        """Whether the page was redirected to a login page, a sign of being throttled."""
+        return "/login" in page.url
+
+    def record_page_load(self: "Marketplace", page: Page, load_time: float) -> None:
+        if self.is_login_wall(page):
+            self.pacer.backoff()
+            if self.proxy_pool is not None:
+                self.record_proxy_failure(blocked=True)
+        else:
+            self.pacer.success(load_time)
+            if self.proxy_pool is not None:
+                self.proxy_pool.record_success(self.proxy_server, load_time)
+        self.flush_counters()
+
+    def record_proxy_failure(self: "Marketplace", blocked: bool = False) -> None:
+        assert self.proxy_pool is not None
+        if self.proxy_pool.record_failure(self.proxy_server, blocked=blocked) and self.logger:
+            stats = self.proxy_pool.stats[str(self.proxy_server)]
+            self.logger.warning(
+                f"""{hilight("[Retrieve]", "fail")} Not using proxy {self.proxy_server} for {humanize.naturaldelta(stats.quarantined_until - self.proxy_pool.clock())} after repeated failures."""
+            )
+
+    def should_rotate_proxy(self: "Marketplace") -> bool:
+        """Whether the current proxy is failing and another proxy can be used."""
+        if self.proxy_pool is None or self.proxy_server is None:
+            return False
+        if self.proxy_pool.is_available(self.proxy_server) and self.circuit_breaker.allow():
+            return False
+        return any(
+            x != self.proxy_server and self.proxy_pool.is_available(x)
+            for x in self.proxy_pool.stats
+        )
+
+    @property
+    def navigation_timeout(self: "Marketplace") -> float:
+        """Timeout of page loads in milliseconds, as expected by playwright."""
+        timeout = getattr(self.config, "navigation_timeout", None)
+        return 60000 if timeout is None else timeout * 1000
+
+    @property
+    def circuit_breaker(self: "Marketplace") -> CircuitBreaker:
+        """Circuit breaker of the proxy server, or direct connection, currently in use."""
+        endpoint = self.proxy_server or "direct"
+        if endpoint not in self.circuit_breakers:
+            self.circuit_breakers[endpoint] = CircuitBreaker()
+        return self.circuit_breakers[endpoint]
+
+    def check_circuit(self: "Marketplace") -> None:
+        breaker = self.circuit_breaker
+        if not breaker.allow():
+            raise CircuitOpenError(
+                f"Navigation via {self.proxy_server or 'direct connection'} is suspended for "
+                f"{humanize.naturaldelta(breaker.retry_after())} after repeated failures."
+            )
+
+    def record_navigation(self: "Marketplace", success: bool) -> None:
+        """Record the outcome of a navigation and report changes of the circuit state."""
+        breaker = self.circuit_breaker
+        endpoint = self.proxy_server or "direct connection"
+        if success:
+            if breaker.record_success() and self.logger:
+                self.logger.info(
+                    f"""{hilight("[Retrieve]", "succ")} Navigation via {endpoint} has recovered."""
+                )
+        else:
+            if self.proxy_pool is not None:
+                self.record_proxy_failure()
+            if not breaker.record_failure():
+                return
+            counter.increment(CounterItem.CIRCUIT_OPENED, self.name)
+            if self.logger:
+                self.logger.warning(
+                    f"""{hilight("[Retrieve]", "fail")} Suspending navigation via {endpoint} for {humanize.naturaldelta(breaker.reset_timeout)} after {breaker.failures} failures."""
+                )
+
+    def goto_url(
+        self: "Marketplace",
+        url: str,
+        paced: bool = True,
+        on_new_page: Callable[[Page], None] | None = None,
+    ) -> None:
+        """Load url in self.page, retrying on failure.
+
+        With `paced=False`, the first attempt does not wait for the pacer, for example
+        because the request it replaces has already waited. `on_new_page` is called with
+        the page that replaces self.page if the proxy is swapped between attempts.
+        """
+        assert self.page is not None
+        retries = getattr(self.config, "navigation_retries", None)
+        attempts = 1 + (3 if retries is None else retries)
+        for attempt in range(attempts):
+            self.check_circuit()
+            if paced or attempt > 0:
+                self.pacer.wait()
+            if self.logger:
+                self.logger.debug(f"{hilight('[Retrieve]', 'info')} Navigating to {url}")
+            try:
+                start = time.monotonic()
+                self.context_navigations += 1
+                self.page.goto(url, timeout=self.navigation_timeout, wait_until="domcontentloaded")
+            except KeyboardInterrupt:
+                raise
+            except Exception as e:
+                self.record_navigation(False)
+                if attempt == attempts - 1:
+                    raise RuntimeError(
+                        f"Failed to navigate to {url} after {attempts} attempts. {e}"
+                    ) from e
+                # the next attempt waits for twice the current interval, with jitter
+                self.pacer.backoff()
+                if self.should_rotate_proxy():
+                    previous = self.proxy_server
+                    self.page = self.create_page(swap_proxy=True)
+                    if self.logger:
+                        self.logger.info(
+                            f"""{hilight("[Retrieve]", "info")} Switching from proxy {previous} to {self.proxy_server}."""
+                        )
+                    if on_new_page is not None:
+                        on_new_page(self.page)
+                continue
+            self.record_navigation(True)
+            self.record_page_load(self.page, time.monotonic() - start)
+            return
+
+    def get_detail_pages(self: "Marketplace") -> List[Page]:
+        """Return `detail_concurrency` pages, starting with self.page, that share its context."""
+        assert self.page is not None
+        context = self.page.context
+        for page in self.detail_pages:
+            # pages of a previous context (e.g. before swapping proxy) are no longer usable
+            if page.context != context and not page.is_closed():
+                page.close()
+        self.detail_pages = [
+            x for x in self.detail_pages if x.context == context and not x.is_closed()
+        ]
+        concurrency = getattr(self.config, "detail_concurrency", None) or 1
+        while len(self.detail_pages) < concurrency - 1:
+            self.detail_pages.append(context.new_page())
+        return [self.page, *self.detail_pages[: concurrency - 1]]
+
+    def visit_urls(
+        self: "Marketplace",
+        urls: List[str],
+        func: Callable[[Page, str], T],
+        paced: bool = True,
+    ) -> Generator[T | Exception, None, None]:
+        """Load urls in batches of concurrent pages and yield `func(page, url)` in order.
+
+        Navigation to all urls of a batch is started before waiting for any of them so
+        that the browser loads the pages concurrently. Errors are yielded instead of
+        raised so that one failed url does not stop the rest of the batch. With
+        `paced=False`, the first batch does not wait for the pacer.
+        """
+        pages = self.get_detail_pages()
+        for start in range(0, len(urls), len(pages)):
+            try:
+                self.check_circuit()
+            except CircuitOpenError as e:
+                for _ in urls[start:]:
+                    yield e
+                return
+            # a batch of pages counts as one request for pacing
+            if paced or start > 0:
+                self.pacer.wait()
+            batch_start = time.monotonic()
+            batch = list(zip(pages, urls[start : start + len(pages)]))
+            errors: dict[int, Exception] = {}
+            for idx, (page, url) in enumerate(batch):
+                try:
+                    if self.logger:
+                        self.logger.debug(f"{hilight('[Retrieve]', 'info')} Navigating to {url}")
+                    self.context_navigations += 1
+                    page.goto(url, timeout=self.navigation_timeout, wait_until="commit")
+                except KeyboardInterrupt:
+                    raise
+                except Exception as e:
+                    self.record_navigation(False)
+                    errors[idx] = e
+            for idx, (page, url) in enumerate(batch):
+                if idx in errors:
+                    yield errors[idx]
+                    continue
+                try:
+                    page.wait_for_load_state("domcontentloaded", timeout=self.navigation_timeout)
+                except KeyboardInterrupt:
+                    raise
+                except Exception as e:
+                    self.record_navigation(False)
+                    yield e
+                    continue
+                self.record_navigation(True)
+                try:
+                    self.record_page_load(page, time.monotonic() - batch_start)
+                    yield func(page, url)
+                except KeyboardInterrupt:
+                    raise
+                except Exception as e:
+                    yield e
+
+    def search_results_from_cache(self: "Marketplace", key: str) -> List[Listing] | None:
+        """Return search results saved by `search_results_to_cache` if they have not expired."""
+        if not getattr(self.config, "search_cache_ttl", None):
+            return None
+        try:
+            cached = cache.get((CacheType.SEARCH_RESULTS.value, key))
+            listings = None if cached is None else [Listing(**x) for x in cached]
+        except KeyboardInterrupt:
+            raise
+        except Exception:
+            # results saved by a different version of Listing
+            listings = None
+        counter.increment(
+            CounterItem.SEARCH_CACHE_MISS if listings is None else CounterItem.SEARCH_CACHE_HIT,
+            self.name,
+        )
+        return listings
+
+    def search_results_to_cache(self: "Marketplace", key: str, listings: List[Listing]) -> None:
+        ttl = getattr(self.config, "search_cache_ttl", None)
+        # empty results can be caused by throttling and are not saved
+        if not ttl or not listings:
+            return
+        cache.set(
+            (CacheType.SEARCH_RESULTS.value, key),
+            [asdict(x) for x in listings],
+            expire=ttl,
+            tag=CacheType.SEARCH_RESULTS.value,
+        )
+
+    def plan_search_urls(self: "Marketplace", item: TItemConfig) -> List[str]:
+        """Return normalized urls of the next search of an item.
+
+        Items that share urls are searched together so that each search page is
+        loaded once. Items without urls are searched on their own.
+        """
+        return []
+
+    @contextmanager
+    def search_cycle(self: "Marketplace") -> Generator[None, None, None]:
+        """Load each distinct search page once for all searches performed in the block."""
+        if self.cycle_results is not None:
+            yield
+            return
+        self.cycle_results = {}
+        try:
+            yield
+        finally:
+            self.cycle_results = None
+
+    def ensure_session(self: "Marketplace") -> None:
+        """Log in, or restore the saved session, before searching."""
+        return
 
     def search(self: "Marketplace", item: TItemConfig) -> Generator[Listing, None, None]:
         raise NotImplementedError("Search method must be implemented by subclasses.")
 
+    def search_async(
+        self: "Marketplace", item: TItemConfig, page: AsyncPage
+    ) -> AsyncGenerator[Listing, None]:
+        raise NotImplementedError("Async search method must be implemented by subclasses.")
+
 
 class WebPage:
     def __init__(
@@ -607,3 +1335,14 @@ class WebPage:
             # or we could use query_selector("./*[1]")
             child = children[0]
         raise ValueError("Could not find child element with condition.")
+
+
+def get_context_stats(local_cache: Cache | None = None) -> List[Dict[str, Any]]:
+    """Return page loads and memory of the browser contexts of all running monitors."""
+    local_cache = cache if local_cache is None else local_cache
+    res = [
+        local_cache.get(key)
+        for key in local_cache.iterkeys()
+        if isinstance(key, tuple) and key[0] == CacheType.CONTEXT_STATS.value
+    ]
+    return sorted((x for x in res if x is not None), key=lambda x: (x["marketplace"], x["pid"]))
@@ -0,0 +1,208 @@
+"""Match text against keyword expressions.
+
+Options such as `keywords` and `antikeywords` accept logical expressions such as
+`DJI AND (drone OR "go pro") AND NOT camera`. Each expression is parsed once into a
+predicate over normalized text, and compiled expressions are kept in an LRU cache so
+that expressions of the configuration, and ad-hoc expressions, are not parsed again
+for every listing. Expressions that cannot be parsed are matched as literal strings.
+
+Long lists of plain terms, such as hundreds of `antikeywords` or `exclude_sellers`,
+are searched with an Aho-Corasick automaton that finds any of the terms in a single
+pass over the text, instead of scanning the text once per term.
+"""
+
+import re
+from collections import deque
+from functools import lru_cache
+from typing import Callable, Dict, Iterable, List, NamedTuple, Tuple
+
+from pyparsing import (
+    CharsNotIn,
+    Keyword,
+    ParserElement,
+    ParseResults,
+    Word,
+    alphanums,
+    infix_notation,
+    opAssoc,
+)
+
+Predicate = Callable[[str], bool]
+
+# lists with fewer plain terms are faster to search with one scan per term
+MIN_AUTOMATON_TERMS = 16
+
+
+def normalize_string(string: str) -> str:
+    """Normalize a string by replacing multiple spaces (including space, tab, and newline) with a single space."""
+    return re.sub(r"\s+", " ", string).lower()
+
+
+ParserElement.enable_packrat()
+double_quoted_string = ('"' + CharsNotIn('"').leaveWhitespace() + '"').setParseAction(
+    lambda t: t[1]
+)  # removes quotes, keeps only the content
+single_quoted_string = ("'" + CharsNotIn("'").leaveWhitespace() + "'").setParseAction(
+    lambda t: t[1]
+)  # removes quotes, keeps only the content
+
+special_chars = "!@#$%^&*-_=+[]{}|;:'\",.<>?/\\`~"
+unquoted_string = Word(alphanums + special_chars)
+
+operand = double_quoted_string | single_quoted_string | unquoted_string
+and_op = Keyword("AND")
+or_op = Keyword("OR")
+not_op = Keyword("NOT")
+
+# Define the grammar for parsing
+expr = infix_notation(
+    operand,
+    [
+        (not_op, 1, opAssoc.RIGHT),
+        (and_op, 2, opAssoc.LEFT),
+        (or_op, 2, opAssoc.LEFT),
+    ],
+)
+
+
+class CompiledExpression(NamedTuple):
+    predicate: Predicate
+    # normalized term of expressions that match a plain string
+    term: str | None = None
+    # why the expression was matched as a literal string, if it looks like a logical expression
+    error: str | None = None
+
+
+def _contains(term: str) -> Predicate:
+    term = normalize_string(term)
+    return lambda text: term in text
+
+
+def _compile(parsed: str | ParseResults | List) -> Predicate:
+    if isinstance(parsed, str):
+        return _contains(parsed)
+
+    if len(parsed) == 1:
+        return _compile(parsed[0])
+
+    if parsed[0] == "NOT":
+        negated = _compile(parsed[1])
+        return lambda text: not negated(text)
+
+    if parsed[-2] == "AND":
+        left, right = _compile(parsed[:-2]), _compile(parsed[-1])
+        return lambda text: left(text) and right(text)
+
+    if parsed[-2] == "OR":
+        left, right = _compile(parsed[:-2]), _compile(parsed[-1])
+        return lambda text: left(text) or right(text)
+
+    raise ValueError(f"Invalid expression: {parsed}")
+
+
+@lru_cache(maxsize=4096)
+def compile_expression(expression: str) -> CompiledExpression:
+    """Compile a logical expression into a predicate over normalized text."""
+    try:
+        parsed = expr.parse_string(expression, parse_all=True)[0]
+        if isinstance(parsed, str):
+            return CompiledExpression(_contains(parsed), normalize_string(parsed))
+        return CompiledExpression(_compile(parsed))
+    except Exception as e:
+        # treat the expression as literal string for searching.
+        error = None
+        if any(x in expression for x in (" AND ", " OR ", " NOT ", "(NOT ")) or (
+            expression.startswith("NOT ")
+        ):
+            error = f"Failed to parse {expression} as a logical expression ({e}). Treating it as literal string."
+        return CompiledExpression(_contains(expression), normalize_string(expression), error)
+
+
+class LiteralAutomaton:
+    """Aho-Corasick automaton that tells if a text contains any of a list of terms."""
+
+    def __init__(self: "LiteralAutomaton", terms: Iterable[str]) -> None:
+        # trie of the terms, and whether a term ends at each state
+        self.goto: List[Dict[str, int]] = [{}]
+        self.matched = [False]
+        for term in terms:
+            state = 0
+            for char in term:
+                if char not in self.goto[state]:
+                    self.goto.append({})
+                    self.matched.append(False)
+                    self.goto[state][char] = len(self.goto) - 1
+                state = self.goto[state][char]
+            self.matched[state] = True
+
+        # failure links point to the state of the longest proper suffix in the trie
+        self.fail = [0] * len(self.goto)
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self.goto[state].items():
+                queue.append(next_state)
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[next_state] = self.goto[fallback].get(char, 0) if state else 0
+                self.matched[next_state] |= self.matched[self.fail[next_state]]
+
+        # transitions through failure links are added as they are used, so that
+        # scanning a text takes one lookup per character
+        self.transitions = [dict(x) for x in self.goto]
+
+    def _next_state(self: "LiteralAutomaton", state: int, char: str) -> int:
+        fallback = state
+        while fallback and char not in self.goto[fallback]:
+            fallback = self.fail[fallback]
+        next_state = self.goto[fallback].get(char, 0)
+        self.transitions[state][char] = next_state
+        return next_state
+
+    def search(self: "LiteralAutomaton", text: str) -> bool:
+        if self.matched[0]:
+            # an empty term matches any text
+            return True
+        transitions, matched = self.transitions, self.matched
+        state = 0
+        for char in text:
+            next_state = transitions[state].get(char)
+            state = self._next_state(state, char) if next_state is None else next_state
+            if matched[state]:
+                return True
+        return False
+
+
+class KeywordMatcher:
+    """Match text against a list of keyword expressions, any of which can match."""
+
+    def __init__(self: "KeywordMatcher", expressions: Tuple[str, ...]) -> None:
+        self.expressions = expressions
+        compiled = [compile_expression(x) for x in expressions]
+        self.errors = [x.error for x in compiled if x.error is not None]
+        # plain terms are searched together, logical expressions are evaluated one by one
+        terms = [x.term for x in compiled if x.term is not None]
+        self.automaton: LiteralAutomaton | None = None
+        if len(terms) >= MIN_AUTOMATON_TERMS:
+            self.automaton = LiteralAutomaton(terms)
+            compiled = [x for x in compiled if x.term is None]
+        self.predicates = [x.predicate for x in compiled]
+
+    def __call__(self: "KeywordMatcher", text: str | List[str]) -> bool:
+        if isinstance(text, str):
+            return self.match_normalized(normalize_string(text))
+        # normalized text has no newline, so terms cannot match across texts
+        return self.match_normalized("\n".join(normalize_string(x) for x in text))
+
+    def match_normalized(self: "KeywordMatcher", text: str) -> bool:
+        """Match text that has already been normalized with `normalize_string`."""
+        if self.automaton is not None and self.automaton.search(text):
+            return True
+        return any(predicate(text) for predicate in self.predicates)
+
+
+@lru_cache(maxsize=1024)
+def compile_keywords(expressions: str | Tuple[str, ...]) -> KeywordMatcher:
+    """Return a matcher for one or more expressions, reusing matchers of the same expressions."""
+    return KeywordMatcher((expressions,) if isinstance(expressions, str) else expressions)
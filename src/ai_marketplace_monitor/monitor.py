@@ -1,8 +1,8 @@
 import sys
-import time
+from contextlib import ExitStack
 from logging import Logger
 from pathlib import Path
-from typing import ClassVar, List
+from typing import Any, ClassVar, Iterable, List, Set, Tuple
 
 import humanize
 import inflect
@@ -13,10 +13,12 @@ from rich.pretty import pretty_repr
 from rich.prompt import Prompt
 
 from .ai import AIBackend, AIResponse
+from .async_engine import AsyncSearchEngine
 from .config import Config, supported_ai_backends, supported_marketplaces
 from .listing import Listing
-from .marketplace import Marketplace, TItemConfig, TMarketplaceConfig
+from .marketplace import CircuitOpenError, Marketplace, TItemConfig, TMarketplaceConfig
 from .notification import NotificationStatus
+from .sharding import ShardCoordinator, shard_items, shard_proxies
 from .user import User
 from .utils import (
     CounterItem,
@@ -62,6 +64,15 @@ class MarketplaceMonitor:
         self.playwright: Playwright = sync_playwright().start()
         self.browser: Browser | None = None
         self.logger = logger
+        # searches are performed concurrently if monitor option max_concurrent_searches is set
+        self.search_engine: AsyncSearchEngine | None = None
+        self.pending_searches: List[Tuple[TMarketplaceConfig, Marketplace, TItemConfig]] = []
+        # index and number of workers if running as a worker of a ShardCoordinator, with
+        # a queue for sending notification requests to the coordinator
+        self.shard: Tuple[int, int] | None = None
+        self.notifications: Any = None
+        # event set after the first searches, when the session of the marketplaces is saved
+        self.session_ready: Any = None
 
     def load_config_file(self: "MarketplaceMonitor") -> Config:
         """Load the configuration file."""
@@ -164,6 +175,68 @@ class MarketplaceMonitor:
         item_config: TItemConfig,
     ) -> None:
         """Search for an item on the marketplace."""
+        try:
+            self.process_listings(marketplace_config, item_config, marketplace.search(item_config))
+        except CircuitOpenError as e:
+            # the search will be performed again at the next scheduled time
+            if self.logger:
+                self.logger.warning(
+                    f"""{hilight("[Search]", "fail")} Skipping search for {item_config.name}: {e}"""
+                )
+
+    def search_items(
+        self: "MarketplaceMonitor",
+        marketplace_config: TMarketplaceConfig,
+        marketplace: Marketplace,
+        item_configs: List[TItemConfig],
+    ) -> None:
+        """Search for items that share search pages, loading each page once."""
+        with marketplace.search_cycle():
+            for item_config in item_configs:
+                self.search_item(marketplace_config, marketplace, item_config)
+
+    def queue_searches(
+        self: "MarketplaceMonitor",
+        marketplace_config: TMarketplaceConfig,
+        marketplace: Marketplace,
+        item_configs: List[TItemConfig],
+    ) -> None:
+        """Queue the search for items, to be performed concurrently by `flush_searches`."""
+        for item_config in item_configs:
+            self.pending_searches.append((marketplace_config, marketplace, item_config))
+
+    def flush_searches(self: "MarketplaceMonitor") -> None:
+        """Perform all queued searches concurrently, then process their results in order."""
+        if not self.pending_searches:
+            return
+        searches, self.pending_searches = self.pending_searches, []
+        assert self.search_engine is not None
+        with ExitStack() as stack:
+            # identical searches of different items are performed once
+            for marketplace in {id(x[1]): x[1] for x in searches}.values():
+                # async searches reuse the session saved by the marketplace
+                marketplace.ensure_session()
+                stack.enter_context(marketplace.search_cycle())
+            results = self.search_engine.search([(x[1], x[2]) for x in searches])
+        for (marketplace_config, marketplace, item_config), result in zip(searches, results):
+            marketplace.flush_counters()
+            if isinstance(result, BaseException):
+                if isinstance(result, KeyboardInterrupt):
+                    raise result
+                if self.logger:
+                    self.logger.error(
+                        f"""{hilight("[Search]", "fail")} Failed to search for {item_config.name}: {result}"""
+                    )
+                continue
+            self.process_listings(marketplace_config, item_config, result)
+
+    def process_listings(
+        self: "MarketplaceMonitor",
+        marketplace_config: TMarketplaceConfig,
+        item_config: TItemConfig,
+        listings: Iterable[Listing],
+    ) -> None:
+        """Evaluate listings found for an item and notify users of the new ones."""
         new_listings: List[Listing] = []
         listing_ratings = []
         # users to notify is determined from item, then marketplace, then all users
@@ -171,7 +244,7 @@ class MarketplaceMonitor:
         users_to_notify = (
             item_config.notify or marketplace_config.notify or list(self.config.user.keys())
         )
-        for listing in marketplace.search(item_config):
+        for listing in listings:
             # duplicated ID should not happen, but sellers could repost the same listing,
             # potentially under different seller names
             if listing.id in [x.id for x in new_listings] or listing.content in [
@@ -274,11 +347,22 @@ class MarketplaceMonitor:
             counter.increment(
                 CounterItem.NEW_VALIDATED_LISTING, item_config.name, len(new_listings)
             )
-            for user in users_to_notify:
-                User(self.config.user[user], logger=self.logger).notify(
-                    new_listings, listing_ratings, item_config
-                )
-        time.sleep(5)
+            self.notify_users(users_to_notify, new_listings, listing_ratings, item_config)
+
+    def notify_users(
+        self: "MarketplaceMonitor",
+        users: List[str],
+        listings: List[Listing],
+        ratings: List[AIResponse],
+        item_config: TItemConfig,
+    ) -> None:
+        assert self.config is not None
+        if self.notifications is not None:
+            # workers let the coordinator notify users
+            self.notifications.put((item_config.name, users, listings, ratings))
+            return
+        for user in users:
+            User(self.config.user[user], logger=self.logger).notify(listings, ratings, item_config)
 
     def _select_translator(
         self: "MarketplaceMonitor", language: str | None = None
@@ -329,6 +413,12 @@ class MarketplaceMonitor:
         self.load_ai_agents()
 
         assert self.config is not None
+        self.configure_search_engine()
+        if self.shard is not None and self.config.monitor.proxy_server:
+            # each worker uses its own share of the proxy servers
+            self.config.monitor.proxy_server = shard_proxies(
+                self.config.monitor.proxy_server, *self.shard
+            )
         for marketplace_config in self.config.marketplace.values():
             if marketplace_config.enabled is False:
                 continue
@@ -347,72 +437,141 @@ class MarketplaceMonitor:
                 translator=self._select_translator(marketplace_config.language),
             )
 
-            for item_config in self.config.item.values():
-                if item_config.enabled is False:
-                    continue
-
-                if (
+            item_configs = [
+                item_config
+                for item_config in self.config.item.values()
+                if item_config.enabled is not False
+                and (
                     item_config.marketplace is None
                     or item_config.marketplace == marketplace_config.name
-                ):
-                    # wait for some time before next search
-                    # interval (in minutes) can be defined both for the marketplace
-                    # if there is any configuration file change, stop sleeping and search again
-                    scheduled = None
-                    start_at_list = item_config.start_at or marketplace_config.start_at
-                    if start_at_list is not None and start_at_list:
-                        for start_at in start_at_list:
-                            if start_at.startswith("*:*:"):
-                                # '*:*:12' to ':12'
-                                if self.logger:
-                                    self.logger.info(
-                                        f"""{hilight("[Schedule]", "info")} Scheduling to search for {item_config.name} every minute at {start_at[3:]}s"""
-                                    )
-                                scheduled = schedule.every().minute.at(start_at[3:])
-                            elif start_at.startswith("*:"):
-                                # '*:12:12' or  '*:12'
-                                if self.logger:
-                                    self.logger.info(
-                                        f"""{hilight("[Schedule]", "info")} Scheduling to search for {item_config.name} every hour at {start_at[1:]}m"""
-                                    )
-                                scheduled = schedule.every().hour.at(
-                                    start_at[1:] if start_at.count(":") == 1 else start_at[2:]
+                )
+            ]
+            groups = self.plan_searches(marketplace_config, marketplace, item_configs)
+            if self.shard is not None:
+                # items that share search pages are searched by the same worker
+                groups = shard_items(groups, *self.shard)
+            for group in groups:
+                name = ", ".join(x.name for x in group)
+                # wait for some time before next search
+                # interval (in minutes) can be defined both for the marketplace
+                # if there is any configuration file change, stop sleeping and search again
+                scheduled = None
+                item_config = group[0]
+                start_at_list = item_config.start_at or marketplace_config.start_at
+                if start_at_list is not None and start_at_list:
+                    for start_at in start_at_list:
+                        if start_at.startswith("*:*:"):
+                            # '*:*:12' to ':12'
+                            if self.logger:
+                                self.logger.info(
+                                    f"""{hilight("[Schedule]", "info")} Scheduling to search for {name} every minute at {start_at[3:]}s"""
                                 )
-                            else:
-                                # '12:12:12' or '12:12'
-                                if self.logger:
-                                    self.logger.info(
-                                        f"""{hilight("[Schedule]", "ss")} Scheduling to search for {item_config.name} every day at {start_at}"""
-                                    )
-                                scheduled = schedule.every().day.at(start_at)
-                    else:
-                        search_interval = max(
-                            item_config.search_interval
-                            or marketplace_config.search_interval
-                            or 30 * 60,
-                            1,
-                        )
-                        max_search_interval = max(
-                            item_config.max_search_interval
-                            or marketplace_config.max_search_interval
-                            or 60 * 60,
-                            search_interval,
-                        )
-                        if self.logger:
-                            self.logger.info(
-                                f"""{hilight("[Schedule]", "info")} Scheduling to search for {item_config.name} every {humanize.naturaldelta(search_interval)} {"" if search_interval == max_search_interval else f"to {humanize.naturaldelta(max_search_interval)}"}"""
+                            scheduled = schedule.every().minute.at(start_at[3:])
+                        elif start_at.startswith("*:"):
+                            # '*:12:12' or  '*:12'
+                            if self.logger:
+                                self.logger.info(
+                                    f"""{hilight("[Schedule]", "info")} Scheduling to search for {name} every hour at {start_at[1:]}m"""
+                                )
+                            scheduled = schedule.every().hour.at(
+                                start_at[1:] if start_at.count(":") == 1 else start_at[2:]
                             )
-                        scheduled = schedule.every(search_interval).to(max_search_interval).seconds
-                    if scheduled is None:
-                        raise ValueError(
-                            f"Cannot determine a schedule for {item_config.name} from configuration file."
+                        else:
+                            # '12:12:12' or '12:12'
+                            if self.logger:
+                                self.logger.info(
+                                    f"""{hilight("[Schedule]", "ss")} Scheduling to search for {name} every day at {start_at}"""
+                                )
+                            scheduled = schedule.every().day.at(start_at)
+                else:
+                    search_interval, max_search_interval = self._search_intervals(
+                        marketplace_config, item_config
+                    )
+                    if self.logger:
+                        self.logger.info(
+                            f"""{hilight("[Schedule]", "info")} Scheduling to search for {name} every {humanize.naturaldelta(search_interval)} {"" if search_interval == max_search_interval else f"to {humanize.naturaldelta(max_search_interval)}"}"""
                         )
-                    scheduled.do(
-                        self.search_item,
-                        marketplace_config,
-                        marketplace,
-                        item_config,
-                    ).tag(item_config.name)
+                    scheduled = schedule.every(search_interval).to(max_search_interval).seconds
+                if scheduled is None:
+                    raise ValueError(
+                        f"Cannot determine a schedule for {name} from configuration file."
+                    )
+                scheduled.do(
+                    self.search_items if self.search_engine is None else self.queue_searches,
+                    marketplace_config,
+                    marketplace,
+                    group,
+                ).tag(name)
+
+    def _search_intervals(
+        self: "MarketplaceMonitor",
+        marketplace_config: TMarketplaceConfig,
+        item_config: TItemConfig,
+    ) -> Tuple[int, int]:
+        search_interval = max(
+            item_config.search_interval or marketplace_config.search_interval or 30 * 60,
+            1,
+        )
+        max_search_interval = max(
+            item_config.max_search_interval or marketplace_config.max_search_interval or 60 * 60,
+            search_interval,
+        )
+        return search_interval, max_search_interval
+
+    def plan_searches(
+        self: "MarketplaceMonitor",
+        marketplace_config: TMarketplaceConfig,
+        marketplace: Marketplace,
+        item_configs: List[TItemConfig],
+    ) -> List[List[TItemConfig]]:
+        """Group items that are searched on the same schedule and share search urls.
+
+        Items of a group are searched together, loading each distinct search page once
+        and checking the results against the filters of each item.
+        """
+        groups: List[Tuple[Tuple, Set[str], List[TItemConfig]]] = []
+        for item_config in item_configs:
+            when = (
+                tuple(item_config.start_at or marketplace_config.start_at or ()),
+                self._search_intervals(marketplace_config, item_config),
+            )
+            urls = set(marketplace.plan_search_urls(item_config))
+            overlapping = [g for g in groups if g[0] == when and g[1] & urls]
+            if not overlapping:
+                groups.append((when, urls, [item_config]))
+                continue
+            # merge all groups that share urls with the item, keeping the order of items
+            merged = (
+                when,
+                urls.union(*(g[1] for g in overlapping)),
+                [x for g in overlapping for x in g[2]] + [item_config],
+            )
+            idx = groups.index(overlapping[0])
+            groups = [g for g in groups if not any(g is x for x in overlapping)]
+            groups.insert(idx, merged)
+        for _, urls, group in groups:
+            if len(group) > 1 and self.logger:
+                self.logger.info(
+                    f"""{hilight("[Schedule]", "info")} Searching {", ".join(hilight(x.name) for x in group)} together to share {len(urls)} search pages."""
+                )
+        return [group for _, _, group in groups]
+
+    def configure_search_engine(self: "MarketplaceMonitor") -> None:
+        """Start or stop the engine for concurrent searches according to the monitor config."""
+        assert self.config is not None
+        max_concurrency = self.config.monitor.max_concurrent_searches
+        if (
+            self.search_engine is not None
+            and self.search_engine.max_concurrency != max_concurrency
+        ):
+            self.search_engine.stop()
+            self.search_engine = None
+        if max_concurrency is not None and self.search_engine is None:
+            if self.logger:
+                self.logger.info(
+                    f"""{hilight("[Schedule]", "info")} Searching up to {max_concurrency} items at the same time."""
+                )
+            self.search_engine = AsyncSearchEngine(max_concurrency, self.headless, self.logger)
 
     def handle_pause(self: "MarketplaceMonitor") -> None:
         """Handle interruption signal."""
@@ -503,12 +662,15 @@ class MarketplaceMonitor:
         """Main function to monitor the marketplace."""
         # start a browser with playwright, cannot use with statement since the jobs will be
         # executed outside of the scope by schedule job runner
-        self.keyboard_monitor = KeyboardMonitor()
-        self.keyboard_monitor.start()
+        if self.shard is None:
+            self.keyboard_monitor = KeyboardMonitor()
+            self.keyboard_monitor.start()
 
         # Open a new browser page.
         self.load_config_file()
         assert self.config is not None
+        while self.shard is None and (self.config.monitor.workers or 1) > 1:
+            self.run_coordinator()
         # If requested (by the web UI), defer browser launch until
         # marketplace credentials are set. Without this, Playwright
         # navigates to the Facebook login page and waits for manual
@@ -548,6 +710,10 @@ class MarketplaceMonitor:
                         )
                     schedule.clear()
                     break
+            self.flush_searches()
+            if self.session_ready is not None:
+                # the session has been saved by the first searches
+                self.session_ready.set()
             if not schedule.get_jobs():
                 continue
             # subsequent runs will be scheduled runs
@@ -602,11 +768,40 @@ class MarketplaceMonitor:
 
                 self.handle_pause()
                 schedule.run_pending()
+                self.flush_searches()
+
+    def run_coordinator(self: "MarketplaceMonitor") -> None:
+        """Search items in worker processes and notify users of listings they find.
+
+        Returns when the number of workers is changed in the configuration file.
+        """
+        assert self.config is not None
+        workers = self.config.monitor.workers or 1
+        coordinator = ShardCoordinator(self.config_files, workers, self.headless, self.logger)
+        coordinator.start()
+        try:
+            while True:
+                request = coordinator.receive(timeout=5)
+                # users and items could have been changed in the configuration file
+                config = self.load_config_file()
+                if request is not None:
+                    coordinator.notify(config, request)
+                if (config.monitor.workers or 1) != workers:
+                    if self.logger:
+                        self.logger.info(
+                            f"""{hilight("[Config]", "info")} Number of workers changed, restarting workers."""
+                        )
+                    return
+                coordinator.check_workers()
+        finally:
+            coordinator.stop()
 
     def stop_monitor(self: "MarketplaceMonitor") -> None:
         """Stop the monitor."""
         for marketplace in self.active_marketplaces.values():
             marketplace.stop()
+        if self.search_engine is not None:
+            self.search_engine.stop()
         self.playwright.stop()
         if self.keyboard_monitor:
             self.keyboard_monitor.stop()
@@ -0,0 +1,174 @@
+import asyncio
+import random
+import time
+from enum import Enum
+from typing import Callable
+
+
+class Pacer:
+    """Space out requests to a marketplace with a token bucket.
+
+    Tokens are refilled at one per `interval` seconds, up to `burst` tokens. `wait`
+    (or `wait_async`) consumes a token, sleeping (with random jitter) until it is
+    available. The interval shrinks slowly while pages load quickly (`success`) and
+    doubles when there are signs of throttling (`backoff`), such as slow page loads,
+    login walls, or empty result pages, staying within `min_interval` and
+    `max_interval`.
+    """
+
+    def __init__(
+        self: "Pacer",
+        interval: float = 5,
+        min_interval: float = 2,
+        max_interval: float = 60,
+        burst: int = 1,
+        jitter: float = 0.3,
+        slow_load: float = 10,
+        speedup: float = 0.95,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        self.min_interval = min_interval
+        self.max_interval = max(max_interval, min_interval)
+        self.interval = min(max(interval, self.min_interval), self.max_interval)
+        self.burst = burst
+        self.jitter = jitter
+        self.slow_load = slow_load
+        self.speedup = speedup
+        self.clock = clock
+        self.sleep = sleep
+        # the first request does not need to wait
+        self.tokens: float = burst
+        self.updated = clock()
+        # seconds spent waiting, to be collected by the caller
+        self.waited: float = 0
+
+    def _refill(self: "Pacer") -> None:
+        now = self.clock()
+        # `updated` can be in the future if a token has been reserved for later use
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) / self.interval)
+        self.updated = now
+
+    def pause(self: "Pacer", seconds: float) -> float:
+        """Sleep for about `seconds` seconds, with jitter, and return the actual delay."""
+        delay = max(0.0, seconds * (1 + random.uniform(-self.jitter, self.jitter)))
+        if delay > 0:
+            self.sleep(delay)
+            self.waited += delay
+        return delay
+
+    def reserve(self: "Pacer") -> float:
+        """Take a token and return the number of seconds to wait before using it.
+
+        Tokens can be borrowed, so that concurrent callers are spaced one interval
+        apart instead of all waiting for the same token.
+        """
+        self._refill()
+        self.tokens -= 1
+        if self.tokens >= 0:
+            return 0.0
+        delay = max(
+            0.0, -self.tokens * self.interval * (1 + random.uniform(-self.jitter, self.jitter))
+        )
+        # the borrowed token is paid back by the time it is used
+        self.tokens = 0
+        self.updated += delay
+        self.waited += delay
+        return delay
+
+    def wait(self: "Pacer") -> float:
+        """Wait until a request is allowed and return the number of seconds waited."""
+        delay = self.reserve()
+        if delay > 0:
+            self.sleep(delay)
+        return delay
+
+    async def wait_async(self: "Pacer") -> float:
+        """Wait, without blocking the event loop, until a request is allowed."""
+        delay = self.reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return delay
+
+    def success(self: "Pacer", load_time: float | None = None) -> None:
+        """Record a healthy response, or a slow one if it took more than `slow_load` seconds."""
+        if load_time is not None and load_time > self.slow_load:
+            self.backoff()
+        else:
+            self.interval = max(self.min_interval, self.interval * self.speedup)
+
+    def backoff(self: "Pacer") -> None:
+        """Record a sign of throttling, doubling the interval and dropping saved tokens."""
+        self.interval = min(self.max_interval, self.interval * 2)
+        self._refill()
+        self.tokens = min(self.tokens, 0)
+
+    def collect_waited(self: "Pacer") -> int:
+        """Return whole seconds waited since the last call, keeping the remainder."""
+        seconds = int(self.waited)
+        self.waited -= seconds
+        return seconds
+
+
+class CircuitState(Enum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+
+class CircuitBreaker:
+    """Stop sending requests to an endpoint after repeated failures.
+
+    The circuit opens after `failure_threshold` consecutive failures, and requests are
+    refused for `reset_timeout` seconds. After that, the circuit is half-open and one
+    request is allowed through, which closes the circuit if it succeeds and opens it
+    again if it fails.
+    """
+
+    def __init__(
+        self: "CircuitBreaker",
+        failure_threshold: int = 5,
+        reset_timeout: float = 300,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.failures = 0
+        self.opened_at: float | None = None
+
+    @property
+    def state(self: "CircuitBreaker") -> CircuitState:
+        if self.opened_at is None:
+            return CircuitState.CLOSED
+        if self.clock() - self.opened_at < self.reset_timeout:
+            return CircuitState.OPEN
+        return CircuitState.HALF_OPEN
+
+    def allow(self: "CircuitBreaker") -> bool:
+        """Whether a request can be sent."""
+        return self.state != CircuitState.OPEN
+
+    def retry_after(self: "CircuitBreaker") -> float:
+        """Seconds before the circuit becomes half-open."""
+        if self.opened_at is None:
+            return 0.0
+        return max(0.0, self.opened_at + self.reset_timeout - self.clock())
+
+    def record_success(self: "CircuitBreaker") -> bool:
+        """Record a successful request, return True if this closes the circuit."""
+        closed = self.opened_at is not None
+        self.failures = 0
+        self.opened_at = None
+        return closed
+
+    def record_failure(self: "CircuitBreaker") -> bool:
+        """Record a failed request, return True if this opens the circuit."""
+        self.failures += 1
+        state = self.state
+        if state == CircuitState.HALF_OPEN or (
+            state == CircuitState.CLOSED and self.failures >= self.failure_threshold
+        ):
+            self.opened_at = self.clock()
+            return True
+        return False
@@ -0,0 +1,171 @@
+"""Choose proxy servers according to how well they have been working.
+
+Each proxy server is scored by its latency, error rate (failed page loads), and
+block rate (redirections to the login page). Servers are chosen at random, weighted
+by score, and servers that fail repeatedly are put in quarantine for a period that
+doubles each time. Statistics are saved to the cache by each process so that worker
+processes do not overwrite each other, and are merged by server for the web UI.
+"""
+
+import os
+import random
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Dict, List
+
+from diskcache import Cache  # type: ignore
+
+from .utils import CacheType, cache
+
+
+@dataclass
+class ProxyStats:
+    server: str
+    requests: int = 0
+    failures: int = 0
+    blocks: int = 0
+    # moving average of page load time in seconds
+    latency: float = 0.0
+    consecutive_failures: int = 0
+    # number of consecutive quarantines, which doubles the next quarantine
+    quarantines: int = 0
+    # time (seconds since epoch) until which the server is not used
+    quarantined_until: float = 0.0
+
+    @property
+    def error_rate(self: "ProxyStats") -> float:
+        return self.failures / self.requests if self.requests else 0.0
+
+    @property
+    def block_rate(self: "ProxyStats") -> float:
+        return self.blocks / self.requests if self.requests else 0.0
+
+    @property
+    def score(self: "ProxyStats") -> float:
+        """Expected usefulness of the server, higher is better."""
+        # smoothed so that new servers are tried and a single failure is not fatal
+        success = (self.requests - self.failures - self.blocks + 1) / (self.requests + 2)
+        return max(success, 0.01) / (1 + self.latency / 10)
+
+    def to_dict(self: "ProxyStats") -> Dict[str, Any]:
+        return {
+            **asdict(self),
+            "error_rate": self.error_rate,
+            "block_rate": self.block_rate,
+            "score": self.score,
+        }
+
+
+class ProxyPool:
+    def __init__(
+        self: "ProxyPool",
+        servers: List[str],
+        failure_threshold: int = 3,
+        quarantine: float = 60,
+        max_quarantine: float = 3600,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.failure_threshold = failure_threshold
+        self.quarantine = quarantine
+        self.max_quarantine = max_quarantine
+        self.clock = clock
+        self.stats: Dict[str, ProxyStats] = {}
+        self.update(servers)
+
+    def update(self: "ProxyPool", servers: List[str]) -> None:
+        """Set the servers of the pool, keeping statistics of existing servers."""
+        self.stats = {x: self.stats.get(x) or ProxyStats(server=x) for x in servers}
+
+    def is_available(self: "ProxyPool", server: str) -> bool:
+        return server in self.stats and self.stats[server].quarantined_until <= self.clock()
+
+    def choose(self: "ProxyPool", exclude: str | None = None) -> str | None:
+        """Choose a server, weighted by score, avoiding servers in quarantine."""
+        candidates = [
+            x for x in self.stats.values() if self.is_available(x.server) and x.server != exclude
+        ]
+        if not candidates:
+            # keep the excluded server rather than using one in quarantine
+            if exclude is not None and self.is_available(exclude):
+                return exclude
+            candidates = [x for x in self.stats.values() if x.server != exclude] or list(
+                self.stats.values()
+            )
+            if not candidates:
+                return None
+            # all servers are in quarantine, use the one that will be released first
+            return min(candidates, key=lambda x: x.quarantined_until).server
+        return random.choices(candidates, weights=[x.score for x in candidates])[0].server
+
+    def record_success(self: "ProxyPool", server: str | None, load_time: float) -> None:
+        if server not in self.stats:
+            return
+        stats = self.stats[server]
+        stats.requests += 1
+        stats.latency = load_time if stats.requests == 1 else 0.8 * stats.latency + 0.2 * load_time
+        stats.consecutive_failures = 0
+        stats.quarantines = 0
+        self.save(stats)
+
+    def record_failure(self: "ProxyPool", server: str | None, blocked: bool = False) -> bool:
+        """Record a failed or blocked request, return True if the server is put in quarantine."""
+        if server not in self.stats:
+            return False
+        stats = self.stats[server]
+        stats.requests += 1
+        if blocked:
+            stats.blocks += 1
+        else:
+            stats.failures += 1
+        stats.consecutive_failures += 1
+        quarantined = stats.consecutive_failures >= self.failure_threshold
+        if quarantined:
+            stats.quarantined_until = self.clock() + min(
+                self.max_quarantine, self.quarantine * 2**stats.quarantines
+            )
+            stats.quarantines += 1
+            stats.consecutive_failures = 0
+        self.save(stats)
+        return quarantined
+
+    def save(self: "ProxyPool", stats: ProxyStats) -> None:
+        cache.set(
+            (CacheType.PROXY_STATS.value, stats.server, os.getpid()),
+            asdict(stats),
+            expire=24 * 60 * 60,
+            tag=CacheType.PROXY_STATS.value,
+        )
+
+
+def merge_proxy_stats(stats: List[ProxyStats]) -> ProxyStats:
+    """Combine statistics of a server saved by different processes."""
+    requests = sum(x.requests for x in stats)
+    return ProxyStats(
+        server=stats[0].server,
+        requests=requests,
+        failures=sum(x.failures for x in stats),
+        blocks=sum(x.blocks for x in stats),
+        latency=(
+            sum(x.latency * x.requests for x in stats) / requests
+            if requests
+            else max(x.latency for x in stats)
+        ),
+        consecutive_failures=max(x.consecutive_failures for x in stats),
+        quarantines=max(x.quarantines for x in stats),
+        quarantined_until=max(x.quarantined_until for x in stats),
+    )
+
+
+def get_proxy_stats(local_cache: Cache | None = None) -> List[Dict[str, Any]]:
+    """Return saved statistics of all proxy servers, for display."""
+    local_cache = cache if local_cache is None else local_cache
+    by_server: Dict[str, List[ProxyStats]] = {}
+    for key in local_cache.iterkeys():
+        if not isinstance(key, tuple) or key[0] != CacheType.PROXY_STATS.value:
+            continue
+        try:
+            stats = ProxyStats(**local_cache.get(key))
+        except (TypeError, KeyError):
+            continue
+        by_server.setdefault(stats.server, []).append(stats)
+    return [merge_proxy_stats(by_server[x]).to_dict() for x in sorted(by_server)]
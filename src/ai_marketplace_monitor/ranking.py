@@ -0,0 +1,124 @@
+"""Rank listings from search results before their details are loaded.
+
+Only the information on search result cards is available at this stage, so listings
+are scored by how well their titles match the search, how their prices compare to the
+price range of the item, and how high they appear in the search results, which are
+usually sorted by date. Details of the best listings are loaded first, so that they
+are rated and reported first, and so that a limit on the number of pages loaded per
+search is spent on the most promising listings.
+"""
+
+from typing import Dict, List
+
+from .filtering import ListingFilter
+from .listing import Listing
+from .marketplace import ItemConfig, MarketplaceConfig
+from .matcher import compile_keywords, normalize_string
+from .utils import parse_price
+
+# weights of title, price, and position in search results
+TITLE_WEIGHT = 0.4
+PRICE_WEIGHT = 0.3
+RECENCY_WEIGHT = 0.3
+
+
+def price_filter(item_config: ItemConfig, marketplace_config: MarketplaceConfig) -> ListingFilter:
+    """Filter with the price range of the item, to convert limits to the currency of listings."""
+    return ListingFilter(
+        min_price=item_config.min_price or marketplace_config.min_price,
+        max_price=item_config.max_price or marketplace_config.max_price,
+        currencies=item_config.currency or marketplace_config.currency,
+    )
+
+
+def title_score(listing: Listing, item_config: ItemConfig) -> float:
+    """Fraction of the words of the best matching search phrase found in the title."""
+    title = listing.normalized("title")
+    score = max(
+        (
+            sum(word in title for word in words) / len(words)
+            for words in (normalize_string(x).split() for x in item_config.search_phrases)
+            if words
+        ),
+        default=0.0,
+    )
+    # keywords cannot be checked without description, but a match in title is promising
+    if item_config.keywords and compile_keywords(tuple(item_config.keywords)).match_normalized(
+        title
+    ):
+        score = (score + 1) / 2
+    return score
+
+
+def price_score(
+    listing: Listing,
+    item_config: ItemConfig,
+    marketplace_config: MarketplaceConfig,
+    listing_filter: ListingFilter | None = None,
+) -> float:
+    """1 for the lowest price in the price range of the item, 0 for the highest or outside.
+
+    Limits such as `500 USD` are converted to the currency of the listing, and the score
+    is neutral if that currency cannot be determined.
+    """
+    if listing_filter is None:
+        listing_filter = price_filter(item_config, marketplace_config)
+    parsed = parse_price(listing.price)
+    if parsed is None or listing_filter.max_price is None:
+        return 0.5
+    amount, symbol = parsed
+    max_price = listing_filter.limit(listing_filter.max_price, symbol)
+    if not max_price:
+        return 0.5
+    min_price = (
+        None
+        if listing_filter.min_price is None
+        else listing_filter.limit(listing_filter.min_price, symbol)
+    ) or 0.0
+    if amount < min_price or amount > max_price:
+        return 0.0
+    if max_price <= min_price:
+        return 1.0
+    return 1 - (amount - min_price) / (max_price - min_price)
+
+
+def score_listing(
+    listing: Listing,
+    item_config: ItemConfig,
+    marketplace_config: MarketplaceConfig,
+    recency: float = 0.5,
+    listing_filter: ListingFilter | None = None,
+) -> float:
+    """Score a listing between 0 and 1, `recency` being 1 for the first search result."""
+    return (
+        TITLE_WEIGHT * title_score(listing, item_config)
+        + PRICE_WEIGHT * price_score(listing, item_config, marketplace_config, listing_filter)
+        + RECENCY_WEIGHT * recency
+    )
+
+
+def search_recency(listings: List[Listing]) -> Dict[str, float]:
+    """Recency of listings by post url, from their positions in search results."""
+    return {x.post_url: 1 - idx / len(listings) for idx, x in enumerate(listings)}
+
+
+def rank_listings(
+    listings: List[Listing],
+    item_config: ItemConfig,
+    marketplace_config: MarketplaceConfig,
+    recency: Dict[str, float] | None = None,
+) -> List[Listing]:
+    """Sort listings by score, best first, keeping the order of listings with the same score."""
+    # price limits are converted once for all listings
+    listing_filter = price_filter(item_config, marketplace_config)
+    scores = {
+        x.post_url: score_listing(
+            x,
+            item_config,
+            marketplace_config,
+            (recency or {}).get(x.post_url, 0.5),
+            listing_filter,
+        )
+        for x in listings
+    }
+    return sorted(listings, key=lambda x: -scores[x.post_url])
@@ -0,0 +1,85 @@
+"""Decide when cached listing details should be loaded again.
+
+Details of a listing are cached and reused as long as the price and title on its
+search result card are unchanged. Descriptions can however be edited, and listings
+marked as sold, without changing them, so details older than `details_max_age` are
+loaded again. So that details cached at the same time are not all refreshed in the
+same search, they can be refreshed early with a probability that increases with their
+age over the last `details_early_refresh` fraction of `details_max_age`. The number of
+refreshes per search is limited by `max_detail_refreshes`.
+"""
+
+import random
+import time
+from typing import Callable, Dict, Type
+
+from .marketplace import ItemConfig, MarketplaceConfig
+
+
+class RevalidationPolicy:
+    def __init__(
+        self: "RevalidationPolicy",
+        max_age: float,
+        early_refresh: float = 0.0,
+        budget: int | None = None,
+        clock: Callable[[], float] = time.time,
+        rand: Callable[[], float] = random.random,
+    ) -> None:
+        self.max_age = max_age
+        self.early_refresh = early_refresh
+        self.budget = budget
+        self.clock = clock
+        self.rand = rand
+        # decision for each listing, so that a listing checked more than once
+        # in a search is refreshed at most once
+        self.decisions: Dict[str, bool] = {}
+        self.refreshes = 0
+
+    @classmethod
+    def from_config(
+        cls: Type["RevalidationPolicy"],
+        item_config: ItemConfig,
+        marketplace_config: MarketplaceConfig,
+    ) -> "RevalidationPolicy | None":
+        """Policy for one search of an item, None if cached details never expire."""
+        max_age = item_config.details_max_age or marketplace_config.details_max_age
+        if not max_age:
+            return None
+        early_refresh = item_config.details_early_refresh
+        if early_refresh is None:
+            early_refresh = marketplace_config.details_early_refresh
+        budget = item_config.max_detail_refreshes
+        if budget is None:
+            budget = marketplace_config.max_detail_refreshes
+        return cls(max_age, early_refresh or 0.0, budget)
+
+    def age(self: "RevalidationPolicy", cached_time: float | None) -> float | None:
+        return None if cached_time is None else max(self.clock() - cached_time, 0.0)
+
+    def refresh_probability(self: "RevalidationPolicy", age: float | None) -> float:
+        """Probability of refreshing details of the age, 1 for unknown age."""
+        if age is None or age >= self.max_age:
+            return 1.0
+        start = self.max_age * (1 - self.early_refresh)
+        if age <= start:
+            return 0.0
+        return (age - start) / (self.max_age - start)
+
+    def is_decided(self: "RevalidationPolicy", post_url: str) -> bool:
+        return post_url.split("?")[0] in self.decisions
+
+    def should_refresh(
+        self: "RevalidationPolicy", post_url: str, cached_time: float | None
+    ) -> bool:
+        """Whether cached details of a listing should be loaded again in this search."""
+        key = post_url.split("?")[0]
+        if key not in self.decisions:
+            refresh = self.rand() < self.refresh_probability(self.age(cached_time))
+            if refresh and self.budget is not None and self.refreshes >= self.budget:
+                refresh = False
+            self.refreshes += refresh
+            self.decisions[key] = refresh
+        return self.decisions[key]
+
+    def is_stale(self: "RevalidationPolicy", cached_time: float | None) -> bool:
+        return self.refresh_probability(self.age(cached_time)) >= 1
@@ -0,0 +1,189 @@
+"""Run the monitor in several processes, each searching a share of the items.
+
+With `[monitor] workers = N`, the monitor started from the command line becomes a
+coordinator that starts N worker processes. Each worker runs a `MarketplaceMonitor`
+with its own browser and searches the groups of items assigned to its shard, so that
+items that share search pages are searched by the same worker. Workers share the
+disk cache, so listing details, AI results and counters are shared, and send new
+listings to the coordinator, which notifies users from a single process.
+
+The first worker is started alone so that it logs in and saves the session of the
+marketplace. The other workers are started once it has completed its first searches,
+and restore the saved session instead of logging in to the same account again.
+"""
+
+import logging
+import multiprocessing
+import queue
+import time
+from logging import Logger
+from multiprocessing.context import SpawnProcess
+from pathlib import Path
+from typing import Any, List, Tuple, TypeVar
+
+from rich.logging import RichHandler
+
+from .ai import AIResponse
+from .listing import Listing
+from .user import User
+from .utils import hilight
+
+# item name, users to notify, new listings and their ratings, sent by workers
+NotificationRequest = Tuple[str, List[str], List[Listing], List[AIResponse]]
+
+# seconds to wait for the first worker to log in before starting the other workers
+SESSION_TIMEOUT = 600
+
+T = TypeVar("T")
+
+
+def shard_items(items: List[T], index: int, count: int) -> List[T]:
+    """Return the items, or groups of items, searched by worker `index` out of `count` workers."""
+    return items[index::count]
+
+
+def shard_proxies(proxy_servers: List[str], index: int, count: int) -> List[str]:
+    """Return the proxy servers of worker `index`, sharing servers if there are fewer than workers."""
+    return shard_items(proxy_servers, index, count) or [proxy_servers[index % len(proxy_servers)]]
+
+
+def run_worker(
+    index: int,
+    count: int,
+    config_files: List[Path],
+    headless: bool | None,
+    verbose: bool,
+    notifications: Any,
+    session_ready: Any = None,
+) -> None:
+    """Entry point of a worker process."""
+    # lazy import to avoid circular import
+    from .monitor import MarketplaceMonitor
+
+    logging.basicConfig(
+        level="DEBUG",
+        format=f"[worker {index + 1}] %(message)s",
+        handlers=[
+            RichHandler(
+                markup=True,
+                rich_tracebacks=True,
+                show_path=False,
+                level="DEBUG" if verbose else "INFO",
+            )
+        ],
+    )
+    for logger_name in ("asyncio", "openai._base_client", "httpcore.connection", "httpx"):
+        logging.getLogger(logger_name).setLevel(logging.ERROR)
+    logger = logging.getLogger("monitor")
+
+    monitor = MarketplaceMonitor(config_files, headless, logger)
+    monitor.shard = (index, count)
+    monitor.notifications = notifications
+    monitor.session_ready = session_ready
+    try:
+        monitor.start_monitor()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        monitor.stop_monitor()
+
+
+class ShardCoordinator:
+    """Start worker processes and send the notifications they request."""
+
+    def __init__(
+        self: "ShardCoordinator",
+        config_files: List[Path],
+        workers: int,
+        headless: bool | None = None,
+        logger: Logger | None = None,
+    ) -> None:
+        self.config_files = config_files
+        self.workers = workers
+        self.headless = headless
+        self.logger = logger
+        # spawn so that workers do not inherit the playwright driver and threads of the coordinator
+        self.context = multiprocessing.get_context("spawn")
+        self.notifications = self.context.Queue()
+        # set by the first worker after it has logged in and saved the session
+        self.session_ready = self.context.Event()
+        self.started_at = 0.0
+        self.processes: List[SpawnProcess] = []
+
+    def start_worker(self: "ShardCoordinator", index: int) -> SpawnProcess:
+        process = self.context.Process(
+            target=run_worker,
+            args=(
+                index,
+                self.workers,
+                self.config_files,
+                self.headless,
+                self.logger is not None and self.logger.isEnabledFor(logging.DEBUG),
+                self.notifications,
+                self.session_ready,
+            ),
+            name=f"aimm-worker-{index + 1}",
+            daemon=True,
+        )
+        process.start()
+        return process
+
+    def start(self: "ShardCoordinator") -> None:
+        if self.logger:
+            self.logger.info(
+                f"""{hilight("[Schedule]", "info")} Starting {self.workers} worker processes."""
+            )
+        self.started_at = time.time()
+        self.processes = [self.start_worker(0)]
+        self.start_pending_workers()
+
+    def start_pending_workers(self: "ShardCoordinator") -> None:
+        """Start the other workers once the first worker has logged in, or failed to."""
+        if len(self.processes) >= self.workers:
+            return
+        if (
+            not self.session_ready.is_set()
+            and self.processes[0].is_alive()
+            and time.time() - self.started_at < SESSION_TIMEOUT
+        ):
+            return
+        self.processes += [self.start_worker(i) for i in range(len(self.processes), self.workers)]
+
+    def check_workers(self: "ShardCoordinator") -> None:
+        """Restart workers that have stopped with an error, and start pending workers."""
+        self.start_pending_workers()
+        for idx, process in enumerate(self.processes):
+            if process.is_alive() or process.exitcode == 0:
+                continue
+            if self.logger:
+                self.logger.warning(
+                    f"""{hilight("[Schedule]", "fail")} Worker {idx + 1} stopped with exit code {process.exitcode}, restarting."""
+                )
+            self.processes[idx] = self.start_worker(idx)
+
+    def stop(self: "ShardCoordinator") -> None:
+        for process in self.processes:
+            if process.is_alive():
+                process.terminate()
+        for process in self.processes:
+            process.join(timeout=10)
+        self.processes = []
+
+    def receive(self: "ShardCoordinator", timeout: float) -> NotificationRequest | None:
+        try:
+            return self.notifications.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def notify(self: "ShardCoordinator", config: Any, request: NotificationRequest) -> None:
+        """Notify users of new listings found by a worker."""
+        item_name, users, listings, ratings = request
+        if item_name not in config.item:
+            # item removed from the configuration after the search
+            return
+        for user in users:
+            if user not in config.user:
+                continue
+            User(config.user[user], logger=self.logger).notify(
+                listings, ratings, config.item[item_name]
+            )
@@ -7,6 +7,7 @@ import re
 import time
 from dataclasses import asdict, dataclass, fields
 from enum import Enum
+from functools import lru_cache
 from logging import Logger
 from pathlib import Path
 from typing import Any, Dict, List, Tuple, TypeVar
@@ -14,18 +15,9 @@ from typing import Any, Dict, List, Tuple, TypeVar
 import parsedatetime  # type: ignore
 import requests  # type: ignore
 import rich
+from currency_converter import CurrencyConverter  # type: ignore
 from diskcache import Cache  # type: ignore
 from playwright.sync_api import ProxySettings
-from pyparsing import (
-    CharsNotIn,
-    Keyword,
-    ParserElement,
-    ParseResults,
-    Word,
-    alphanums,
-    infix_notation,
-    opAssoc,
-)
 from requests.exceptions import RequestException, Timeout  # type: ignore
 from rich.pretty import pretty_repr
 
@@ -44,6 +36,8 @@ from PIL import Image
 from watchdog.events import FileSystemEvent, FileSystemEventHandler
 from watchdog.observers import Observer
 
+from .matcher import compile_keywords
+
 # home directory for all settings and caches
 amm_home = Path.home() / ".ai-marketplace-monitor"
 amm_home.mkdir(parents=True, exist_ok=True)
@@ -77,6 +71,9 @@ class CacheType(Enum):
     AI_INQUIRY = "ai-inquiries"
     USER_NOTIFIED = "user-notifications"
     COUNTERS = "counters"
+    SEARCH_RESULTS = "search-results"
+    PROXY_STATS = "proxy-stats"
+    CONTEXT_STATS = "context-stats"
 
 
 class CounterItem(Enum):
@@ -90,6 +87,17 @@ class CounterItem(Enum):
     FAILED_AI_QUERY = "Failed AI Queries)"
     NOTIFICATIONS_SENT = "Notifications sent"
     REMINDERS_SENT = "Reminders sent"
+    BLOCKED_REQUEST = "Blocked requests"
+    DOWNLOADED_BYTES = "Downloaded bytes"
+    PACING_WAIT = "Seconds waited between requests"
+    CIRCUIT_OPENED = "Navigation suspended after failures"
+    SHARED_SEARCH = "Search results shared between items"
+    SEARCH_CACHE_HIT = "Search results from cache"
+    SEARCH_CACHE_MISS = "Search results not in cache"
+    CONTEXT_RECYCLED = "Browser context recycled"
+    LISTING_REFRESHED = "Cached listing refreshed"
+    STALE_LISTING_REUSED = "Stale cached listing reused"
+    HTTP_DETAIL_FETCH = "Listing details fetched over HTTP"
 
 
 class Currency(Enum):
@@ -326,6 +334,10 @@ class MonitorConfig(BaseConfig):
     proxy_bypass: str | None = None
     proxy_username: str | None = None
     proxy_password: str | None = None
+    block_resources: List[str] | None = None
+    block_urls: List[str] | None = None
+    max_concurrent_searches: int | None = None
+    workers: int | None = None
 
     def handle_proxy_server(self: "MonitorConfig") -> None:
         if self.proxy_server is None:
@@ -361,10 +373,68 @@ class MonitorConfig(BaseConfig):
         if not isinstance(self.proxy_password, str):
             raise ValueError(f"Item {hilight(self.name)} proxy_password must be a string.")
 
-    def get_proxy_options(self: "MonitorConfig") -> ProxySettings | None:
+    def handle_block_resources(self: "MonitorConfig") -> None:
+        if self.block_resources is None:
+            return
+
+        if isinstance(self.block_resources, str):
+            self.block_resources = [self.block_resources]
+
+        # resource types as reported by playwright's request.resource_type, except
+        # for "document", which would block the pages themselves
+        allowed = {
+            "stylesheet",
+            "image",
+            "media",
+            "font",
+            "script",
+            "texttrack",
+            "xhr",
+            "fetch",
+            "eventsource",
+            "websocket",
+            "manifest",
+            "other",
+        }
+        if not isinstance(self.block_resources, list) or not all(
+            x in allowed for x in self.block_resources
+        ):
+            raise ValueError(
+                f"Item {hilight(self.name)} block_resources must be one or more of {', '.join(sorted(allowed))}."
+            )
+
+    def handle_block_urls(self: "MonitorConfig") -> None:
+        if self.block_urls is None:
+            return
+
+        if isinstance(self.block_urls, str):
+            self.block_urls = [self.block_urls]
+
+        if not isinstance(self.block_urls, list) or not all(
+            isinstance(x, str) for x in self.block_urls
+        ):
+            raise ValueError(f"Item {hilight(self.name)} block_urls must be a list of strings.")
+
+    def handle_max_concurrent_searches(self: "MonitorConfig") -> None:
+        if self.max_concurrent_searches is None:
+            return
+        if not isinstance(self.max_concurrent_searches, int) or self.max_concurrent_searches < 1:
+            raise ValueError(
+                f"Item {hilight(self.name)} max_concurrent_searches must be a positive integer."
+            )
+
+    def handle_workers(self: "MonitorConfig") -> None:
+        if self.workers is None:
+            return
+        if not isinstance(self.workers, int) or self.workers < 1:
+            raise ValueError(f"Item {hilight(self.name)} workers must be a positive integer.")
+
+    def get_proxy_options(
+        self: "MonitorConfig", server: str | None = None
+    ) -> ProxySettings | None:
         if not self.proxy_server:
             return None
-        res = ProxySettings(server=random.choice(self.proxy_server))
+        res = ProxySettings(server=server or random.choice(self.proxy_server))
         if self.proxy_username and self.proxy_password:
             res["username"] = self.proxy_username
             res["password"] = self.proxy_password
@@ -413,41 +483,7 @@ def merge_dicts(dicts: list) -> dict:
     return result
 
 
-def normalize_string(string: str) -> str:
-    """Normalize a string by replacing multiple spaces (including space, tab, and newline) with a single space."""
-    return re.sub(r"\s+", " ", string).lower()
-
-
-ParserElement.enable_packrat()
-double_quoted_string = ('"' + CharsNotIn('"').leaveWhitespace() + '"').setParseAction(
-    lambda t: t[1]
-)  # removes quotes, keeps only the content
-single_quoted_string = ("'" + CharsNotIn("'").leaveWhitespace() + "'").setParseAction(
-    lambda t: t[1]
-)  # removes quotes, keeps only the content
-
-special_chars = "!@#$%^&*-_=+[]{}|;:'\",.<>?/\\`~"
-unquoted_string = Word(alphanums + special_chars)
-
-operand = double_quoted_string | single_quoted_string | unquoted_string
-and_op = Keyword("AND")
-or_op = Keyword("OR")
-not_op = Keyword("NOT")
-
-# Define the grammar for parsing
-expr = infix_notation(
-    operand,
-    [
-        (not_op, 1, opAssoc.RIGHT),
-        (and_op, 2, opAssoc.LEFT),
-        (or_op, 2, opAssoc.LEFT),
-    ],
-)
-
-
-def is_substring(
-    var1: str | List[str], var2: str | List[str], logger: Logger | None = None
-) -> bool:
+def is_substring(var1: str | List[str], var2: str | List[str]) -> bool:
     """Check if var1 is a substring of var2, after normalizing both strings. One of them can be a list of strings.
 
     var1: can be a single string, or a list of string, for which a condition of OR is assumed.
@@ -455,51 +491,11 @@ def is_substring(
           logical expression.
 
     var2: one or more strings for testing if strings in  "var1" is a substring.
-    """
-    if isinstance(var1, list):
-        return any(is_substring(x, var2, logger) for x in var1)
-
-    # parse the expression
-    parsed = ""
-    try:
-        parsed = expr.parseString(var1, parseAll=True)[0]
-    except Exception:
-        # treat var1 as literal string for searching.
-        if any(x in var1 for x in (" AND ", " OR ", " NOT ", "(NOT ")) or var1.startswith("NOT "):
-            if logger:
-                logger.warning(
-                    f"Failed to parse {var1} as a logical expression. Treating it as literal string."
-                )
-        if isinstance(var2, str):
-            return normalize_string(var1) in normalize_string(var2)
-        return any(normalize_string(var1) in normalize_string(s2) for s2 in var2)
-
-    def evaluate_expression(parsed_expression: str | ParseResults) -> bool:
-        if isinstance(parsed_expression, str):
-            if isinstance(var2, str):
-                return normalize_string(parsed_expression) in normalize_string(var2)
-            return any(normalize_string(parsed_expression) in normalize_string(s) for s in var2)
-
-        if len(parsed_expression) == 1:
-            return evaluate_expression(parsed_expression[0])
-
-        if parsed_expression[0] == "NOT":
-            return not evaluate_expression(parsed_expression[1])
-
-        if parsed_expression[-2] == "AND":
-            return evaluate_expression(parsed_expression[:-2]) and evaluate_expression(
-                parsed_expression[-1]
-            )
 
-        if parsed_expression[-2] == "OR":
-            return evaluate_expression(parsed_expression[:-2]) or evaluate_expression(
-                parsed_expression[-1]
-            )
-        if logger:
-            logger.error(f"Invalid expression: {parsed_expression}")
-        return False
-
-    return evaluate_expression(parsed)
+    Expressions are compiled once and cached, see `matcher.compile_keywords`. Expressions
+    that cannot be parsed are reported when the configuration is loaded.
+    """
+    return compile_keywords(var1 if isinstance(var1, str) else tuple(var1))(var2)
 
 
 class ChangeHandler(FileSystemEventHandler):
@@ -586,6 +582,9 @@ def extract_price(price: str) -> str:
         currency = matched.group(1).strip()
     else:
         currency = "$"
+    if not currency:
+        # prices with the currency symbol after the amount, such as "1 234 zł"
+        return price.strip()
 
     matches = re.findall(currency.replace("$", r"\$") + r"[\d,]+(?:\.\d+)?", price)
     if matches:
@@ -593,12 +592,101 @@ def extract_price(price: str) -> str:
     return price
 
 
+def _parse_amount(number: str) -> float | None:
+    """Parse an amount with "," "." or space as thousands or decimal separators.
+
+    A separator followed by exactly three digits is a thousands separator, and a "."
+    or "," followed by one or two digits at the end is a decimal separator, so that
+    "1,234.50", "1.234,50", "1 234" and "1.234" are all read. Other formats are
+    ambiguous and return None.
+    """
+    parts = re.split(r"([.,\s])", number)
+    digits, separators = parts[::2], parts[1::2]
+    decimals = ""
+    if separators and separators[-1] in ".," and len(digits[-1]) != 3:
+        if len(digits[-1]) > 2:
+            return None
+        decimals = digits.pop()
+        decimal_separator = separators.pop()
+        if decimal_separator in separators:
+            return None
+    if separators and (
+        len(set(separators)) != 1
+        or not 1 <= len(digits[0]) <= 3
+        or digits[0] == "0"
+        or any(len(x) != 3 for x in digits[1:])
+    ):
+        return None
+    return float("".join(digits) + ("." + decimals if decimals else ""))
+
+
+def parse_price(price: str | None) -> Tuple[float, str] | None:
+    """Return the amount and currency symbol of the first price in a price string.
+
+    The currency symbol can be before or after the amount, as in "$10", "R$ 2.500" or
+    "1 234 zł". Prices such as "Free" or "**unspecified**", and amounts in ambiguous
+    formats, return None.
+    """
+    if not price:
+        return None
+    # the first of prices such as "CA$1,200 | $1,500"
+    price = price.split("|")[0]
+    matched = re.search(r"\d(?:[.,\s]?\d)*", price)
+    if not matched:
+        return None
+    amount = _parse_amount(matched.group(0))
+    if amount is None:
+        return None
+    symbol = price[: matched.start()].strip() or price[matched.end() :].strip()
+    return amount, symbol
+
+
+@lru_cache(maxsize=None)
+def currency_converter() -> CurrencyConverter:
+    """Return a converter shared by all searches so that exchange rates are loaded once."""
+    return CurrencyConverter()
+
+
 def convert_to_seconds(time_str: str) -> int:
     cal = parsedatetime.Calendar(version=parsedatetime.VERSION_CONTEXT_STYLE)
     time_struct, _ = cal.parse(time_str)
     return int(time.mktime(time_struct) - time.mktime(time.localtime()))
 
 
+VEHICLE_EMOJI_PATTERNS = [
+    ("Driven", "🚗"),
+    ("transmission", "⚙️"),
+    ("color", "🎨"),
+    ("safety rating", "⭐"),
+    ("NHTSA", "⭐"),
+    ("Fuel type", "⛽"),
+    ("MPG", "⛽"),
+    ("owner", "👤"),
+    ("paid off", "💰"),
+    ("Clean title", "✅"),
+    ("no significant damage", "✅"),
+    ("Salvage", "⚠️"),
+    ("accident", "⚠️"),
+]
+
+
+def add_vehicle_emojis(text: str) -> str:
+    """Prepend emoji indicators to known vehicle attribute lines."""
+    lines = text.split("\n")
+    result = []
+    for line in lines:
+        stripped = line.strip()
+        if not stripped:
+            continue
+        emoji = ""
+        for pattern, icon in VEHICLE_EMOJI_PATTERNS:
+            if pattern.lower() in stripped.lower():
+                emoji = icon + " "
+                break
+        result.append(emoji + stripped)
+    return "\n".join(result)
+
+
 def hilight(text: str, style: str = "name") -> str:
     """Highlight the keywords in the text with the specified color."""
     color = {
@@ -34,6 +34,8 @@ from fastapi import (
 from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 
+from ..marketplace import get_context_stats
+from ..proxy import get_proxy_stats
 from ..utils import cache
 from .auth import (
     CSRF_COOKIE,
@@ -480,6 +482,15 @@ def create_app(
             headers={"Content-Disposition": f'attachment; filename="{filename}"'},
         )
 
+    # Sync def for the same reason: reading the statistics scans the cache.
+    @app.get("/api/proxies")
+    def proxy_stats(_: str = Depends(require_session)) -> Dict[str, Any]:
+        return {"proxies": get_proxy_stats(cache)}
+
+    @app.get("/api/contexts")
+    def context_stats(_: str = Depends(require_session)) -> Dict[str, Any]:
+        return {"contexts": get_context_stats(cache)}
+
     return app
 
 
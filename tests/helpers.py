@@ -0,0 +1,41 @@
+"""Helpers shared by tests."""
+
+from typing import List
+
+from ai_marketplace_monitor.listing import Listing
+
+
+def make_listing(
+    idx: int | str, title: str | None = None, price: str = "$10", **fields: str
+) -> Listing:
+    """Listing `idx` of facebook marketplace, with other fields empty unless specified."""
+    values = {
+        "marketplace": "facebook",
+        "name": "",
+        "id": str(idx),
+        "title": f"title {idx}" if title is None else title,
+        "image": "",
+        "price": price,
+        "post_url": f"https://www.facebook.com/marketplace/item/{idx}/",
+        "location": "",
+        "seller": "",
+        "condition": "",
+        "description": "",
+    }
+    values.update(fields)
+    return Listing(**values)
+
+
+class FakeClock:
+    """Clock that only advances when told to, or when sleeping."""
+
+    def __init__(self: "FakeClock", now: float = 0.0) -> None:
+        self.now = now
+        self.sleeps: List[float] = []
+
+    def __call__(self: "FakeClock") -> float:
+        return self.now
+
+    def sleep(self: "FakeClock", seconds: float) -> None:
+        self.sleeps.append(seconds)
+        self.now += seconds
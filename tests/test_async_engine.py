@@ -0,0 +1,192 @@
+import asyncio
+from typing import Any, AsyncGenerator, List, Tuple
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from diskcache import Cache  # type: ignore
+
+from ai_marketplace_monitor.async_engine import AsyncSearchEngine
+from ai_marketplace_monitor.facebook import (
+    _SEARCH_RESULT_SCRIPT,
+    FacebookItemConfig,
+    FacebookMarketplace,
+    FacebookMarketplaceConfig,
+)
+from ai_marketplace_monitor.listing import Listing
+from ai_marketplace_monitor.pacing import Pacer
+from ai_marketplace_monitor.utils import CacheType, CounterItem, MonitorConfig
+
+from .helpers import make_listing
+
+
+class FakeMarketplace:
+    def __init__(self: "FakeMarketplace") -> None:
+        self.name = "facebook"
+        self.running = 0
+        self.max_running = 0
+
+    async def search_async(
+        self: "FakeMarketplace", item_config: Any, page: Any
+    ) -> AsyncGenerator[Listing, None]:
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        try:
+            await asyncio.sleep(0.05)
+            if item_config.name == "broken":
+                raise RuntimeError("search failed")
+            for i in range(2):
+                yield make_listing(f"{item_config.name}{i}")
+        finally:
+            self.running -= 1
+
+
+@pytest.fixture
+def engine() -> Any:
+    engine = AsyncSearchEngine(max_concurrency=2)
+    context = MagicMock()
+    context.new_page = AsyncMock(return_value=MagicMock(close=AsyncMock()))
+    engine._get_context = AsyncMock(return_value=context)  # type: ignore[method-assign]
+    yield engine
+    engine.stop()
+
+
+def test_concurrent_search(engine: AsyncSearchEngine) -> None:
+    marketplace = FakeMarketplace()
+    items = [MagicMock() for _ in range(5)]
+    for idx, item in enumerate(items):
+        item.name = "broken" if idx == 3 else str(idx)
+
+    results: List[Any] = engine.search([(marketplace, item) for item in items])  # type: ignore[misc]
+
+    # results are returned in the order of the searches
+    assert len(results) == 5
+    assert [x.id for x in results[0]] == ["00", "01"]
+    assert [x.id for x in results[4]] == ["40", "41"]
+    # a failed search does not affect the others
+    assert isinstance(results[3], RuntimeError)
+    # no more than max_concurrency searches at the same time
+    assert marketplace.max_running == 2
+
+
+def test_max_concurrent_searches_option() -> None:
+    assert MonitorConfig(name="monitor", max_concurrent_searches=3).max_concurrent_searches == 3
+    with pytest.raises(ValueError):
+        MonitorConfig(name="monitor", max_concurrent_searches=0)
+    with pytest.raises(ValueError):
+        MonitorConfig(name="monitor", max_concurrent_searches="2")
+
+
+def test_facebook_search_async(
+    engine: AsyncSearchEngine, temp_cache: Cache, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr("ai_marketplace_monitor.utils.cache", temp_cache)
+    monkeypatch.setattr("ai_marketplace_monitor.listing.cache", temp_cache)
+    marketplace = FacebookMarketplace(name="facebook", browser=MagicMock(), logger=MagicMock())
+    marketplace.configure(
+        FacebookMarketplaceConfig(
+            name="facebook", search_city=["houston"], capture_graphql=True, search_pages=2
+        )
+    )
+    marketplace.pacer = Pacer(sleep=lambda x: None)
+    monkeypatch.setattr(marketplace.pacer, "wait_async", AsyncMock(return_value=0.0))
+    item_config = FacebookItemConfig(name="bike", search_phrases=["bike"], antikeywords=["broken"])
+    cards = [
+        {"href": f"/marketplace/item/{idx}/", "price": "$10", "title": title, "location": ""}
+        for idx, title in enumerate(["bike", "broken bike", "bike", "bike"])
+    ]
+
+    async def evaluate(script: str, arg: Any = None) -> Any:
+        if script == _SEARCH_RESULT_SCRIPT:
+            # two more cards are loaded after scrolling
+            return cards[: 4 if page.wait_for_function.await_count else 2]
+        return []
+
+    page = MagicMock(url="https://www.facebook.com/marketplace/houston/search")
+    page.goto = AsyncMock()
+    page.evaluate = AsyncMock(side_effect=evaluate)
+    page.wait_for_function = AsyncMock()
+    loaded: List[str] = []
+
+    async def get_listing_details_async(page: Any, post_url: str, paced: bool = True) -> Listing:
+        loaded.append(post_url)
+        listing = make_listing(post_url.rstrip("/").rsplit("/", 1)[-1])
+        listing.title = "bike"
+        return listing
+
+    monkeypatch.setattr(marketplace, "get_listing_details_async", get_listing_details_async)
+
+    async def search() -> List[Listing]:
+        with marketplace.search_cycle():
+            return [x async for x in marketplace.search_async(item_config, page)]
+
+    results = engine.run(search())
+    # search results are read from the captured payloads and two pages of cards
+    assert [x.id for x in results] == ["0", "2", "3"]
+    assert page.wait_for_function.await_count == 1
+    assert page.on.call_args[0][0] == "response"
+    # excluded listings are not loaded, as in the sync search
+    assert loaded == [f"https://www.facebook.com/marketplace/item/{idx}/" for idx in (0, 2, 3)]
+    assert (
+        temp_cache.get((CacheType.COUNTERS.value, CounterItem.EXCLUDED_LISTING.value, "bike")) == 1
+    )
+
+
+def test_get_listings_details_async(
+    engine: AsyncSearchEngine, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    facebook_marketplace = FacebookMarketplace(
+        name="facebook", browser=MagicMock(), logger=MagicMock()
+    )
+    facebook_marketplace.configure(
+        FacebookMarketplaceConfig(name="facebook", detail_concurrency=3)
+    )
+    facebook_marketplace.pacer = Pacer(sleep=lambda x: None)
+    monkeypatch.setattr(facebook_marketplace.pacer, "wait_async", AsyncMock(return_value=0.0))
+    listings = [make_listing(str(i)) for i in range(4)]
+    monkeypatch.setattr(
+        facebook_marketplace,
+        "get_cached_listing_details",
+        lambda post_url, price, title, revalidation=None: (
+            listings[1] if post_url == listings[1].post_url else None
+        ),
+    )
+    pages: List[MagicMock] = []
+
+    def new_page() -> MagicMock:
+        page = MagicMock(context=context, close=AsyncMock())
+        pages.append(page)
+        return page
+
+    context = MagicMock()
+    context.new_page = AsyncMock(side_effect=new_page)
+    loaded: List[Tuple[MagicMock, str]] = []
+
+    async def get_listing_details_async(
+        page: MagicMock, post_url: str, paced: bool = True
+    ) -> Listing:
+        assert not paced
+        loaded.append((page, post_url))
+        if post_url == listings[2].post_url:
+            raise ValueError("bad page")
+        return next(x for x in listings if x.post_url == post_url)
+
+    monkeypatch.setattr(
+        facebook_marketplace, "get_listing_details_async", get_listing_details_async
+    )
+    item_config = FacebookItemConfig(name="test_item", search_phrases=["test"])
+
+    async def get_details() -> List[Any]:
+        details = await facebook_marketplace.get_listings_details_async(
+            new_page(), listings, item_config
+        )
+        return list(details)
+
+    results = engine.run(get_details())
+    assert results[:2] == [(listings[0], False), (listings[1], True)]
+    assert isinstance(results[2], ValueError)
+    assert results[3] == (listings[3], False)
+    # the three listings that are not cached are loaded at the same time
+    assert [x[1] for x in loaded] == [listings[i].post_url for i in (0, 2, 3)]
+    assert {id(x[0]) for x in loaded} == {id(x) for x in pages}
+    # extra pages are closed after loading
+    assert [x.close.await_count for x in pages] == [0, 1, 1]
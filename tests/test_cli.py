@@ -273,6 +273,23 @@ def test_config(config_file: Callable, config_content: str, acceptable: bool) ->
         "keywords": (list, type(None)),
         "language": (str, type(None)),
         "login_wait_time": (int, type(None)),
+        "detail_concurrency": (int, type(None)),
+        "request_interval": (int, type(None)),
+        "min_request_interval": (int, type(None)),
+        "max_request_interval": (int, type(None)),
+        "search_cache_ttl": (int, type(None)),
+        "navigation_timeout": (int, type(None)),
+        "navigation_retries": (int, type(None)),
+        "max_context_navigations": (int, type(None)),
+        "detail_fetcher": (str, type(None)),
+        "max_detail_fetches": (int, type(None)),
+        "details_max_age": (int, type(None)),
+        "details_early_refresh": (float, type(None)),
+        "max_detail_refreshes": (int, type(None)),
+        "max_context_memory": (int, type(None)),
+        "parser": (str, type(None)),
+        "search_pages": (int, type(None)),
+        "capture_graphql": (bool, type(None)),
         "marketplace": (str, type(None)),
         "max_price": (str, type(None)),
         "max_search_interval": (int, type(None)),
@@ -0,0 +1,143 @@
+from pathlib import Path
+from typing import Any, List
+from unittest.mock import MagicMock
+
+import pytest
+from diskcache import Cache  # type: ignore
+
+import ai_marketplace_monitor.facebook
+from ai_marketplace_monitor.facebook import FacebookMarketplace, FacebookMarketplaceConfig
+from ai_marketplace_monitor.marketplace import get_context_stats
+from ai_marketplace_monitor.pacing import Pacer
+from ai_marketplace_monitor.utils import CacheType, CounterItem, MonitorConfig
+
+
+def make_context(heap_size: int) -> MagicMock:
+    context = MagicMock()
+    page = context.new_page.return_value
+    page.context = context
+    page.url = "https://www.facebook.com/marketplace/"
+    context.storage_state.return_value = {"cookies": [], "origins": []}
+    session = context.new_cdp_session.return_value
+    session.send.return_value = {
+        "metrics": [
+            {"name": "JSHeapUsedSize", "value": heap_size // 2},
+            {"name": "JSHeapTotalSize", "value": heap_size},
+        ]
+    }
+    return context
+
+
+@pytest.fixture
+def facebook_marketplace(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path, temp_cache: Cache
+) -> FacebookMarketplace:
+    monkeypatch.setattr(ai_marketplace_monitor.facebook, "amm_home", tmp_path)
+    monkeypatch.setattr("ai_marketplace_monitor.utils.cache", temp_cache)
+    monkeypatch.setattr("ai_marketplace_monitor.marketplace.cache", temp_cache)
+    marketplace = FacebookMarketplace(name="facebook", browser=MagicMock(), logger=MagicMock())
+    marketplace.configure(FacebookMarketplaceConfig(name="facebook"))
+    marketplace.pacer = Pacer(sleep=lambda x: None)
+    return marketplace
+
+
+def test_context_config() -> None:
+    config = FacebookMarketplaceConfig(
+        name="facebook", max_context_navigations=200, max_context_memory=512
+    )
+    assert config.max_context_navigations == 200
+    with pytest.raises(ValueError, match="max_context_navigations"):
+        FacebookMarketplaceConfig(name="facebook", max_context_navigations=-1)
+    with pytest.raises(ValueError, match="max_context_memory"):
+        FacebookMarketplaceConfig(name="facebook", max_context_memory="1GB")
+
+
+def test_recycle_after_navigations(
+    facebook_marketplace: FacebookMarketplace, temp_cache: Cache
+) -> None:
+    contexts: List[Any] = []
+
+    def new_context(**kwargs: Any) -> MagicMock:
+        contexts.append(make_context(10 * 1024**2))
+        return contexts[-1]
+
+    facebook_marketplace.browser.new_context.side_effect = new_context  # type: ignore[union-attr]
+    facebook_marketplace.config.max_context_navigations = 3
+    facebook_marketplace.create_page()
+    for idx in range(3):
+        facebook_marketplace.recycle_context_if_needed()
+        facebook_marketplace.goto_url(f"https://www.facebook.com/marketplace/item/{idx}/")
+    assert facebook_marketplace.context_navigations == 3
+    assert len(contexts) == 1
+
+    facebook_marketplace.recycle_context_if_needed()
+    assert len(contexts) == 2
+    contexts[0].close.assert_called_once()
+    # the session is saved and restored in the new context
+    contexts[0].storage_state.assert_called_once_with()
+    assert facebook_marketplace.storage_state_path.exists()
+    assert facebook_marketplace.page is contexts[1].new_page.return_value
+    assert facebook_marketplace.context_navigations == 0
+    assert (
+        temp_cache.get((CacheType.COUNTERS.value, CounterItem.CONTEXT_RECYCLED.value, "facebook"))
+        == 1
+    )
+
+
+def test_recycle_keeps_proxy(
+    facebook_marketplace: FacebookMarketplace, temp_cache: Cache, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr("ai_marketplace_monitor.proxy.cache", temp_cache)
+    monitor_config = MonitorConfig(
+        name="monitor", proxy_server=["http://a:8080", "http://b:8080", "http://c:8080"]
+    )
+    facebook_marketplace.configure(
+        FacebookMarketplaceConfig(name="facebook", monitor_config=monitor_config)
+    )
+    servers: List[str] = []
+
+    def new_context(proxy: dict, **kwargs: Any) -> MagicMock:
+        servers.append(proxy["server"])
+        return make_context(10 * 1024**2)
+
+    facebook_marketplace.browser.new_context.side_effect = new_context  # type: ignore[union-attr]
+    facebook_marketplace.create_page()
+    for _ in range(5):
+        facebook_marketplace.recycle_context()
+    # the restored session keeps its network identity
+    assert len(servers) == 6
+    assert set(servers) == {facebook_marketplace.proxy_server}
+
+
+def test_recycle_on_memory(facebook_marketplace: FacebookMarketplace, temp_cache: Cache) -> None:
+    contexts = [make_context(600 * 1024**2), make_context(50 * 1024**2)]
+    facebook_marketplace.browser.new_context.side_effect = contexts  # type: ignore[union-attr]
+    facebook_marketplace.create_page()
+
+    # no memory limit by default
+    facebook_marketplace.recycle_context_if_needed()
+    assert facebook_marketplace.context_memory == 600 * 1024**2
+    assert facebook_marketplace.page is contexts[0].new_page.return_value
+
+    facebook_marketplace.config.max_context_memory = 512
+    facebook_marketplace.recycle_context_if_needed()
+    assert facebook_marketplace.page is contexts[1].new_page.return_value
+
+    facebook_marketplace.recycle_context_if_needed()
+    stats = get_context_stats(temp_cache)
+    assert len(stats) == 1
+    assert stats[0]["marketplace"] == "facebook"
+    assert stats[0]["memory"] == 50 * 1024**2
+    assert stats[0]["navigations"] == 0
+
+
+def test_memory_not_available(facebook_marketplace: FacebookMarketplace) -> None:
+    context = make_context(0)
+    # CDP sessions are only supported by chromium
+    context.new_cdp_session.side_effect = RuntimeError("not supported")
+    facebook_marketplace.browser.new_context.return_value = context  # type: ignore[union-attr]
+    facebook_marketplace.config.max_context_memory = 512
+    facebook_marketplace.create_page()
+    facebook_marketplace.recycle_context_if_needed()
+    assert facebook_marketplace.context_memory is None
+    context.close.assert_not_called()
@@ -54,6 +54,7 @@ def test_search_page(
             "Houston, TX",
         ),
         ("auto_with_description_listing.html", "€6,695", "Abdel Abdel", "Bergen op Zoom, NB"),
+        ("flex_listing.html", "$350", "Jane Doe", "Houston, TX"),
     ],
 )
 def test_listing_page(
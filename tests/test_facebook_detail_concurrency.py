@@ -0,0 +1,99 @@
+from typing import List
+from unittest.mock import MagicMock
+
+import pytest
+
+from ai_marketplace_monitor.facebook import FacebookItemConfig, FacebookMarketplace
+from ai_marketplace_monitor.pacing import Pacer
+
+from .helpers import make_listing
+
+
+@pytest.fixture
+def facebook_marketplace() -> FacebookMarketplace:
+    """Create a Facebook marketplace instance with a mocked page and context."""
+    marketplace = FacebookMarketplace(name="facebook", browser=MagicMock(), logger=MagicMock())
+    marketplace.pacer = Pacer(sleep=lambda x: None)
+    marketplace.config = MagicMock()
+    marketplace.config.detail_concurrency = 3
+
+    calls: List[str] = []
+    context = MagicMock()
+
+    def new_page() -> MagicMock:
+        page = MagicMock()
+        page.context = context
+        page.is_closed.return_value = False
+        page.goto.side_effect = lambda url, **kwargs: calls.append(f"goto {url}")
+        page.wait_for_load_state.side_effect = lambda state, **kwargs: calls.append("wait")
+        return page
+
+    context.new_page.side_effect = new_page
+    marketplace.page = new_page()
+    marketplace.calls = calls  # type: ignore[attr-defined]
+    return marketplace
+
+
+def test_visit_urls_loads_pages_concurrently(facebook_marketplace: FacebookMarketplace) -> None:
+    urls = [f"url{i}" for i in range(5)]
+    results = list(facebook_marketplace.visit_urls(urls, lambda page, url: url.upper()))
+
+    # results are returned in order
+    assert results == [x.upper() for x in urls]
+    # navigation to all pages of a batch starts before waiting for any of them
+    assert facebook_marketplace.calls == [  # type: ignore[attr-defined]
+        "goto url0",
+        "goto url1",
+        "goto url2",
+        "wait",
+        "wait",
+        "wait",
+        "goto url3",
+        "goto url4",
+        "wait",
+        "wait",
+    ]
+    assert len(facebook_marketplace.detail_pages) == 2
+
+
+def test_visit_urls_yields_errors(facebook_marketplace: FacebookMarketplace) -> None:
+    def func(page: MagicMock, url: str) -> str:
+        if url == "bad":
+            raise ValueError("bad page")
+        return url
+
+    results = list(facebook_marketplace.visit_urls(["a", "bad", "c"], func))
+    assert results[0] == "a"
+    assert isinstance(results[1], ValueError)
+    assert results[2] == "c"
+
+
+def test_get_listings_details_in_order(
+    facebook_marketplace: FacebookMarketplace, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    listings = [make_listing(i) for i in range(4)]
+    # listing 1 is cached and should not be fetched
+    monkeypatch.setattr(
+        facebook_marketplace,
+        "get_cached_listing_details",
+        lambda post_url, price, title, revalidation=None: (
+            listings[1] if post_url == listings[1].post_url else None
+        ),
+    )
+    monkeypatch.setattr(
+        facebook_marketplace,
+        "parse_listing_page",
+        lambda page, post_url: next(x for x in listings if x.post_url == post_url),
+    )
+    item_config = FacebookItemConfig(name="test_item", search_phrases=["test"])
+
+    results = list(facebook_marketplace.get_listings_details(listings, item_config))
+    assert results == [
+        (listings[0], False),
+        (listings[1], True),
+        (listings[2], False),
+        (listings[3], False),
+    ]
+    assert [x for x in facebook_marketplace.calls if x.startswith("goto")] == [  # type: ignore[attr-defined]
+        f"goto {listings[i].post_url}" for i in (0, 2, 3)
+    ]
@@ -1,3 +1,4 @@
+from dataclasses import asdict
 from unittest.mock import MagicMock
 
 import pytest
@@ -191,3 +192,32 @@ def test_antikeyword_filtering_with_empty_description(
     assert (
         not result
     ), "Should reject listing when antikeywords found in title, even with empty description"
+
+
+def test_normalized_text_updated_with_details(
+    facebook_marketplace: FacebookMarketplace, keyword_item_config: FacebookItemConfig
+) -> None:
+    """Test that normalized text is reused until the listing details are updated."""
+    listing = Listing(
+        marketplace="facebook",
+        name="test_item",
+        id="123456",
+        title="EMTB  for Sale",
+        image="",
+        price="$2,800",
+        post_url="/marketplace/item/123456/",
+        location="Roanoke, VA",
+        seller="",
+        condition="used",
+        description="",
+    )
+    text = listing.normalized("title", "description")
+    assert text == "emtb for sale "
+    assert listing.normalized("title", "description") is text
+    assert not facebook_marketplace.check_listing(listing, keyword_item_config)
+
+    listing.description = "Bosch\nGen 4 motor"
+    assert listing.normalized("title", "description") == "emtb for sale bosch gen 4 motor"
+    assert facebook_marketplace.check_listing(listing, keyword_item_config)
+    # normalized text is not saved with the listing
+    assert "_normalized" not in asdict(listing)
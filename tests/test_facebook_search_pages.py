@@ -0,0 +1,90 @@
+from typing import List
+from unittest.mock import MagicMock
+
+import pytest
+
+from ai_marketplace_monitor.facebook import FacebookItemConfig, FacebookMarketplace
+from ai_marketplace_monitor.listing import Listing
+
+from .helpers import make_listing
+
+
+@pytest.fixture
+def facebook_marketplace(monkeypatch: pytest.MonkeyPatch) -> FacebookMarketplace:
+    """Create a marketplace whose search page shows 3 more listings after each scroll."""
+    marketplace = FacebookMarketplace(name="facebook", browser=MagicMock(), logger=MagicMock())
+    marketplace.config = MagicMock()
+    marketplace.config.capture_graphql = False
+    marketplace.page = MagicMock()
+    marketplace.scrolls = 0  # type: ignore[attr-defined]
+
+    def scroll(count: int) -> bool:
+        marketplace.scrolls += 1  # type: ignore[attr-defined]
+        return True
+
+    monkeypatch.setattr(marketplace, "goto_url", lambda url, on_new_page=None: None)
+    monkeypatch.setattr(marketplace, "scroll_search_results", scroll)
+    monkeypatch.setattr(
+        marketplace,
+        "read_search_results",
+        lambda capture=None: [
+            make_listing(i)
+            for i in range(3 * (marketplace.scrolls + 1))  # type: ignore[attr-defined]
+        ],
+    )
+    return marketplace
+
+
+def set_cached(monkeypatch: pytest.MonkeyPatch, ids: List[int]) -> None:
+    monkeypatch.setattr(
+        Listing,
+        "from_cache",
+        classmethod(
+            lambda cls, post_url: (
+                make_listing(0) if int(post_url.rstrip("/").split("/")[-1]) in ids else None
+            )
+        ),
+    )
+
+
+def test_single_page(
+    facebook_marketplace: FacebookMarketplace, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    set_cached(monkeypatch, [])
+    listings = facebook_marketplace.get_search_results("url")
+    assert [x.id for x in listings] == ["0", "1", "2"]
+    assert facebook_marketplace.scrolls == 0  # type: ignore[attr-defined]
+
+
+def test_page_cap(
+    facebook_marketplace: FacebookMarketplace, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    set_cached(monkeypatch, [])
+    listings = facebook_marketplace.get_search_results("url", max_pages=3)
+    assert [x.id for x in listings] == [str(i) for i in range(9)]
+    assert facebook_marketplace.scrolls == 2  # type: ignore[attr-defined]
+
+
+def test_stop_on_cached_batch(
+    facebook_marketplace: FacebookMarketplace, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    # the second batch (3, 4, 5) has been seen before
+    set_cached(monkeypatch, [3, 4, 5, 6])
+    listings = facebook_marketplace.get_search_results("url", max_pages=10)
+    assert [x.id for x in listings] == [str(i) for i in range(6)]
+    assert facebook_marketplace.scrolls == 1  # type: ignore[attr-defined]
+
+
+def test_stop_without_new_listing(
+    facebook_marketplace: FacebookMarketplace, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    set_cached(monkeypatch, [])
+    monkeypatch.setattr(facebook_marketplace, "scroll_search_results", lambda count: False)
+    listings = facebook_marketplace.get_search_results("url", max_pages=10)
+    assert len(listings) == 3
+
+
+def test_search_pages_option() -> None:
+    assert FacebookItemConfig(name="item", search_phrases=["a"], search_pages=3).search_pages == 3
+    with pytest.raises(ValueError, match="search_pages"):
+        FacebookItemConfig(name="item", search_phrases=["a"], search_pages=0)
@@ -0,0 +1,144 @@
+from functools import partial
+from unittest.mock import MagicMock
+
+import pytest
+from diskcache import Cache  # type: ignore
+
+from ai_marketplace_monitor.facebook import (
+    FacebookItemConfig,
+    FacebookMarketplace,
+    FacebookMarketplaceConfig,
+)
+from ai_marketplace_monitor.filtering import ExclusionReason, ListingFilter
+from ai_marketplace_monitor.utils import CacheType, CounterItem, extract_price
+
+from .helpers import make_listing
+
+
+def test_filter_listings() -> None:
+    listing_filter = ListingFilter(
+        antikeywords=["broken"],
+        keywords=["trek"],
+        seller_locations=["houston", "katy"],
+        exclude_sellers=["spammer"],
+    )
+    houston = partial(make_listing, location="Houston, TX")
+    listings = [
+        houston(0, "Trek bike"),
+        houston(1, "Broken trek bike"),
+        houston(2, "Road bike", description="A trek bike"),
+        make_listing(3, "Trek bike", location="Austin, TX"),
+        houston(4, "Trek bike", seller="Spammer Inc"),
+        houston(5, "Road bike"),
+    ]
+    result = listing_filter.filter(listings)
+    assert result.keep == [True, False, True, False, False, False]
+    assert result.reasons == [
+        None,
+        ExclusionReason.ANTIKEYWORDS,
+        None,
+        ExclusionReason.LOCATION,
+        ExclusionReason.SELLER,
+        ExclusionReason.KEYWORDS,
+    ]
+    assert [x.id for x in result.kept(listings)] == ["0", "2"]
+    assert result.summary() == {
+        ExclusionReason.ANTIKEYWORDS: 1,
+        ExclusionReason.LOCATION: 1,
+        ExclusionReason.SELLER: 1,
+        ExclusionReason.KEYWORDS: 1,
+    }
+    # keywords can appear in the description that is not available yet
+    assert listing_filter.filter(listings, description_available=False).keep[-1]
+
+
+def test_select_new_listings(temp_cache: Cache, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr("ai_marketplace_monitor.utils.cache", temp_cache)
+    logger = MagicMock()
+    marketplace = FacebookMarketplace(name="facebook", browser=MagicMock(), logger=logger)
+    marketplace.configure(FacebookMarketplaceConfig(name="facebook", exclude_sellers=["spammer"]))
+    item = FacebookItemConfig(name="bike", search_phrases=["bike"], antikeywords=["broken"])
+    listings = [
+        make_listing(0, "Bike"),
+        make_listing(1, "Broken bike"),
+        make_listing(2, "Broken bike for parts"),
+        make_listing(3, "Bike", seller="spammer"),
+    ]
+    found = {listings[0].post_url: True}
+    assert marketplace.select_new_listings(listings, item, found) == []
+    assert len(found) == 4
+    # exclusions are reported once for all listings of the search
+    assert logger.info.call_count == 1
+    assert "3 of 3 listings" in logger.info.call_args[0][0]
+
+    def count(counter_item: CounterItem) -> int:
+        return temp_cache.get((CacheType.COUNTERS.value, counter_item.value, "bike"))
+
+    assert count(CounterItem.LISTING_EXAMINED) == 3
+    assert count(CounterItem.EXCLUDED_LISTING) == 3
+
+
+@pytest.mark.parametrize(
+    "price,keep",
+    [
+        ("$499", False),
+        ("$500", True),
+        ("$2,000", True),
+        ("$2,001", False),
+        ("CA$2,800", True),
+        ("CA$2,801", False),
+        ("€1,900", False),
+        ("€1.234", True),
+        ("1.234 €", True),
+        ("1.234,50 €", True),
+        ("12,50 €", False),
+        ("R$ 2.500", True),
+        ("1 234 zł", True),
+        ("1\u00a0234 zł", True),
+        # ambiguous amounts are kept
+        ("€1.234.5", True),
+        ("Free", True),
+        ("**unspecified**", True),
+    ],
+)
+def test_price_range(price: str, keep: bool, monkeypatch: pytest.MonkeyPatch) -> None:
+    rates = {"USD": 1.0, "CAD": 1.4, "EUR": 0.9, "BRL": 5.0, "PLN": 4.0}
+    converter = MagicMock()
+    converter.convert.side_effect = (
+        lambda amount, cur, currency: amount / rates[cur] * rates[currency]
+    )
+    monkeypatch.setattr("ai_marketplace_monitor.filtering.currency_converter", lambda: converter)
+    listing_filter = ListingFilter(min_price="500", max_price="2000 USD", currencies=["USD"])
+    # card prices are normalized by extract_price
+    listing = make_listing(0, "bike", price=extract_price(price))
+    assert listing_filter.in_price_range(listing) == keep
+
+
+def test_price_in_search_currency(monkeypatch: pytest.MonkeyPatch) -> None:
+    converter = MagicMock()
+    converter.convert.side_effect = lambda amount, cur, currency: amount * 1.4
+    monkeypatch.setattr("ai_marketplace_monitor.filtering.currency_converter", lambda: converter)
+    listing_filter = ListingFilter(max_price="1000 USD", currencies=["CAD", "CAD"])
+    listings = [make_listing(idx, "bike", price=f"${idx * 100}") for idx in (10, 14, 15)]
+    assert listing_filter.filter(listings).reasons == [None, None, ExclusionReason.PRICE]
+    # the price range is converted once
+    assert converter.convert.call_count == 1
+    # the currency of "$" is unknown if the cities use different dollar currencies
+    listing_filter = ListingFilter(max_price="1000 USD", currencies=["USD", "CAD"])
+    assert listing_filter.filter(listings).keep == [True, True, True]
+    assert not listing_filter.in_price_range(make_listing(0, "bike", price="CA$1,500"))
+
+
+def test_price_filter_before_details(temp_cache: Cache, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr("ai_marketplace_monitor.utils.cache", temp_cache)
+    marketplace = FacebookMarketplace(name="facebook", browser=MagicMock(), logger=MagicMock())
+    marketplace.configure(FacebookMarketplaceConfig(name="facebook", max_price="500"))
+    listings = [make_listing(0, "bike", price="$450"), make_listing(1, "bike", price="$900")]
+    item = FacebookItemConfig(name="bike", search_phrases=["bike"])
+    assert marketplace.select_new_listings(listings, item, {}) == listings[:1]
+    assert (
+        temp_cache.get((CacheType.COUNTERS.value, CounterItem.EXCLUDED_LISTING.value, "bike")) == 1
+    )
+    # free items have no price range
+    free = FacebookItemConfig(name="free", search_phrases=["bike"], category="free")
+    assert marketplace.select_new_listings(listings, free, {}) == listings
@@ -0,0 +1,133 @@
+import json
+from pathlib import Path
+from typing import Any, List
+from unittest.mock import MagicMock
+
+import pytest
+from diskcache import Cache  # type: ignore
+
+from ai_marketplace_monitor.facebook import FacebookMarketplace, FacebookMarketplaceConfig
+from ai_marketplace_monitor.graphql import (
+    listing_from_node,
+    merge_listings,
+    parse_search_payload,
+)
+from ai_marketplace_monitor.html_page import parse_html, parse_search_result_html
+from ai_marketplace_monitor.pacing import Pacer
+from ai_marketplace_monitor.utils import MonitorConfig
+
+TEST_DIR = Path(__file__).parent
+
+
+def embedded_payloads() -> list[str]:
+    root = parse_html((TEST_DIR / "search_result_1.html").read_text(encoding="utf-8"))
+    return [
+        "".join(x for x in script.nodes if isinstance(x, str))
+        for script in root.iter("script")
+        if script.get_attribute("type") == "application/json"
+    ]
+
+
+def test_embedded_payload_matches_search_cards() -> None:
+    captured = merge_listings(*(parse_search_payload(x) for x in embedded_payloads()))
+    cards = {
+        x.id: x
+        for x in parse_search_result_html(
+            (TEST_DIR / "search_result_1.html").read_text(encoding="utf-8")
+        )
+    }
+    assert len(captured) == 14
+    for listing in captured:
+        card = cards[listing.id]
+        assert listing.title == card.title
+        assert listing.price == card.price
+        assert listing.location == card.location
+        assert listing.image
+        assert listing.post_url == f"https://www.facebook.com/marketplace/item/{listing.id}/"
+    assert captured[0].price == "$200 | $300"
+
+
+def test_streamed_payload() -> None:
+    node = {
+        "id": "123",
+        "marketplace_listing_title": "Bike",
+        "listing_price": {"formatted_amount": "$50"},
+        "location": {"reverse_geocode": {"city": "Houston", "state": "TX"}},
+        "marketplace_listing_seller": {"name": "Jane"},
+    }
+    text = "for (;;);" + "\n".join(
+        [
+            json.dumps(
+                {
+                    "data": {
+                        "marketplace_search": {
+                            "feed_units": {"edges": [{"node": {"listing": node}}]}
+                        }
+                    }
+                }
+            ),
+            json.dumps({"label": "other", "data": {}}),
+        ]
+    )
+    listings = parse_search_payload(text)
+    assert len(listings) == 1
+    assert listings[0].price == "$50"
+    assert listings[0].location == "Houston, TX"
+    assert listings[0].seller == "Jane"
+
+
+def test_invalid_nodes() -> None:
+    assert listing_from_node({"id": "abc", "marketplace_listing_title": "x"}) is None
+    assert listing_from_node({"id": "1", "marketplace_listing_title": ""}) is None
+    assert listing_from_node({"id": "1", "marketplace_listing_title": "x", "location": 1}) is None
+    assert parse_search_payload("not json") == []
+
+
+def test_capture_graphql_option() -> None:
+    assert FacebookMarketplaceConfig(name="facebook", capture_graphql=True).capture_graphql
+
+
+def test_capture_follows_swapped_page(temp_cache: Cache, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr("ai_marketplace_monitor.utils.cache", temp_cache)
+    monkeypatch.setattr("ai_marketplace_monitor.proxy.cache", temp_cache)
+    monitor_config = MonitorConfig(name="monitor", proxy_server=["http://a:8080", "http://b:8080"])
+    marketplace = FacebookMarketplace(name="facebook", browser=MagicMock(), logger=MagicMock())
+    marketplace.configure(
+        FacebookMarketplaceConfig(
+            name="facebook",
+            monitor_config=monitor_config,
+            capture_graphql=True,
+            navigation_retries=5,
+        )
+    )
+    marketplace.pacer = Pacer(sleep=lambda x: None)
+    node = {"id": "123", "marketplace_listing_title": "Bike", "listing_price": {"amount": "50"}}
+    response = MagicMock(url="https://www.facebook.com/api/graphql/")
+    response.text.return_value = json.dumps({"data": {"listing": node}})
+    pages: List[Any] = []
+
+    def new_context(proxy: dict, **kwargs: Any) -> MagicMock:
+        context = MagicMock()
+        page = context.new_page.return_value
+        page.context = context
+        page.url = "https://www.facebook.com/marketplace/"
+        page.evaluate.return_value = []
+        if pages:
+            # the search page of the new proxy receives the search results
+            page.goto.side_effect = lambda url, **kwargs: [
+                x.args[1](response) for x in page.on.call_args_list if x.args[0] == "response"
+            ]
+        else:
+            page.goto.side_effect = TimeoutError("timeout")
+        pages.append(page)
+        return context
+
+    marketplace.browser.new_context.side_effect = new_context  # type: ignore[union-attr]
+    monkeypatch.setattr(marketplace, "read_search_results", lambda capture=None: capture.collect())
+    marketplace.create_page()
+
+    listings = marketplace.get_search_results("https://www.facebook.com/marketplace/search")
+    # the proxy is swapped in the middle of the search
+    assert len(pages) == 2
+    assert [x.id for x in listings] == ["123"]
+    pages[1].remove_listener.assert_called_once()
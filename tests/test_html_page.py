@@ -0,0 +1,98 @@
+from pathlib import Path
+
+import pytest
+
+from ai_marketplace_monitor.facebook import FacebookMarketplaceConfig
+from ai_marketplace_monitor.html_page import (
+    HtmlFlexItemPage,
+    HtmlRegularItemPage,
+    parse_html,
+    parse_listing_file,
+    parse_listing_html,
+    parse_search_result_html,
+)
+
+TEST_DIR = Path(__file__).parent
+
+
+def test_parse_html() -> None:
+    root = parse_html("<div><p>a<br>b</p><img src='x.jpg'><span>c</span></div>")
+    div = root.find("div")
+    assert div is not None
+    assert [x.tag for x in div.children] == ["p", "img", "span"]
+    assert div.text_content() == "abc"
+    img = div.find("img")
+    assert img is not None and img.get_attribute("src") == "x.jpg"
+    assert img.next_sibling is not None and img.next_sibling.tag == "span"
+
+
+def test_search_page() -> None:
+    html = (TEST_DIR / "search_result_1.html").read_text(encoding="utf-8")
+    listings = parse_search_result_html(html)
+
+    assert len(listings) == 21
+    for listing in listings:
+        assert listing.marketplace == "facebook"
+        assert listing.id.isnumeric(), f"wrong id {listing.id}"
+        assert listing.title, "No title is found"
+        assert listing.image, "No image is found"
+        assert listing.post_url.startswith("https://www.facebook.com/marketplace/item/")
+        assert listing.price, "No price is found"
+    assert listings[0].title == "DJI Mavic Mini"
+    assert listings[0].location == "Houston, TX"
+    assert listings[10].location == ""
+
+
+def test_no_search_results() -> None:
+    assert parse_search_result_html("<div><span>Browse Marketplace</span></div>") == []
+
+
+@pytest.mark.parametrize(
+    "filename,price,seller,location",
+    [
+        ("regular_listing.html", "$10", "Austin Ewing", "MS"),
+        ("rental_listing.html", "$150", "Perry Burton", "Houston, TX"),
+        (
+            "auto_with_about_and_description_listing.html",
+            "**unspecified**",
+            "Lily Ortiz",
+            "Houston, TX",
+        ),
+        ("auto_with_description_listing.html", "€6,695", "Abdel Abdel", "Bergen op Zoom, NB"),
+        ("flex_listing.html", "$350", "Jane Doe", "Houston, TX"),
+    ],
+)
+def test_listing_page(filename: str, price: str, seller: str, location: str) -> None:
+    post_url = "https://www.facebook.com/marketplace/item/1234567890/?ref=search"
+    listing = parse_listing_file(TEST_DIR / filename, post_url)
+
+    assert listing is not None
+    assert listing.id == "1234567890"
+    assert listing.title
+    assert listing.image
+    assert listing.description
+    assert listing.price == price
+    assert listing.seller == seller
+    assert listing.location == location
+
+
+def test_flex_listing_page() -> None:
+    root = parse_html((TEST_DIR / "flex_listing.html").read_text(encoding="utf-8"))
+    assert not HtmlRegularItemPage(root).verify_layout()
+    assert HtmlFlexItemPage(root).verify_layout()
+
+    listing = parse_listing_file(TEST_DIR / "flex_listing.html", "x")
+    assert listing is not None
+    assert listing.condition == "Used - Good"
+    # the text of the "See more" button is not part of the description
+    assert listing.description == "Size M frame, new tires and brake pads. Comes with a pump."
+
+
+def test_unknown_listing_page() -> None:
+    assert parse_listing_html("<html><body><h1>Oops</h1></body></html>", "x") is None
+
+
+def test_parser_option() -> None:
+    assert FacebookMarketplaceConfig(name="facebook", parser="html").parser == "html"
+    with pytest.raises(ValueError, match="parser"):
+        FacebookMarketplaceConfig(name="facebook", parser="lxml")
@@ -0,0 +1,61 @@
+from unittest.mock import MagicMock
+
+from ai_marketplace_monitor.facebook import (
+    _listing_from_script_result,
+    parse_listing,
+    parse_listing_by_script,
+)
+
+POST_URL = "https://www.facebook.com/marketplace/item/1234567890/?ref=search"
+
+SCRIPT_RESULT = {
+    "layout": "regular",
+    "title": "Trek Marlin 5",
+    "price": "$350",
+    "image": "https://scontent.xx.fbcdn.net/bike.jpg",
+    "seller": "Jane Doe",
+    "description": "Size M frame, new tires.",
+    "condition": "Used - Good",
+    "location": "Houston, TX",
+}
+
+
+def see_more_calls(page: MagicMock) -> int:
+    return sum("See more" in str(x) for x in page.locator.call_args_list)
+
+
+def test_listing_from_script_result() -> None:
+    page = MagicMock()
+    page.evaluate.return_value = SCRIPT_RESULT
+    listing = parse_listing_by_script(page, POST_URL)
+
+    assert listing is not None
+    assert page.evaluate.call_count == 1
+    assert listing.id == "1234567890"
+    assert listing.title == "Trek Marlin 5"
+    assert listing.price == "$350"
+    assert listing.seller == "Jane Doe"
+    assert listing.condition == "Used - Good"
+    assert listing.location == "Houston, TX"
+    assert listing.post_url == POST_URL
+    # no layout matches
+    assert _listing_from_script_result(None, POST_URL) is None
+
+
+def test_script_failure() -> None:
+    page = MagicMock()
+    page.evaluate.side_effect = RuntimeError("Execution context was destroyed")
+    assert parse_listing_by_script(page, POST_URL) is None
+
+
+def test_expand_once() -> None:
+    page = MagicMock()
+    page.evaluate.side_effect = RuntimeError("Execution context was destroyed")
+    # the page is expanded once although all layouts are tried after the script fails
+    parse_listing(page, POST_URL)
+    assert see_more_calls(page) == 1
+
+    page = MagicMock()
+    page.evaluate.return_value = SCRIPT_RESULT
+    assert parse_listing(page, POST_URL, expand=False) is not None
+    assert see_more_calls(page) == 0
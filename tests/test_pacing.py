@@ -0,0 +1,132 @@
+from unittest.mock import MagicMock
+
+import pytest
+from diskcache import Cache  # type: ignore
+
+from ai_marketplace_monitor.facebook import FacebookMarketplace
+from ai_marketplace_monitor.marketplace import CircuitOpenError, MarketplaceConfig
+from ai_marketplace_monitor.pacing import CircuitBreaker, CircuitState, Pacer
+from ai_marketplace_monitor.utils import CacheType, CounterItem
+
+from .helpers import FakeClock
+
+
+@pytest.fixture
+def clock() -> FakeClock:
+    return FakeClock()
+
+
+def make_pacer(clock: FakeClock, **kwargs: float) -> Pacer:
+    return Pacer(clock=clock, sleep=clock.sleep, jitter=0, **kwargs)  # type: ignore[arg-type]
+
+
+def test_token_bucket(clock: FakeClock) -> None:
+    pacer = make_pacer(clock, interval=5)
+    # first request is free
+    assert pacer.wait() == 0
+    # second request waits for a full interval
+    assert pacer.wait() == 5
+    # time spent working counts towards the next interval
+    clock.now += 3
+    assert pacer.wait() == pytest.approx(2)
+    assert pacer.collect_waited() == 7
+    assert pacer.waited == pytest.approx(0)
+
+
+def test_jitter(clock: FakeClock) -> None:
+    pacer = Pacer(interval=10, jitter=0.5, clock=clock, sleep=clock.sleep)
+    pacer.wait()
+    for _ in range(20):
+        assert 5 <= pacer.wait() <= 15
+
+
+def test_adaptive_interval(clock: FakeClock) -> None:
+    pacer = make_pacer(clock, interval=10, min_interval=2, max_interval=30)
+    pacer.success(1)
+    assert pacer.interval == pytest.approx(9.5)
+    for _ in range(100):
+        pacer.success(1)
+    assert pacer.interval == 2
+    # slow load
+    pacer.success(20)
+    assert pacer.interval == 4
+    for _ in range(10):
+        pacer.backoff()
+    assert pacer.interval == 30
+    # saved tokens are dropped after backoff
+    assert pacer.wait() == 30
+
+
+def test_request_interval_config() -> None:
+    config = MarketplaceConfig(
+        name="facebook", request_interval="10s", min_request_interval=1, max_request_interval="1m"
+    )
+    assert config.request_interval == 10
+    assert config.max_request_interval == 60
+    with pytest.raises(ValueError, match="min_request_interval"):
+        MarketplaceConfig(name="facebook", min_request_interval=10, max_request_interval=5)
+    with pytest.raises(ValueError, match="request_interval"):
+        MarketplaceConfig(name="facebook", request_interval=-1)
+
+
+def test_concurrent_reservations(clock: FakeClock) -> None:
+    pacer = make_pacer(clock, interval=5)
+    # callers asking at the same time are spaced one interval apart
+    assert [pacer.reserve() for _ in range(4)] == [0, 5, 10, 15]
+
+
+def test_circuit_breaker(clock: FakeClock) -> None:
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=60, clock=clock)
+    assert not breaker.record_failure()
+    assert not breaker.record_failure()
+    assert breaker.state == CircuitState.CLOSED
+    # the third consecutive failure opens the circuit
+    assert breaker.record_failure()
+    assert not breaker.allow()
+    assert breaker.retry_after() == 60
+    clock.now += 60
+    assert breaker.state == CircuitState.HALF_OPEN
+    # a failed trial request opens the circuit again
+    assert breaker.record_failure()
+    assert breaker.state == CircuitState.OPEN
+    clock.now += 60
+    assert breaker.record_success()
+    assert breaker.state == CircuitState.CLOSED
+    assert breaker.failures == 0
+
+
+def test_navigation_config() -> None:
+    config = MarketplaceConfig(name="facebook", navigation_timeout="2m", navigation_retries=0)
+    assert config.navigation_timeout == 120
+    with pytest.raises(ValueError, match="navigation_retries"):
+        MarketplaceConfig(name="facebook", navigation_retries=-1)
+
+
+def test_bounded_navigation(temp_cache: Cache, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr("ai_marketplace_monitor.utils.cache", temp_cache)
+    marketplace = FacebookMarketplace(name="facebook", browser=MagicMock(), logger=MagicMock())
+    marketplace.pacer = Pacer(sleep=lambda x: None)
+    marketplace.config = MarketplaceConfig(
+        name="facebook", navigation_timeout=30, navigation_retries=1
+    )
+    marketplace.page = MagicMock()
+    marketplace.page.goto.side_effect = TimeoutError("timeout")
+
+    with pytest.raises(RuntimeError, match="after 2 attempts"):
+        marketplace.goto_url("https://www.facebook.com/marketplace/")
+    assert marketplace.page.goto.call_count == 2
+    assert marketplace.page.goto.call_args.kwargs == {
+        "timeout": 30000,
+        "wait_until": "domcontentloaded",
+    }
+    # the circuit opens after 5 consecutive failures, and navigation stops
+    with pytest.raises(RuntimeError):
+        marketplace.goto_url("https://www.facebook.com/marketplace/")
+    with pytest.raises(CircuitOpenError):
+        marketplace.goto_url("https://www.facebook.com/marketplace/")
+    assert marketplace.page.goto.call_count == 5
+    assert marketplace.circuit_breakers["direct"].state == CircuitState.OPEN
+    assert (
+        temp_cache.get((CacheType.COUNTERS.value, CounterItem.CIRCUIT_OPENED.value, "facebook"))
+        == 1
+    )
@@ -0,0 +1,175 @@
+from typing import List, Tuple
+from unittest.mock import MagicMock
+
+import pytest
+from diskcache import Cache  # type: ignore
+
+from ai_marketplace_monitor.facebook import FacebookMarketplace, FacebookMarketplaceConfig
+from ai_marketplace_monitor.pacing import Pacer
+from ai_marketplace_monitor.proxy import ProxyPool, ProxyStats, get_proxy_stats
+from ai_marketplace_monitor.utils import MonitorConfig
+
+from .helpers import FakeClock
+
+
+@pytest.fixture(autouse=True)
+def proxy_cache(temp_cache: Cache, monkeypatch: pytest.MonkeyPatch) -> Cache:
+    monkeypatch.setattr("ai_marketplace_monitor.utils.cache", temp_cache)
+    monkeypatch.setattr("ai_marketplace_monitor.proxy.cache", temp_cache)
+    return temp_cache
+
+
+def test_choose_by_score(monkeypatch: pytest.MonkeyPatch) -> None:
+    pool = ProxyPool(["http://good:8080", "http://bad:8080"])
+    for _ in range(20):
+        pool.record_success("http://good:8080", 1.0)
+    pool.stats["http://bad:8080"].requests = 20
+    pool.stats["http://bad:8080"].blocks = 19
+    good, bad = pool.stats["http://good:8080"], pool.stats["http://bad:8080"]
+    assert good.score > bad.score
+
+    calls: List[Tuple[List[str], List[float]]] = []
+
+    def choices(population: List[ProxyStats], weights: List[float]) -> List[ProxyStats]:
+        calls.append(([x.server for x in population], weights))
+        return [population[-1]]
+
+    monkeypatch.setattr("ai_marketplace_monitor.proxy.random.choices", choices)
+    assert pool.choose() == "http://bad:8080"
+    # servers are chosen with probability proportional to their score
+    assert calls == [(["http://good:8080", "http://bad:8080"], [good.score, bad.score])]
+    assert good.score > 3 * bad.score
+    assert pool.choose(exclude="http://good:8080") == "http://bad:8080"
+    assert calls[-1] == (["http://bad:8080"], [bad.score])
+
+
+def test_quarantine_with_backoff() -> None:
+    clock = FakeClock(1000.0)
+    pool = ProxyPool(
+        ["http://a:8080", "http://b:8080"], failure_threshold=2, quarantine=60, clock=clock
+    )
+    assert not pool.record_failure("http://a:8080")
+    assert pool.record_failure("http://a:8080")
+    assert not pool.is_available("http://a:8080")
+    assert all(pool.choose() == "http://b:8080" for _ in range(20))
+
+    clock.now += 60
+    assert pool.is_available("http://a:8080")
+    # failing again after release doubles the quarantine
+    pool.record_failure("http://a:8080")
+    pool.record_failure("http://a:8080", blocked=True)
+    assert pool.stats["http://a:8080"].quarantined_until == clock.now + 120
+
+    # when all servers are in quarantine, the one released first is used
+    pool.record_failure("http://b:8080")
+    pool.record_failure("http://b:8080")
+    assert pool.choose() == "http://b:8080"
+
+    # a success resets the backoff
+    clock.now += 120
+    pool.record_success("http://a:8080", 2.0)
+    assert pool.stats["http://a:8080"].quarantines == 0
+
+
+def test_keep_excluded_server_if_others_are_quarantined() -> None:
+    clock = FakeClock(1000.0)
+    pool = ProxyPool(["http://a", "http://b"], failure_threshold=1, clock=clock)
+    pool.record_failure("http://b")
+    assert pool.choose(exclude="http://a") == "http://a"
+    # unless the excluded server is in quarantine too
+    pool.record_failure("http://a")
+    assert pool.choose(exclude="http://a") == "http://b"
+
+
+def test_update_keeps_stats() -> None:
+    pool = ProxyPool(["http://a:8080", "http://b:8080"])
+    pool.record_success("http://a:8080", 1.0)
+    pool.update(["http://a:8080", "http://c:8080"])
+    assert sorted(pool.stats) == ["http://a:8080", "http://c:8080"]
+    assert pool.stats["http://a:8080"].requests == 1
+    # servers that are no longer configured are ignored
+    pool.record_success("http://b:8080", 1.0)
+    assert "http://b:8080" not in pool.stats
+
+
+def test_get_proxy_stats(proxy_cache: Cache) -> None:
+    pool = ProxyPool(["http://a:8080", "http://b:8080"])
+    pool.record_success("http://b:8080", 2.0)
+    pool.record_failure("http://a:8080", blocked=True)
+    stats = get_proxy_stats(proxy_cache)
+    assert [x["server"] for x in stats] == ["http://a:8080", "http://b:8080"]
+    assert stats[0]["block_rate"] == 1.0
+    assert stats[1]["latency"] == 2.0
+
+
+def test_merge_stats_of_processes(proxy_cache: Cache, monkeypatch: pytest.MonkeyPatch) -> None:
+    # pools of two worker processes
+    for pid, load_time in ((100, 1.0), (200, 3.0)):
+        monkeypatch.setattr("ai_marketplace_monitor.proxy.os.getpid", lambda pid=pid: pid)
+        pool = ProxyPool(["http://a:8080"])
+        pool.record_success("http://a:8080", load_time)
+        pool.record_failure("http://a:8080", blocked=pid == 200)
+
+    stats = get_proxy_stats(proxy_cache)
+    assert len(stats) == 1
+    # statistics of one process are not overwritten by the other
+    assert (stats[0]["requests"], stats[0]["failures"], stats[0]["blocks"]) == (4, 1, 1)
+    assert stats[0]["latency"] == pytest.approx((1.0 * 2 + 3.0 * 2) / 4)
+
+
+def test_marketplace_rotates_failing_proxy() -> None:
+    monitor_config = MonitorConfig(name="monitor", proxy_server=["http://a:8080", "http://b:8080"])
+    marketplace = FacebookMarketplace(name="facebook", browser=MagicMock(), logger=MagicMock())
+    marketplace.configure(
+        FacebookMarketplaceConfig(
+            name="facebook", monitor_config=monitor_config, navigation_retries=5
+        )
+    )
+    marketplace.pacer = Pacer(sleep=lambda x: None)
+    assert marketplace.proxy_pool is not None
+
+    servers: List[str] = []
+
+    def new_context(proxy: dict, **kwargs: object) -> MagicMock:
+        servers.append(proxy["server"])
+        context = MagicMock()
+        page = context.new_page.return_value
+        page.context = context
+        page.url = "https://www.facebook.com/marketplace/"
+        if len(servers) == 1:
+            page.goto.side_effect = TimeoutError("timeout")
+        return context
+
+    marketplace.browser.new_context.side_effect = new_context  # type: ignore[union-attr]
+    marketplace.create_page()
+    marketplace.goto_url("https://www.facebook.com/marketplace/houston/search?query=bike")
+
+    # the first proxy is put in quarantine after 3 failures and the other one is used
+    assert len(servers) == 2
+    assert servers[0] != servers[1]
+    assert marketplace.proxy_server == servers[1]
+    assert not marketplace.proxy_pool.is_available(servers[0])
+    assert marketplace.proxy_pool.stats[servers[1]].requests == 1
+
+
+def test_new_context_keeps_proxy() -> None:
+    monitor_config = MonitorConfig(name="monitor", proxy_server=["http://a:8080", "http://b:8080"])
+    marketplace = FacebookMarketplace(name="facebook", browser=MagicMock(), logger=MagicMock())
+    marketplace.configure(
+        FacebookMarketplaceConfig(name="facebook", monitor_config=monitor_config)
+    )
+    assert marketplace.proxy_pool is not None
+    marketplace.create_page()
+    server = marketplace.proxy_server
+    assert server is not None
+    # a healthy proxy is kept when the page is created again, without swapping proxy
+    for _ in range(10):
+        marketplace.page = None
+        marketplace.create_page()
+        assert marketplace.proxy_server == server
+    # another proxy is used if the proxy is in quarantine
+    for _ in range(3):
+        marketplace.proxy_pool.record_failure(server)
+    marketplace.page = None
+    marketplace.create_page()
+    assert marketplace.proxy_server != server
@@ -0,0 +1,161 @@
+from typing import Any, List
+from unittest.mock import MagicMock
+
+import pytest
+from diskcache import Cache  # type: ignore
+
+from ai_marketplace_monitor.facebook import (
+    FacebookItemConfig,
+    FacebookMarketplace,
+    FacebookMarketplaceConfig,
+)
+from ai_marketplace_monitor.listing import Listing
+from ai_marketplace_monitor.ranking import price_score, rank_listings, title_score
+from ai_marketplace_monitor.utils import parse_price
+
+from .helpers import make_listing
+
+
+@pytest.fixture
+def facebook_marketplace() -> FacebookMarketplace:
+    marketplace = FacebookMarketplace(name="facebook", browser=MagicMock(), logger=MagicMock())
+    marketplace.configure(FacebookMarketplaceConfig(name="facebook", search_city=["houston"]))
+    return marketplace
+
+
+@pytest.mark.parametrize(
+    "price,expected",
+    [
+        ("$10", (10.0, "$")),
+        ("€6,695", (6695.0, "€")),
+        ("CA$1,200 | $1,500", (1200.0, "CA$")),
+        ("$1,234.50", (1234.5, "$")),
+        ("€1.234", (1234.0, "€")),
+        ("1.234,50 €", (1234.5, "€")),
+        ("R$ 2.500", (2500.0, "R$")),
+        ("1 234 zł", (1234.0, "zł")),
+        ("1.234.5", None),
+        ("Free", None),
+        ("**unspecified**", None),
+    ],
+)
+def test_parse_price(price: str, expected: Any) -> None:
+    assert parse_price(price) == expected
+
+
+def test_title_and_price_scores() -> None:
+    config = FacebookMarketplaceConfig(name="facebook")
+    item = FacebookItemConfig(
+        name="bike",
+        search_phrases=["mountain bike"],
+        keywords=["trek"],
+        min_price="100",
+        max_price="500",
+    )
+    assert title_score(make_listing(1, "Mountain bike"), item) == 1.0
+    assert title_score(make_listing(1, "Road bike"), item) == 0.5
+    assert title_score(make_listing(1, "Trek road bike"), item) == 0.75
+
+    assert price_score(make_listing(1, price="$100"), item, config) == 1.0
+    assert price_score(make_listing(1, price="$400"), item, config) == 0.25
+    assert price_score(make_listing(1, price="$600"), item, config) == 0.0
+    # unknown price, or no price range
+    assert price_score(make_listing(1, price="Free"), item, config) == 0.5
+    assert (
+        price_score(make_listing(1), FacebookItemConfig(name="x", search_phrases=["x"]), config)
+        == 0.5
+    )
+
+
+def test_price_score_in_listing_currency(monkeypatch: pytest.MonkeyPatch) -> None:
+    converter = MagicMock()
+    converter.convert.side_effect = lambda amount, cur, currency: amount * 0.9
+    monkeypatch.setattr("ai_marketplace_monitor.filtering.currency_converter", lambda: converter)
+    config = FacebookMarketplaceConfig(name="facebook")
+    item = FacebookItemConfig(
+        name="bike",
+        search_phrases=["bike"],
+        search_city=["paris"],
+        currency="EUR",
+        max_price="1000 USD",
+    )
+    # 1000 USD is 900 EUR
+    assert price_score(make_listing(1, price="€450"), item, config) == 0.5
+    assert price_score(make_listing(1, price="€950"), item, config) == 0.0
+    # the currency of "$" is unknown in a search in euros
+    assert price_score(make_listing(1, price="$100"), item, config) == 0.5
+    # limits are converted once when listings are ranked
+    converter.convert.reset_mock()
+    listings = [make_listing(idx, price=f"€{idx * 100}") for idx in (2, 8, 4)]
+    assert [x.id for x in rank_listings(listings, item, config)] == ["2", "4", "8"]
+    assert converter.convert.call_count == 1
+
+
+def test_rank_listings() -> None:
+    config = FacebookMarketplaceConfig(name="facebook")
+    item = FacebookItemConfig(name="bike", search_phrases=["mountain bike"], max_price="500")
+    listings = [
+        make_listing(1, "Road bike", "$450"),
+        make_listing(2, "Mountain bike", "$200"),
+        make_listing(3, "Mountain bike", "$200"),
+    ]
+    ranked = rank_listings(listings, item, config)
+    # listings with the same score keep their order
+    assert [x.id for x in ranked] == ["2", "3", "1"]
+    # later search results rank lower
+    recency = {x.post_url: 1 - idx / 3 for idx, x in enumerate(listings)}
+    recency[listings[1].post_url] = 0
+    assert [x.id for x in rank_listings(listings, item, config, recency)] == ["3", "2", "1"]
+
+
+def test_max_detail_fetches(
+    facebook_marketplace: FacebookMarketplace, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    item = FacebookItemConfig(name="bike", search_phrases=["bike"], max_detail_fetches=2)
+    listings = [make_listing(idx, price=f"${idx}") for idx in range(5)]
+    cached = {listings[4].post_url}
+    monkeypatch.setattr(
+        facebook_marketplace,
+        "get_cached_listing_details",
+        lambda post_url, price=None, title=None, revalidation=None: (
+            MagicMock() if post_url in cached else None
+        ),
+    )
+    selected = facebook_marketplace.prioritize_listings(listings, item)
+    # cached listings do not count towards the limit
+    assert [x.id for x in selected] == ["0", "1", "4"]
+
+
+def test_search_fetches_best_listings_first(
+    facebook_marketplace: FacebookMarketplace,
+    temp_cache: Cache,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr("ai_marketplace_monitor.utils.cache", temp_cache)
+    results = {
+        "bike": [make_listing(1, price="$450"), make_listing(2, price="$100")],
+        "bicycle": [make_listing(2, price="$100"), make_listing(3, price="$150")],
+    }
+    monkeypatch.setattr(
+        facebook_marketplace,
+        "get_shared_search_results",
+        lambda url, max_pages=1: results["bicycle" if "bicycle" in url else "bike"],
+    )
+    fetched: List[str] = []
+
+    def get_listings_details(
+        listings: List[Listing], item_config: Any, revalidation: Any = None
+    ) -> Any:
+        for listing in listings:
+            fetched.append(listing.id)
+            yield listing, False
+
+    monkeypatch.setattr(facebook_marketplace, "get_listings_details", get_listings_details)
+    monkeypatch.setattr(facebook_marketplace, "recycle_context_if_needed", lambda: None)
+    facebook_marketplace.page = MagicMock()
+    item = FacebookItemConfig(name="bike", search_phrases=["bike", "bicycle"], max_price="500")
+
+    found = [x.id for x in facebook_marketplace.search(item)]
+    # details of listings of all searches are loaded once, cheaper listings first
+    assert fetched == ["2", "3", "1"]
+    assert found == fetched
@@ -0,0 +1,69 @@
+from unittest.mock import MagicMock
+
+import pytest
+from diskcache import Cache  # type: ignore
+
+from ai_marketplace_monitor.marketplace import ResourceBlocker
+from ai_marketplace_monitor.utils import CacheType, CounterItem, MonitorConfig
+
+
+def test_monitor_config() -> None:
+    config = MonitorConfig(name="monitor", block_resources="image", block_urls="*analytics*")
+    assert config.block_resources == ["image"]
+    assert config.block_urls == ["*analytics*"]
+
+    with pytest.raises(ValueError, match="block_resources"):
+        MonitorConfig(name="monitor", block_resources=["document"])
+    with pytest.raises(ValueError, match="block_urls"):
+        MonitorConfig(name="monitor", block_urls=[1])
+
+
+def test_from_config() -> None:
+    assert ResourceBlocker.from_config(None) is None
+    assert ResourceBlocker.from_config(MonitorConfig(name="monitor")) is None
+    assert ResourceBlocker.from_config(MonitorConfig(name="monitor", block_resources=["font"]))
+
+
+@pytest.mark.parametrize(
+    "resource_type,url,blocked",
+    [
+        ("image", "https://scontent.xx.fbcdn.net/v/image.jpg", True),
+        ("font", "https://static.xx.fbcdn.net/font.woff2", True),
+        ("document", "https://www.facebook.com/marketplace/item/1/", False),
+        ("script", "https://www.google-analytics.com/analytics.js", True),
+        ("script", "https://static.xx.fbcdn.net/rsrc.php/app.js", False),
+    ],
+)
+def test_should_block(resource_type: str, url: str, blocked: bool) -> None:
+    blocker = ResourceBlocker(["image", "font"], ["*google-analytics.com/*", "*/tr?*"])
+    assert blocker.should_block(resource_type, url) == blocked
+
+
+def test_handle_route_and_flush(temp_cache: Cache, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr("ai_marketplace_monitor.utils.cache", temp_cache)
+    blocker = ResourceBlocker(["image"])
+
+    for resource_type in ("image", "document", "image"):
+        route = MagicMock()
+        route.request.resource_type = resource_type
+        route.request.url = "https://www.facebook.com/"
+        blocker.handle_route(route)
+        if resource_type == "image":
+            route.abort.assert_called_once()
+        else:
+            route.fallback.assert_called_once()
+
+    response = MagicMock()
+    response.headers = {"content-length": "1000"}
+    blocker.handle_response(response)
+    response.headers = {}
+    blocker.handle_response(response)
+    assert blocker.blocked_requests == 2
+    assert blocker.downloaded_bytes == 1000
+
+    blocker.flush("facebook")
+    assert [
+        temp_cache.get((CacheType.COUNTERS.value, x.value, "facebook"))
+        for x in (CounterItem.BLOCKED_REQUEST, CounterItem.DOWNLOADED_BYTES)
+    ] == [2, 1000]
+    assert blocker.blocked_requests == 0 and blocker.downloaded_bytes == 0
@@ -0,0 +1,104 @@
+from dataclasses import asdict
+from unittest.mock import MagicMock
+
+import pytest
+from diskcache import Cache  # type: ignore
+
+from ai_marketplace_monitor.facebook import (
+    FacebookItemConfig,
+    FacebookMarketplace,
+    FacebookMarketplaceConfig,
+)
+from ai_marketplace_monitor.listing import Listing
+from ai_marketplace_monitor.revalidation import RevalidationPolicy
+from ai_marketplace_monitor.utils import CacheType, CounterItem
+
+from .helpers import FakeClock, make_listing
+
+DAY = 24 * 60 * 60
+
+
+def test_refresh_probability() -> None:
+    policy = RevalidationPolicy(max_age=10 * DAY, early_refresh=0.2)
+    assert policy.refresh_probability(5 * DAY) == 0
+    assert policy.refresh_probability(8 * DAY) == 0
+    assert policy.refresh_probability(9 * DAY) == pytest.approx(0.5)
+    assert policy.refresh_probability(10 * DAY) == 1
+    # details saved without time are refreshed
+    assert policy.refresh_probability(None) == 1
+
+
+def test_refresh_budget() -> None:
+    clock = FakeClock(100 * DAY)
+    policy = RevalidationPolicy(max_age=DAY, budget=2, clock=clock)
+    urls = [f"https://www.facebook.com/marketplace/item/{idx}/" for idx in range(4)]
+    assert [policy.should_refresh(url, 0) for url in urls] == [True, True, False, False]
+    # decisions are kept for the search
+    assert policy.should_refresh(urls[0] + "?ref=search", None)
+    assert not policy.should_refresh(urls[3], None)
+    assert policy.is_stale(0)
+
+
+def test_revalidation_config() -> None:
+    marketplace_config = FacebookMarketplaceConfig(
+        name="facebook", details_max_age="7d", max_detail_refreshes=5
+    )
+    assert marketplace_config.details_max_age == 7 * DAY
+    item_config = FacebookItemConfig(
+        name="item", search_phrases=["item"], details_early_refresh=0.5
+    )
+    policy = RevalidationPolicy.from_config(item_config, marketplace_config)
+    assert policy is not None
+    assert (policy.max_age, policy.early_refresh, policy.budget) == (7 * DAY, 0.5, 5)
+    assert (
+        RevalidationPolicy.from_config(item_config, FacebookMarketplaceConfig(name="facebook"))
+        is None
+    )
+    with pytest.raises(ValueError, match="details_early_refresh"):
+        FacebookItemConfig(name="item", search_phrases=["item"], details_early_refresh=2)
+
+
+def test_cached_listing_refreshed(temp_cache: Cache, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr("ai_marketplace_monitor.utils.cache", temp_cache)
+    monkeypatch.setattr("ai_marketplace_monitor.listing.cache", temp_cache)
+    marketplace = FacebookMarketplace(name="facebook", browser=MagicMock(), logger=MagicMock())
+    marketplace.configure(FacebookMarketplaceConfig(name="facebook"))
+    fresh, old, older = make_listing(1), make_listing(2), make_listing(3)
+    for listing in (fresh, old, older):
+        listing.to_cache(listing.post_url)
+    assert Listing.from_cache(fresh.post_url) == fresh
+    temp_cache.set(
+        (CacheType.LISTING_DETAILS.value, old.post_url), {**asdict(old), "cached_at": 0}
+    )
+    # details saved by older versions
+    temp_cache.set((CacheType.LISTING_DETAILS.value, older.post_url), asdict(older))
+
+    # details are reused forever without a policy
+    assert marketplace.get_cached_listing_details(old.post_url, old.price, old.title) == old
+
+    revalidation = RevalidationPolicy(max_age=DAY, budget=1)
+    # a concurrent search of another item has its own policy and refresh limit
+    other = RevalidationPolicy(max_age=DAY, budget=1)
+    assert (
+        marketplace.get_cached_listing_details(fresh.post_url, fresh.price, None, revalidation)
+        == fresh
+    )
+    assert (
+        marketplace.get_cached_listing_details(old.post_url, old.price, None, revalidation) is None
+    )
+    # the refresh limit is reached
+    assert (
+        marketplace.get_cached_listing_details(older.post_url, older.price, None, revalidation)
+        == older
+    )
+    assert marketplace.get_cached_listing_details(older.post_url, older.price, None, other) is None
+    # decisions are kept for the search
+    assert (
+        marketplace.get_cached_listing_details(old.post_url, old.price, None, revalidation) is None
+    )
+
+    def count(item: CounterItem) -> int:
+        return temp_cache.get((CacheType.COUNTERS.value, item.value, "facebook"))
+
+    assert count(CounterItem.LISTING_REFRESHED) == 2
+    assert count(CounterItem.STALE_LISTING_REUSED) == 1
@@ -0,0 +1,189 @@
+from typing import Any, List
+from unittest.mock import MagicMock
+
+import pytest
+from diskcache import Cache  # type: ignore
+
+from ai_marketplace_monitor.facebook import (
+    FacebookItemConfig,
+    FacebookMarketplace,
+    FacebookMarketplaceConfig,
+    normalize_search_url,
+)
+from ai_marketplace_monitor.listing import Listing
+from ai_marketplace_monitor.monitor import MarketplaceMonitor
+from ai_marketplace_monitor.utils import CacheType, CounterItem
+
+from .helpers import make_listing
+
+
+@pytest.fixture
+def facebook_marketplace() -> FacebookMarketplace:
+    marketplace = FacebookMarketplace(name="facebook", browser=MagicMock(), logger=MagicMock())
+    marketplace.configure(FacebookMarketplaceConfig(name="facebook", search_city=["houston"]))
+    return marketplace
+
+
+@pytest.fixture
+def monitor() -> MarketplaceMonitor:
+    # avoid starting playwright, which is not needed for planning searches
+    monitor = MarketplaceMonitor.__new__(MarketplaceMonitor)
+    monitor.logger = None
+    return monitor
+
+
+def test_normalize_search_url() -> None:
+    assert normalize_search_url(
+        "https://www.facebook.com/marketplace/houston/search?query=bike&radius=10&maxPrice=300"
+    ) == normalize_search_url(
+        "https://www.facebook.com/marketplace/houston/search/?maxPrice=300&query=bike&radius=10"
+    )
+
+
+def test_plan_searches(
+    monitor: MarketplaceMonitor, facebook_marketplace: FacebookMarketplace
+) -> None:
+    items = [
+        FacebookItemConfig(name="small", search_phrases=["bike", "small bike"]),
+        FacebookItemConfig(name="car", search_phrases=["car"]),
+        FacebookItemConfig(name="large", search_phrases=["large bike", "bike"]),
+        FacebookItemConfig(name="medium", search_phrases=["large bike"]),
+        # same search, but on a different schedule
+        FacebookItemConfig(name="hourly", search_phrases=["bike"], search_interval=3600),
+    ]
+    groups = monitor.plan_searches(
+        facebook_marketplace.config, facebook_marketplace, items  # type: ignore[arg-type]
+    )
+    assert [[x.name for x in group] for group in groups] == [
+        ["small", "large", "medium"],
+        ["car"],
+        ["hourly"],
+    ]
+    # planning does not count as a search
+    assert all(x.searched_count == 0 for x in items)
+
+
+def test_shared_search_results(
+    facebook_marketplace: FacebookMarketplace,
+    temp_cache: Cache,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr("ai_marketplace_monitor.utils.cache", temp_cache)
+    urls: List[str] = []
+
+    def get_search_results(url: str, max_pages: int = 1) -> List[Listing]:
+        urls.append(url)
+        return [make_listing(0), make_listing(1)]
+
+    monkeypatch.setattr(facebook_marketplace, "get_search_results", get_search_results)
+    url = "https://www.facebook.com/marketplace/houston/search?query=bike&radius=10"
+    same_url = "https://www.facebook.com/marketplace/houston/search?radius=10&query=bike"
+
+    results: List[Any] = []
+    with facebook_marketplace.search_cycle():
+        results.append(facebook_marketplace.get_shared_search_results(url))
+        results.append(facebook_marketplace.get_shared_search_results(same_url))
+    # the page is loaded once, and each item gets its own copy of the listings
+    assert urls == [url]
+    assert results[0] == results[1]
+    assert results[0][0] is not results[1][0]
+    assert (
+        temp_cache.get((CacheType.COUNTERS.value, CounterItem.SHARED_SEARCH.value, "facebook"))
+        == 1
+    )
+
+    # results are not shared outside of a search cycle
+    facebook_marketplace.get_shared_search_results(url)
+    assert len(urls) == 2
+
+
+def test_search_results_cache(
+    facebook_marketplace: FacebookMarketplace,
+    temp_cache: Cache,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr("ai_marketplace_monitor.utils.cache", temp_cache)
+    monkeypatch.setattr("ai_marketplace_monitor.marketplace.cache", temp_cache)
+    urls: List[str] = []
+
+    def get_search_results(url: str, max_pages: int = 1) -> List[Listing]:
+        urls.append(url)
+        return [make_listing(0), make_listing(1)] if "empty" not in url else []
+
+    monkeypatch.setattr(facebook_marketplace, "get_search_results", get_search_results)
+    url = "https://www.facebook.com/marketplace/houston/search?query=bike"
+
+    # no caching by default
+    facebook_marketplace.get_shared_search_results(url)
+    facebook_marketplace.get_shared_search_results(url)
+    assert len(urls) == 2
+
+    facebook_marketplace.config.search_cache_ttl = 300
+    first = facebook_marketplace.get_shared_search_results(url)
+    second = facebook_marketplace.get_shared_search_results(url)
+    assert len(urls) == 3
+    assert first == second == [make_listing(0), make_listing(1)]
+    # results with a different number of pages are cached separately
+    facebook_marketplace.get_shared_search_results(url, max_pages=2)
+    assert len(urls) == 4
+    # empty results are not cached
+    facebook_marketplace.get_shared_search_results(url.replace("bike", "empty"))
+    facebook_marketplace.get_shared_search_results(url.replace("bike", "empty"))
+    assert len(urls) == 6
+
+    def count(item: CounterItem) -> int:
+        return temp_cache.get((CacheType.COUNTERS.value, item.value, "facebook"))
+
+    assert count(CounterItem.SEARCH_CACHE_HIT) == 1
+    assert count(CounterItem.SEARCH_CACHE_MISS) == 4
+
+
+def test_search_cache_ttl_config() -> None:
+    config = FacebookMarketplaceConfig(name="facebook", search_cache_ttl="5m")
+    assert config.search_cache_ttl == 300
+    with pytest.raises(ValueError, match="search_cache_ttl"):
+        FacebookMarketplaceConfig(name="facebook", search_cache_ttl=-1)
+
+
+def test_search_plan_per_city(monkeypatch: pytest.MonkeyPatch) -> None:
+    converter = MagicMock()
+    converter.convert.side_effect = lambda amount, cur, currency: amount * 2
+    monkeypatch.setattr("ai_marketplace_monitor.facebook.currency_converter", lambda: converter)
+    marketplace = FacebookMarketplace(name="facebook", browser=MagicMock(), logger=MagicMock())
+    marketplace.configure(
+        FacebookMarketplaceConfig(
+            name="facebook",
+            search_city=["houston", "toronto"],
+            radius=[10, 20],
+            currency=["USD", "CAD"],
+        )
+    )
+    item = FacebookItemConfig(
+        name="bike", search_phrases=["bike"], min_price="100 USD", max_price="300 USD"
+    )
+    searches = marketplace.build_search_urls(item)
+    # options of one city do not leak into the url of another
+    assert [x[-1] for x in searches] == [
+        "https://www.facebook.com/marketplace/houston/search?query=bike&radius=10&maxPrice=300&minPrice=100",
+        "https://www.facebook.com/marketplace/toronto/search?query=bike&radius=20&maxPrice=600&minPrice=200",
+    ]
+    # the plan is built once
+    assert marketplace.build_search_urls(item) is searches
+    assert converter.convert.call_count == 2
+
+    # plans are rebuilt for changed item and marketplace configurations
+    changed = FacebookItemConfig(name="bike", search_phrases=["bike"], max_price="300")
+    assert marketplace.build_search_urls(changed)[1][-1].endswith("radius=20&maxPrice=300")
+    marketplace.configure(FacebookMarketplaceConfig(name="facebook", search_city=["houston"]))
+    assert [x[-1] for x in marketplace.build_search_urls(changed)] == [
+        "https://www.facebook.com/marketplace/houston/search?query=bike&maxPrice=300"
+    ]
+
+
+def test_free_items_have_no_price_range(facebook_marketplace: FacebookMarketplace) -> None:
+    item = FacebookItemConfig(
+        name="free", search_phrases=["chair"], max_price="100", category="free"
+    )
+    assert [x[-1] for x in facebook_marketplace.build_search_urls(item)] == [
+        "https://www.facebook.com/marketplace/houston/search?query=chair&category=free"
+    ]
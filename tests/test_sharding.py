@@ -0,0 +1,114 @@
+import queue
+from typing import Any, List
+from unittest.mock import MagicMock
+
+import pytest
+
+import ai_marketplace_monitor.sharding
+from ai_marketplace_monitor.ai import AIResponse
+from ai_marketplace_monitor.monitor import MarketplaceMonitor
+from ai_marketplace_monitor.sharding import ShardCoordinator, shard_items, shard_proxies
+from ai_marketplace_monitor.utils import MonitorConfig
+
+from .helpers import make_listing
+
+
+def test_shard_items() -> None:
+    items = [f"item{i}" for i in range(7)]
+    shards = [shard_items(items, i, 3) for i in range(3)]
+    assert shards == [["item0", "item3", "item6"], ["item1", "item4"], ["item2", "item5"]]
+    # every item is searched by exactly one worker
+    assert sorted(x for shard in shards for x in shard) == sorted(items)
+    # groups of items that share search pages are not split between workers
+    groups = [["a", "b"], ["c"], ["d", "e", "f"]]
+    assert shard_items(groups, 0, 2) == [["a", "b"], ["d", "e", "f"]]
+    assert shard_items(groups, 1, 2) == [["c"]]
+
+
+def test_shard_proxies() -> None:
+    proxies = [f"http://proxy{i}:8080" for i in range(5)]
+    shards = [shard_proxies(proxies, i, 2) for i in range(2)]
+    # each worker rotates between its own share of the proxy servers
+    assert shards == [proxies[0::2], proxies[1::2]]
+    # with fewer proxy servers than workers, servers are shared
+    assert [shard_proxies(proxies[:2], i, 3) for i in range(3)] == [
+        [proxies[0]],
+        [proxies[1]],
+        [proxies[0]],
+    ]
+
+
+def test_workers_wait_for_session(monkeypatch: pytest.MonkeyPatch) -> None:
+    coordinator = ShardCoordinator([], workers=3)
+    started: List[int] = []
+
+    def start_worker(index: int) -> MagicMock:
+        started.append(index)
+        process = MagicMock()
+        process.is_alive.return_value = True
+        return process
+
+    monkeypatch.setattr(coordinator, "start_worker", start_worker)
+    coordinator.start()
+    # the first worker logs in before the others are started
+    assert started == [0]
+    coordinator.check_workers()
+    assert started == [0]
+    coordinator.session_ready.set()
+    coordinator.check_workers()
+    assert started == [0, 1, 2]
+    coordinator.check_workers()
+    assert started == [0, 1, 2]
+
+
+def test_workers_start_after_timeout(monkeypatch: pytest.MonkeyPatch) -> None:
+    coordinator = ShardCoordinator([], workers=2)
+    monkeypatch.setattr(coordinator, "start_worker", lambda index: MagicMock())
+    coordinator.start()
+    assert len(coordinator.processes) == 1
+    coordinator.started_at -= ai_marketplace_monitor.sharding.SESSION_TIMEOUT
+    coordinator.check_workers()
+    assert len(coordinator.processes) == 2
+
+
+def test_workers_option() -> None:
+    assert MonitorConfig(name="monitor", workers=4).workers == 4
+    with pytest.raises(ValueError, match="workers"):
+        MonitorConfig(name="monitor", workers=0)
+
+
+def test_worker_sends_notifications() -> None:
+    # avoid starting playwright, which is not needed to send notifications
+    monitor = MarketplaceMonitor.__new__(MarketplaceMonitor)
+    monitor.config = MagicMock()
+    monitor.notifications = queue.Queue()
+    item_config = MagicMock()
+    item_config.name = "item"
+    listings = [make_listing(1)]
+    ratings = [AIResponse(score=5, comment="great")]
+
+    monitor.notify_users(["user1"], listings, ratings, item_config)
+    assert monitor.notifications.get_nowait() == ("item", ["user1"], listings, ratings)
+
+
+def test_coordinator_notifies_users(monkeypatch: pytest.MonkeyPatch) -> None:
+    notified: List[Any] = []
+
+    class FakeUser:
+        def __init__(self: "FakeUser", config: Any, logger: Any = None) -> None:
+            self.config = config
+
+        def notify(self: "FakeUser", listings: Any, ratings: Any, item_config: Any) -> None:
+            notified.append((self.config, listings, item_config))
+
+    monkeypatch.setattr(ai_marketplace_monitor.sharding, "User", FakeUser)
+    config = MagicMock()
+    config.item = {"item": "item config"}
+    config.user = {"user1": "user1 config"}
+    coordinator = ShardCoordinator([], workers=2)
+    listings = [make_listing(1)]
+
+    coordinator.notify(config, ("item", ["user1", "removed"], listings, []))
+    # items removed from the configuration are not notified
+    coordinator.notify(config, ("removed", ["user1"], listings, []))
+    assert notified == [("user1 config", listings, "item config")]
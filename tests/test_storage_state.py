@@ -0,0 +1,120 @@
+import json
+import stat
+from pathlib import Path
+from typing import Any, Dict, List
+from unittest.mock import MagicMock
+
+import pytest
+
+import ai_marketplace_monitor.facebook
+from ai_marketplace_monitor.facebook import FacebookMarketplace
+from ai_marketplace_monitor.pacing import Pacer
+
+
+@pytest.fixture
+def facebook_marketplace(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> FacebookMarketplace:
+    monkeypatch.setattr(ai_marketplace_monitor.facebook, "amm_home", tmp_path)
+    marketplace = FacebookMarketplace(name="facebook", browser=MagicMock(), logger=MagicMock())
+    marketplace.config = MagicMock()
+    marketplace.config.username = "user@example.com"
+    marketplace.config.password = "password"
+    marketplace.config.login_wait_time = 0
+    marketplace.config.monitor_config = None
+    marketplace.pacer = Pacer(sleep=lambda x: None)
+    return marketplace
+
+
+def set_cookies(marketplace: FacebookMarketplace, cookies: List[Dict[str, Any]]) -> Any:
+    context = marketplace.browser.new_context.return_value  # type: ignore[union-attr]
+    context.cookies.return_value = cookies
+    context.new_page.return_value.context = context
+    return context
+
+
+def test_storage_state_path(facebook_marketplace: FacebookMarketplace, tmp_path: Path) -> None:
+    path = facebook_marketplace.storage_state_path
+    assert path.parent == tmp_path
+    assert "user@example.com" not in path.name
+    facebook_marketplace.config.username = "other@example.com"
+    assert facebook_marketplace.storage_state_path != path
+
+
+def test_create_page_restores_session(facebook_marketplace: FacebookMarketplace) -> None:
+    browser = facebook_marketplace.browser
+    facebook_marketplace.create_page()
+    assert browser.new_context.call_args.kwargs["storage_state"] is None  # type: ignore[union-attr]
+
+    facebook_marketplace.storage_state_path.write_text("{}")
+    facebook_marketplace.page = None
+    facebook_marketplace.create_page()
+    assert (
+        browser.new_context.call_args.kwargs["storage_state"]  # type: ignore[union-attr]
+        == facebook_marketplace.storage_state_path
+    )
+
+
+def test_login_with_valid_session(
+    facebook_marketplace: FacebookMarketplace, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    set_cookies(facebook_marketplace, [{"name": "c_user", "value": "1"}])
+    urls: List[str] = []
+    monkeypatch.setattr(facebook_marketplace, "goto_url", urls.append)
+    page = facebook_marketplace.browser.new_context.return_value.new_page.return_value  # type: ignore[union-attr]
+    page.url = FacebookMarketplace.marketplace_url
+
+    facebook_marketplace.login()
+    # only the marketplace page is loaded to validate the session
+    assert urls == [FacebookMarketplace.marketplace_url]
+    page.wait_for_selector.assert_not_called()
+
+
+def test_login_with_expired_session(
+    facebook_marketplace: FacebookMarketplace, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    facebook_marketplace.storage_state_path.write_text("{}")
+    context = set_cookies(facebook_marketplace, [{"name": "c_user", "value": "1"}])
+    urls: List[str] = []
+    monkeypatch.setattr(facebook_marketplace, "goto_url", urls.append)
+    page = context.new_page.return_value
+    page.url = "https://www.facebook.com/login/?next=marketplace"
+
+    facebook_marketplace.login()
+    # the saved session is discarded and the full login is performed
+    assert urls == [FacebookMarketplace.marketplace_url, FacebookMarketplace.initial_url]
+    assert not facebook_marketplace.storage_state_path.exists()
+    context.clear_cookies.assert_called_once()
+    assert page.wait_for_selector.call_count == 2
+    # the new session is saved
+    context.storage_state.assert_called_once_with()
+
+
+def test_save_storage_state(facebook_marketplace: FacebookMarketplace, tmp_path: Path) -> None:
+    state = {"cookies": [{"name": "c_user", "value": "1"}], "origins": []}
+    context = set_cookies(facebook_marketplace, [])
+    context.storage_state.return_value = state
+    facebook_marketplace.page = context.new_page()
+
+    facebook_marketplace.save_storage_state()
+    path = facebook_marketplace.storage_state_path
+    assert json.loads(path.read_text()) == state
+    # the session is only readable by the user, and no temporary file is left
+    assert stat.S_IMODE(path.stat().st_mode) == 0o600
+    assert list(tmp_path.iterdir()) == [path]
+
+    # a failed save keeps the previous session
+    context.storage_state.side_effect = RuntimeError("Target closed")
+    facebook_marketplace.save_storage_state()
+    assert json.loads(path.read_text()) == state
+
+
+def test_login_without_session(
+    facebook_marketplace: FacebookMarketplace, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    context = set_cookies(facebook_marketplace, [])
+    urls: List[str] = []
+    monkeypatch.setattr(facebook_marketplace, "goto_url", urls.append)
+
+    facebook_marketplace.login()
+    assert urls == [FacebookMarketplace.initial_url]
+    # login did not succeed, nothing to save
+    context.storage_state.assert_not_called()
@@ -2,6 +2,13 @@ from typing import List
 
 import pytest
 
+from ai_marketplace_monitor.facebook import FacebookItemConfig
+from ai_marketplace_monitor.matcher import (
+    MIN_AUTOMATON_TERMS,
+    LiteralAutomaton,
+    compile_expression,
+    compile_keywords,
+)
 from ai_marketplace_monitor.utils import is_substring
 
 
@@ -42,3 +49,52 @@ from ai_marketplace_monitor.utils import is_substring
 )
 def test_is_substring(var1: List[str] | str, var2: str, res: bool) -> None:
     assert is_substring(var1, var2) == res
+
+
+def test_compiled_keywords() -> None:
+    matcher = compile_keywords(("DJI AND NOT Camera", "gopro"))
+    # matchers and expressions are compiled once
+    assert compile_keywords(("DJI AND NOT Camera", "gopro")) is matcher
+    assert compile_expression("gopro") is compile_expression("gopro")
+    assert matcher("DJI  Drone")
+    assert not matcher("DJI drone with camera")
+    assert matcher.match_normalized("gopro hero")
+    # terms of an expression can match different texts, but not across texts
+    assert compile_keywords("DJI AND drone")(["DJI", "drone"])
+    assert not compile_keywords("go pro")(["go", "pro"])
+
+
+def test_keyword_errors_reported_at_config_time() -> None:
+    with pytest.warns(UserWarning, match="Treating it as literal string"):
+        FacebookItemConfig(
+            name="item", search_phrases=["item"], antikeywords=["broken AND (parts"]
+        )
+    assert compile_keywords(("broken AND (parts",)).errors
+    assert not compile_keywords(('"broken" AND parts', "AND")).errors
+
+
+@pytest.mark.parametrize(
+    "text,res",
+    [
+        ("ushers", True),
+        ("xxhisxx", True),
+        ("sh", False),
+        ("hxe", False),
+        ("", False),
+    ],
+)
+def test_literal_automaton(text: str, res: bool) -> None:
+    assert LiteralAutomaton(["he", "she", "his", "hers"]).search(text) == res
+    assert LiteralAutomaton(["he", "she", "his", "hers"]).search(text * 3) == res
+
+
+def test_many_antikeywords() -> None:
+    spam = [f"spam phrase {idx}" for idx in range(MIN_AUTOMATON_TERMS)]
+    matcher = compile_keywords((*spam, '"go pro" AND NOT broken'))
+    # plain terms are searched together, logical expressions one by one
+    assert matcher.automaton is not None
+    assert len(matcher.predicates) == 1
+    assert matcher("This is SPAM  phrase 12")
+    assert matcher(["camera", "go pro"])
+    assert not matcher("broken go pro")
+    assert not matcher("spam phrase")